@@ -0,0 +1,190 @@
+"""Priority-aware admission control.
+
+Each request is put in a priority tier by its path. The controller tracks
+requests in flight and event-loop lag, and turns the worse of the two into
+a load figure relative to its limits; every tier has a load at which its
+requests are refused with 503 and a Retry-After, so under pressure the
+least important traffic is shed first while critical requests are still
+served. Refused requests cost a dict lookup and a short response instead
+of a handler run, which is what frees the loop for the rest.
+
+Requests are shed rather than queued: a queued request holds its
+connection and its place in the client's timeout just the same, and a
+client told when to retry spreads its load out by itself.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Tiers from shed-last to shed-first, with the load (fraction of the limits)
+# at which each starts being refused; critical requests are never refused
+TIER_LIMITS = {"critical": None, "high": 1.0, "admin": 0.85, "medium": 0.7, "lower": 0.5}
+# Seconds a refused client is told to wait, longer for less urgent tiers
+TIER_RETRY_AFTER = {"critical": 1, "high": 1, "admin": 2, "medium": 5, "lower": 10}
+LAG_INTERVAL = 0.05
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task.
+
+    The reading jumps straight to a higher sample and decays towards lower
+    ones, so a stall registers at once and clears over a few intervals. While
+    the monitor's own wake-up is overdue, the overdue time counts as lag too:
+    a loop stalled behind a burst is seen before the monitor gets to run.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL, decay: float = 0.7):
+        self.interval = interval
+        self.decay = decay
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._due: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, time.perf_counter() - self._due)
+            self.lag = sample if sample > self.lag else self.lag * self.decay + sample * (1 - self.decay)
+            self.max_lag = max(self.max_lag, sample)
+
+    def current(self) -> float:
+        if self._due is None:
+            return self.lag
+        return max(self.lag, time.perf_counter() - self._due)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._due = None
+
+
+class AdmissionController:
+    """Decides per request whether the server has room for its tier"""
+
+    def __init__(self, max_in_flight: int = 256, max_lag: float = 0.1, default_tier: str = "high",
+                 enabled: bool = True, monitor: Optional[LoopLagMonitor] = None):
+        self.max_in_flight = max_in_flight
+        self.max_lag = max_lag
+        self.default_tier = default_tier
+        self.enabled = enabled
+        self.monitor = monitor or LoopLagMonitor()
+        self.in_flight = 0
+        self._routes: Dict[str, Optional[str]] = {}
+        self._prefixes: List[Tuple[str, Optional[str]]] = []
+        self.admitted = dict.fromkeys(TIER_LIMITS, 0)
+        self.shed = dict.fromkeys(TIER_LIMITS, 0)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AdmissionController":
+        """Configured by ADMISSION_* environment variables"""
+        return cls(
+            max_in_flight=int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 256)),
+            max_lag=float(os.environ.get("ADMISSION_MAX_LAG_MS", 100)) / 1000,
+            enabled=os.environ.get("ADMISSION_CONTROL", "1") == "1",
+            **kwargs
+        )
+
+    def assign(self, routes: Dict[str, Optional[str]]) -> None:
+        """Tiers for exact paths; None exempts a path from admission entirely"""
+        for path, tier in routes.items():
+            if tier is not None and tier not in TIER_LIMITS:
+                raise ValueError(f"unknown tier {tier!r}")
+            self._routes[path] = tier
+
+    def assign_prefix(self, prefix: str, tier: Optional[str]) -> None:
+        if tier is not None and tier not in TIER_LIMITS:
+            raise ValueError(f"unknown tier {tier!r}")
+        self._prefixes.append((prefix, tier))
+
+    def tier(self, path: str) -> Optional[str]:
+        if path in self._routes:
+            return self._routes[path]
+        # Not memoized: paths under a prefix are chosen by clients, and there are few prefixes
+        for prefix, tier in self._prefixes:
+            if path.startswith(prefix):
+                return tier
+        return self.default_tier
+
+    def load(self) -> float:
+        return max(self.in_flight / self.max_in_flight, self.monitor.current() / self.max_lag)
+
+    def admit(self, tier: str) -> bool:
+        limit = TIER_LIMITS[tier]
+        if limit is not None and self.load() >= limit:
+            self.shed[tier] += 1
+            return False
+        self.admitted[tier] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "loop_lag_ms": round(self.monitor.current() * 1000, 2),
+            "max_loop_lag_ms": round(self.monitor.max_lag * 1000, 2),
+            "load": round(self.load(), 3),
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "routes": len(self._routes),
+        }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware refusing requests whose tier is over its load limit"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if not controller.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tier = controller.tier(scope["path"])
+        if tier is None:
+            await self.app(scope, receive, send)
+            return
+        if not controller.admit(tier):
+            await self._refuse(send, TIER_RETRY_AFTER[tier])
+            return
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
+
+    @staticmethod
+    async def _refuse(send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def tiers_for_layers(layer_priorities: Dict[str, Iterable[str]], path_prefix: str) -> Dict[str, str]:
+    """Layer endpoint paths mapped to their tier, from a priority -> layers table"""
+    return {
+        path_prefix + layer.replace("_", "-"): tier
+        for tier, layers in layer_priorities.items()
+        for layer in layers
+    }
@@ -0,0 +1,220 @@
+"""Nearest-amenity queries over the EV charger, rest area and travel center layers.
+
+Each layer is indexed in a k-d tree over a flat projection of Illinois
+(miles east/north), rebuilt whenever the layer refreshes. Queries are
+best-first: tree nodes and points share one priority queue ordered by their
+distance lower bound, so matches come out nearest first and the search stops
+as soon as k of them pass the attribute filter. Along a route, segments are
+walked in driving order and only the tree branches overlapping each
+segment's corridor are visited.
+"""
+import heapq
+import itertools
+import math
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from geo import MILES_PER_DEGREE
+
+AMENITY_LAYERS = ["ev_stations", "rest_areas", "travel_centers"]
+
+# Points in a leaf before a k-d tree node is split
+LEAF_SIZE = 8
+# Reference latitude of the projection (central Illinois); east-west
+# distances are within about 4% across the state
+PROJECTION_LATITUDE = 40.0
+# A heading query accepts amenities within this many degrees either side
+HEADING_CONE_DEGREES = 45.0
+
+_KX = MILES_PER_DEGREE * math.cos(math.radians(PROJECTION_LATITUDE))
+
+
+def project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """(x, y) in miles east and north"""
+    return longitude * _KX, latitude * MILES_PER_DEGREE
+
+
+def _box_distance(box: Tuple[float, float, float, float], x: float, y: float) -> float:
+    min_x, min_y, max_x, max_y = box
+    dx = max(min_x - x, 0.0, x - max_x)
+    dy = max(min_y - y, 0.0, y - max_y)
+    return math.hypot(dx, dy)
+
+
+def _boxes_overlap(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class _Node:
+    __slots__ = ("box", "items", "left", "right")
+
+    def __init__(self, box, items=None, left=None, right=None):
+        self.box = box
+        self.items = items
+        self.left = left
+        self.right = right
+
+
+class KDTree:
+    """Static 2-d tree over (x, y, item) entries"""
+
+    def __init__(self, entries: Sequence[Tuple[float, float, Any]]):
+        self.size = len(entries)
+        self.root = self._build(list(entries)) if entries else None
+
+    def _build(self, entries: List[Tuple[float, float, Any]]) -> _Node:
+        box = (
+            min(e[0] for e in entries), min(e[1] for e in entries),
+            max(e[0] for e in entries), max(e[1] for e in entries),
+        )
+        if len(entries) <= LEAF_SIZE:
+            return _Node(box, items=entries)
+        # Split the wider side so long thin states still get square-ish cells
+        axis = 0 if box[2] - box[0] >= box[3] - box[1] else 1
+        entries.sort(key=lambda e: e[axis])
+        middle = len(entries) // 2
+        return _Node(
+            box,
+            left=self._build(entries[:middle]),
+            right=self._build(entries[middle:]),
+        )
+
+    def nearest(self, x: float, y: float, max_distance: float = math.inf) -> Iterator[Tuple[float, Any]]:
+        """(distance, item) in increasing distance, lazily, up to max_distance"""
+        if self.root is None:
+            return
+        counter = itertools.count()
+        queue = [(_box_distance(self.root.box, x, y), next(counter), self.root, None)]
+        while queue:
+            distance, _, node, item = heapq.heappop(queue)
+            if distance > max_distance:
+                return
+            if node is None:
+                yield distance, item
+                continue
+            if node.items is not None:
+                for px, py, entry in node.items:
+                    heapq.heappush(queue, (math.hypot(px - x, py - y), next(counter), None, entry))
+            else:
+                for child in (node.left, node.right):
+                    heapq.heappush(queue, (_box_distance(child.box, x, y), next(counter), child, None))
+
+    def within_box(self, box: Tuple[float, float, float, float]) -> Iterator[Tuple[float, float, Any]]:
+        """Entries whose point lies in box"""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not _boxes_overlap(node.box, box):
+                continue
+            if node.items is not None:
+                for entry in node.items:
+                    if box[0] <= entry[0] <= box[2] and box[1] <= entry[1] <= box[3]:
+                        yield entry
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+
+
+def amenity_filter(
+    min_available: Optional[int] = None,
+    connector: Optional[str] = None,
+    truck_parking: Optional[bool] = None,
+    amenity: Optional[str] = None,
+) -> Callable[[Dict], bool]:
+    """Predicate over layer points; unset criteria match everything"""
+    connector = connector.lower() if connector else None
+    amenity = amenity.lower() if amenity else None
+
+    def matches(point: Dict) -> bool:
+        if min_available is not None and point.get("available_stations", 0) < min_available:
+            return False
+        if connector is not None and connector not in (c.lower() for c in point.get("connector_types", ())):
+            return False
+        if truck_parking is not None and bool(point.get("truck_parking")) != truck_parking:
+            return False
+        if amenity is not None:
+            offered = list(point.get("amenities", ())) + list(point.get("services", ()))
+            if not any(amenity in item.lower() for item in offered):
+                return False
+        return True
+
+    return matches
+
+
+def _bearing(dx: float, dy: float) -> float:
+    return math.degrees(math.atan2(dx, dy)) % 360
+
+
+def _angle_between(a: float, b: float) -> float:
+    return abs((a - b + 180) % 360 - 180)
+
+
+class AmenityIndex:
+    """Per-layer k-d trees over amenity points"""
+
+    def __init__(self):
+        self.trees: Dict[str, KDTree] = {}
+
+    def set_layer(self, layer_type: str, points: List[Dict]):
+        entries = [
+            (*project(p["location"]["latitude"], p["location"]["longitude"]), p)
+            for p in points
+        ]
+        self.trees[layer_type] = KDTree(entries)
+
+    def nearest(
+        self, layer_type: str, latitude: float, longitude: float, k: int, max_distance_miles: float,
+        predicate: Callable[[Dict], bool] = lambda point: True, heading: Optional[float] = None,
+    ) -> List[Tuple[float, Dict]]:
+        """Up to k (miles, point) closest to a location, optionally ahead on a heading"""
+        tree = self.trees.get(layer_type)
+        if tree is None:
+            return []
+        x, y = project(latitude, longitude)
+        results = []
+        for distance, point in tree.nearest(x, y, max_distance_miles):
+            if heading is not None:
+                px, py = project(point["location"]["latitude"], point["location"]["longitude"])
+                if distance > 0 and _angle_between(_bearing(px - x, py - y), heading) > HEADING_CONE_DEGREES:
+                    continue
+            if predicate(point):
+                results.append((distance, point))
+                if len(results) == k:
+                    break
+        return results
+
+    def along_route(
+        self, layer_type: str, polyline: List[List[float]], k: int, max_distance_miles: float,
+        predicate: Callable[[Dict], bool] = lambda point: True,
+    ) -> List[Tuple[float, float, Dict]]:
+        """The next k (route miles, miles off route, point) within a corridor, in driving order"""
+        tree = self.trees.get(layer_type)
+        if tree is None or len(polyline) < 2:
+            return []
+        path = [project(lat, lng) for lat, lng in polyline]
+        width = max_distance_miles
+        found: Dict[int, Tuple[float, float, Dict]] = {}
+        travelled = 0.0
+        for (ax, ay), (bx, by) in zip(path, path[1:]):
+            # Anything not yet found lies beyond this segment's start, so stop
+            # once k matches are known to come earlier along the route
+            if len(found) >= k and heapq.nsmallest(k, (v[0] for v in found.values()))[-1] <= travelled:
+                break
+            dx, dy = bx - ax, by - ay
+            length_sq = dx * dx + dy * dy
+            length = math.sqrt(length_sq)
+            box = (min(ax, bx) - width, min(ay, by) - width, max(ax, bx) + width, max(ay, by) + width)
+            for px, py, point in tree.within_box(box):
+                t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                offset = math.hypot(px - ax - t * dx, py - ay - t * dy)
+                if offset > width:
+                    continue
+                key = id(point)
+                route_miles = travelled + t * length
+                if key in found and found[key][0] <= route_miles:
+                    continue
+                if key in found or predicate(point):
+                    found[key] = (route_miles, offset, point)
+            travelled += length
+        return heapq.nsmallest(k, found.values(), key=lambda v: (v[0], v[1]))
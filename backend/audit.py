@@ -0,0 +1,184 @@
+"""Admin audit log: a ring buffer of recent entries in front of an append-only store.
+
+Recording an entry only appends to the ring and a bounded queue, so it never
+waits on the database; a background task drains the queue to MongoDB in
+batches. Reads are keyset-paginated newest first on (timestamp, id): a page
+is served from the ring when it holds enough matching entries and continues
+in the store, which is indexed for the supported filters, when it does not.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from keyset import NEWEST_FIRST, Key, decode_cursor, encode_cursor, key_of, older_than
+
+logger = logging.getLogger(__name__)
+
+# Most recent entries kept in memory
+AUDIT_RING_SIZE = 10_000
+# Entries waiting to be written before new ones are dropped
+AUDIT_QUEUE_SIZE = 10_000
+AUDIT_BATCH_SIZE = 500
+AUDIT_WRITE_ATTEMPTS = 3
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Entries are stamped with naive UTC; bring a timezone-aware bound to the same form"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class MongoAuditStore:
+    """Append-only audit collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index(NEWEST_FIRST)
+        await self.collection.create_index([("user", 1), *NEWEST_FIRST])
+        await self.collection.create_index([("action", 1), *NEWEST_FIRST])
+
+    async def insert_many(self, entries: List[Dict[str, Any]]) -> None:
+        # insert_many adds _id to the dicts it is given; the ring keeps the originals
+        await self.collection.insert_many([dict(entry) for entry in entries], ordered=False)
+
+    async def query(self, filters: Dict[str, Any], before: Optional[Key], limit: int) -> List[Dict[str, Any]]:
+        query = {**filters, **older_than(before)}
+        cursor = self.collection.find(query, {"_id": 0}).sort(NEWEST_FIRST).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def estimated_count(self) -> int:
+        # From collection metadata, without scanning
+        return await self.collection.estimated_document_count()
+
+
+class AuditLog:
+    """Records audit entries without blocking and pages through them newest first"""
+
+    def __init__(self, store, ring_size: int = AUDIT_RING_SIZE, queue_size: int = AUDIT_QUEUE_SIZE):
+        self.store = store
+        self.ring: deque = deque(maxlen=ring_size)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self._sequence = 0
+        self._last_timestamp = datetime.min
+
+    def record(self, action: str, user: str, details: str = "") -> Dict[str, Any]:
+        now = datetime.utcnow()
+        # MongoDB stores milliseconds; trimming here keeps ring and store keys equal.
+        # Timestamps never go backwards and ids sort by sequence within a
+        # millisecond, so the ring's insertion order is also its key order.
+        timestamp = max(now.replace(microsecond=now.microsecond // 1000 * 1000), self._last_timestamp)
+        self._last_timestamp = timestamp
+        self._sequence += 1
+        entry = {
+            "id": f"{self._sequence:012d}-{uuid.uuid4().hex[:12]}",
+            "action": action,
+            "user": user,
+            "timestamp": timestamp,
+            "details": details,
+        }
+        self.ring.append(entry)
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Audit queue full, entry %s not persisted", entry["id"])
+        return entry
+
+    async def run(self) -> None:
+        """Background writer: drain the queue to the store in batches"""
+        try:
+            await self.store.ensure_indexes()
+        except Exception:
+            logger.exception("Could not create audit indexes")
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < AUDIT_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+                try:
+                    await self.store.insert_many(batch)
+                    self.written += len(batch)
+                    break
+                except Exception:
+                    logger.exception("Audit write failed (attempt %d of %d)", attempt, AUDIT_WRITE_ATTEMPTS)
+                    if attempt == AUDIT_WRITE_ATTEMPTS:
+                        self.dropped += len(batch)
+                    else:
+                        await asyncio.sleep(attempt)
+
+    async def page(
+        self, limit: int = 50, cursor: Optional[str] = None, user: Optional[str] = None,
+        action: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Up to limit matching entries older than the cursor, and the cursor for the next page"""
+        before = decode_cursor(cursor) if cursor else None
+        results = []
+        for entry in reversed(self.ring):
+            if before is not None and key_of(entry) >= before:
+                continue
+            if since is not None and entry["timestamp"] < since:
+                break
+            if until is not None and entry["timestamp"] > until:
+                continue
+            if (user is None or entry["user"] == user) and (action is None or entry["action"] == action):
+                results.append(entry)
+                if len(results) == limit:
+                    break
+
+        if len(results) < limit:
+            # The rest lies beyond the ring: continue below its oldest entry
+            boundary = before
+            if self.ring and (before is None or key_of(self.ring[0]) < before):
+                boundary = key_of(self.ring[0])
+            if since is None or boundary is None or boundary[0] >= since:
+                filters = self._filters(user, action, since, until)
+                results.extend(await self.store.query(filters, boundary, limit - len(results)))
+
+        next_cursor = encode_cursor(results[-1]) if len(results) == limit else None
+        return results, next_cursor
+
+    @staticmethod
+    def _filters(user: Optional[str], action: Optional[str],
+                 since: Optional[datetime], until: Optional[datetime]) -> Dict[str, Any]:
+        filters: Dict[str, Any] = {}
+        if user is not None:
+            filters["user"] = user
+        if action is not None:
+            filters["action"] = action
+        if since is not None or until is not None:
+            filters["timestamp"] = {}
+            if since is not None:
+                filters["timestamp"]["$gte"] = since
+            if until is not None:
+                filters["timestamp"]["$lte"] = until
+        return filters
+
+    async def estimated_total(self) -> int:
+        """Entries in the whole log, ignoring filters: those stored plus those waiting to be written"""
+        try:
+            stored = await self.store.estimated_count()
+        except Exception:
+            logger.exception("Could not count audit entries")
+            return len(self.ring)
+        return stored + self.queue.qsize()
+
+    @property
+    def version(self) -> int:
+        """Entries recorded so far; unchanged means no page has changed"""
+        return self._sequence
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self.ring),
+            "pending": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
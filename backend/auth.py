@@ -0,0 +1,91 @@
+"""Admin token verification with a cache of already-verified tokens.
+
+Admin dashboards poll several endpoints every few seconds with the same
+bearer token, so a verified token is remembered (for at most a minute and
+never past its own expiry) instead of being decoded and checked on every
+request. Revocation drops the cached entry and records the token's id, or
+for "log out everywhere" a per-user cut-off time, until the token would have
+expired anyway.
+"""
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from jose import JWTError, jwt
+
+from cache import LRUCache
+
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL_SECONDS = 60
+
+
+class TokenVerifier:
+    """Issues, verifies and revokes signed access tokens"""
+
+    def __init__(self, secret: str, algorithm: str = "HS256",
+                 cache_size: int = TOKEN_CACHE_SIZE, cache_ttl: float = TOKEN_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.secret = secret
+        self.algorithm = algorithm
+        # Epoch seconds; expiry is checked against it rather than inside jose
+        self.clock = clock
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl, clock=clock)
+        self.cache_ttl = cache_ttl
+        self._revoked: Dict[str, float] = {}  # jti -> token expiry (epoch seconds)
+        self._revoked_before: Dict[str, float] = {}  # subject -> tokens issued earlier are void
+        self.revocations = 0
+
+    def issue(self, claims: Dict[str, Any], expires_delta: timedelta) -> str:
+        # iat keeps sub-second precision so a revocation cut-off is exact
+        now = self.clock()
+        payload = {
+            **claims, "iat": now, "exp": int(now + expires_delta.total_seconds()), "jti": uuid.uuid4().hex
+        }
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """The token's claims if it is valid and not revoked, else None"""
+        payload = self.cache.get(token)
+        if payload is not None:
+            return payload
+        try:
+            payload = jwt.decode(token, self.secret, algorithms=[self.algorithm], options={"verify_exp": False})
+        except JWTError:
+            return None
+        remaining = payload["exp"] - self.clock() if "exp" in payload else self.cache_ttl
+        if remaining <= 0 or self._is_revoked(payload):
+            return None
+        self.cache.set(token, payload, tags=[payload.get("sub")], ttl=min(self.cache_ttl, remaining))
+        return payload
+
+    def revoke(self, token: str) -> bool:
+        """Revoke a single token; False if it was not valid to begin with"""
+        payload = self.verify(token)
+        if payload is None:
+            return False
+        self._purge()
+        self._revoked[payload.get("jti", token)] = payload.get("exp", self.clock() + self.cache_ttl)
+        self.cache.invalidate(token)
+        self.revocations += 1
+        return True
+
+    def revoke_subject(self, subject: str) -> int:
+        """Revoke every token issued to a user so far; returns cached tokens dropped"""
+        self._revoked_before[subject] = self.clock()
+        self.revocations += 1
+        return self.cache.invalidate_tags([subject])
+
+    def _is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if payload.get("jti") in self._revoked:
+            return True
+        cutoff = self._revoked_before.get(payload.get("sub"))
+        return cutoff is not None and payload.get("iat", 0) < cutoff
+
+    def _purge(self) -> None:
+        now = self.clock()
+        for jti in [jti for jti, expires in self._revoked.items() if expires <= now]:
+            del self._revoked[jti]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "revoked": len(self._revoked), "revocations": self.revocations}
@@ -0,0 +1,214 @@
+"""Fan-out of admin broadcasts to connected clients.
+
+Every open alert stream registers a Subscriber with a small bounded queue.
+A broadcast is serialized once and the same frame is appended to each
+targeted queue, in batches that yield to the event loop so a 10k-recipient
+alert does not stall request handling. A client that falls behind loses its
+oldest undelivered frames instead of holding memory or slowing the others.
+Subscribers that share their location are kept in a coarse grid, so a
+regional alert only visits the cells its circle overlaps.
+"""
+import asyncio
+import itertools
+import json
+import math
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from geo import bounding_box, haversine_miles
+
+# Undelivered frames kept per connection before the oldest is dropped
+SUBSCRIBER_QUEUE_SIZE = 32
+# Queues filled between yields to the event loop
+FANOUT_BATCH_SIZE = 500
+REGION_CELL_DEGREES = 0.5
+# Broadcasts whose delivery counts are kept for the admin dashboard
+RECENT_BROADCASTS = 50
+# Comment frame sent on idle streams so proxies keep the connection open
+HEARTBEAT_SECONDS = 15.0
+
+Cell = Tuple[int, int]
+# (alert id, SSE payload); the id is None for published events, which are not counted
+Frame = Tuple[Optional[str], bytes]
+
+
+def _cell(latitude: float, longitude: float) -> Cell:
+    return math.floor(latitude / REGION_CELL_DEGREES), math.floor(longitude / REGION_CELL_DEGREES)
+
+
+def encode_event(event: str, event_id: str, data: Dict[str, Any]) -> bytes:
+    """Server-Sent Events frame"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class Subscriber:
+    """One connected client and its queue of frames not yet written"""
+
+    __slots__ = ("id", "latitude", "longitude", "frames", "queue_size", "ready")
+
+    def __init__(self, subscriber_id: int, latitude: Optional[float], longitude: Optional[float],
+                 queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.id = subscriber_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.frames: deque = deque()
+        self.queue_size = queue_size
+        self.ready = asyncio.Event()
+
+    @property
+    def located(self) -> bool:
+        return self.latitude is not None
+
+    def push(self, frame: Frame) -> Optional[Frame]:
+        """Queue a frame; returns the oldest frame if it had to be dropped to make room"""
+        dropped = self.frames.popleft() if len(self.frames) >= self.queue_size else None
+        self.frames.append(frame)
+        self.ready.set()
+        return dropped
+
+    async def next(self) -> Frame:
+        while not self.frames:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.frames.popleft()
+
+
+class BroadcastHub:
+    """Registry of connected subscribers that fans broadcasts out to them"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, batch_size: int = FANOUT_BATCH_SIZE):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.subscribers: Dict[int, Subscriber] = {}
+        self.grid: Dict[Cell, Set[Subscriber]] = {}
+        self.recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self.sent = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Subscriber:
+        subscriber = Subscriber(next(self._ids), latitude, longitude, self.queue_size)
+        self.subscribers[subscriber.id] = subscriber
+        if subscriber.located:
+            self.grid.setdefault(_cell(latitude, longitude), set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if self.subscribers.pop(subscriber.id, None) is None:
+            return
+        if subscriber.located:
+            cell = _cell(subscriber.latitude, subscriber.longitude)
+            members = self.grid.get(cell)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self.grid[cell]
+
+    def targets(self, region: Optional[Tuple[float, float, float]] = None) -> List[Subscriber]:
+        """All subscribers, or those located within (latitude, longitude, radius_miles)"""
+        if region is None:
+            return list(self.subscribers.values())
+        latitude, longitude, radius = region
+        min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius)
+        low, high = _cell(min_lat, min_lng), _cell(max_lat, max_lng)
+        found = []
+        for row in range(low[0], high[0] + 1):
+            for col in range(low[1], high[1] + 1):
+                for subscriber in self.grid.get((row, col), ()):
+                    if haversine_miles(latitude, longitude, subscriber.latitude, subscriber.longitude) <= radius:
+                        found.append(subscriber)
+        return found
+
+    async def broadcast(self, alert: Dict[str, Any],
+                        region: Optional[Tuple[float, float, float]] = None) -> Dict[str, Any]:
+        """Queue an alert (which must have an "id") for every targeted subscriber.
+
+        Returns the broadcast's delivery record; its "delivered" and "dropped"
+        counts keep growing as streams write the frame or fall behind.
+        """
+        alert_id = alert["id"]
+        frame = (alert_id, encode_event("alert", alert_id, alert))
+        targets = self.targets(region)
+        record = {
+            "id": alert_id,
+            "title": alert.get("title", ""),
+            "sent_at": alert.get("sent_at"),
+            "recipients": len(targets),
+            "delivered": 0,
+            "dropped": 0,
+        }
+        self.recent[alert_id] = record
+        while len(self.recent) > RECENT_BROADCASTS:
+            self.recent.popitem(last=False)
+        self.sent += 1
+        await self._fan_out(frame, targets)
+        return record
+
+    async def publish(self, event: str, data: Dict[str, Any],
+                      region: Optional[Tuple[float, float, float]] = None) -> int:
+        """Queue a non-alert event (data updates) for the targeted subscribers; returns their number.
+
+        Unlike broadcasts, events are not kept in the history and their
+        deliveries and drops are not counted in the broadcast stats.
+        """
+        event_id = f"{event}-{next(self._event_ids)}"
+        targets = self.targets(region)
+        # No alert id, so _count leaves the frame out of the alert figures
+        await self._fan_out((None, encode_event(event, event_id, data)), targets)
+        return len(targets)
+
+    async def _fan_out(self, frame: Frame, targets: List[Subscriber]) -> None:
+        for start in range(0, len(targets), self.batch_size):
+            if start:
+                await asyncio.sleep(0)
+            for subscriber in targets[start:start + self.batch_size]:
+                dropped = subscriber.push(frame)
+                if dropped is not None:
+                    self._count(dropped[0], "dropped")
+
+    def _count(self, alert_id: Optional[str], outcome: str) -> None:
+        if alert_id is None:
+            return
+        if outcome == "delivered":
+            self.delivered += 1
+        else:
+            self.dropped += 1
+        record = self.recent.get(alert_id)
+        if record is not None:
+            record[outcome] += 1
+
+    async def stream(self, latitude: Optional[float] = None, longitude: Optional[float] = None,
+                     heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+        """Server-Sent Events body for one client; unsubscribes when the client goes away"""
+        subscriber = self.subscribe(latitude, longitude)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    alert_id, payload = await asyncio.wait_for(subscriber.next(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield payload
+                # The response has handed the frame to the transport
+                self._count(alert_id, "delivered")
+        finally:
+            self.unsubscribe(subscriber)
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Recent broadcasts, newest first"""
+        return [dict(record) for record in reversed(self.recent.values())]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.subscribers),
+            "located": sum(len(members) for members in self.grid.values()),
+            "broadcasts": self.sent,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
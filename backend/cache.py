@@ -0,0 +1,235 @@
+"""In-process caches used in front of the search and routing handlers."""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class LRUCache:
+    """Bounded LRU cache with optional TTL and tag-based invalidation.
+
+    Entries may carry tags (for example the road edges a cached route uses) so
+    that a change to one tag drops only the entries that depend on it.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = (), ttl: Optional[float] = None) -> None:
+        """Store a value; ttl overrides the cache-wide TTL for this entry"""
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+        tags = frozenset(tags)
+        self._entries[key] = (value, expires_at, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        self.invalidations += 1
+        return True
+
+    def invalidate_tags(self, tags: Iterable[Hashable]) -> int:
+        """Drop every entry carrying any of the given tags"""
+        keys = set()
+        for tag in tags:
+            keys.update(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def invalidate_all(self) -> int:
+        count = len(self._entries)
+        self.clear()
+        self.invalidations += count
+        return count
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one computation.
+
+    The first caller starts the work as a task; callers arriving while it is
+    in flight await the same task instead of repeating it. A caller that is
+    cancelled does not cancel the shared task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+_MISSING = object()
+
+
+class CoalescingCache:
+    """Short-lived result cache with single-flight computation behind it.
+
+    Callers normalize requests into keys (snapped positions, bucketed
+    headings, the version of the data the answer depends on) so that
+    effectively identical requests collide. A miss is computed once however
+    many callers ask for the key meanwhile; results, including None, are then
+    served from the cache until they expire.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.flight = SingleFlight()
+
+    def __len__(self):
+        return len(self.cache)
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                  version: Optional[Callable[[], Hashable]] = None) -> Any:
+        """Cached value for key, else the shared result of compute()
+
+        When version is given, a result is only cached if the version is the
+        same after computing as before, so answers computed from data that
+        changed meanwhile are returned but not kept.
+        """
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = await self.flight.run(key, lambda: self._fill(key, compute, version))
+        return value
+
+    async def _fill(self, key, compute, version):
+        before = version() if version is not None else None
+        value = await compute()
+        if version is None or version() == before:
+            self.cache.set(key, value)
+        return value
+
+    def invalidate_all(self) -> int:
+        return self.cache.invalidate_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "coalescing": self.flight.stats()}
+
+
+class SnapshotCache:
+    """Serialized JSON documents, each rebuilt only when its version changes.
+
+    Callers supply a cheap version token for a document (counters, sizes,
+    timestamps it depends on); while the token is unchanged the stored body
+    and its ETag are reused without regenerating or re-serializing anything.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Hashable, str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, version: Hashable) -> Optional[Tuple[str, str]]:
+        """(etag, body) if the stored document is still at this version"""
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def set(self, name: str, version: Hashable, document: Any) -> Tuple[str, str]:
+        """Serialize a JSON-compatible document and store it with its ETag"""
+        body = json.dumps(document, separators=(",", ":"), sort_keys=True)
+        # Content-derived, so a rebuild that changes nothing keeps the same ETag
+        etag = f'"{name}-{hashlib.blake2b(body.encode(), digest_size=8).hexdigest()}"'
+        self._entries[name] = (version, etag, body)
+        return etag, body
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,154 @@
+"""Expiry of time-bounded hazards.
+
+Closures, incidents and construction points carry an expires_at time (or,
+for points without one, a duration in their details text that it can be
+derived from). The engine keeps a heap of (expires_at, layer, id) entries,
+so what is due next is the heap top and untracking an expired point costs
+O(log n); the engine never scans a layer to find what is due. One task
+sleeps until the earliest expiry, or until an earlier one is scheduled, and
+hands each batch of expired points to its listeners. The server's listener
+filters each affected layer list once per batch and recomputes only the road
+edges the points were joined to; it does not rebuild the layer.
+
+A point that is dropped or rescheduled by a layer refresh leaves its old
+heap entry behind; such entries are recognised as stale and skipped when
+they surface, and the heap is rebuilt if they come to outnumber live ones.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Durations written in hazard details, as generated for each layer
+DURATION_PATTERNS = [
+    (re.compile(r"Duration: (\d+) hours?"), "hours"),
+    (re.compile(r"Clear time: (\d+) minutes?"), "minutes"),
+    (re.compile(r"Estimated completion: (\d+) days?"), "days"),
+]
+
+Expired = Dict[str, List[str]]
+
+logger = logging.getLogger(__name__)
+
+
+def parse_duration(details: str) -> Optional[timedelta]:
+    """Duration stated in a hazard's details text, or None"""
+    for pattern, unit in DURATION_PATTERNS:
+        match = pattern.search(details)
+        if match:
+            return timedelta(**{unit: int(match.group(1))})
+    return None
+
+
+def expires_at(point: Dict[str, Any]) -> Optional[datetime]:
+    """When a point stops applying: its expires_at, else timestamp plus the stated duration"""
+    value = point.get("expires_at")
+    if value is not None:
+        return value
+    duration = parse_duration(point.get("details", ""))
+    if duration is None or point.get("timestamp") is None:
+        return None
+    return point["timestamp"] + duration
+
+
+class ExpiryEngine:
+    """Heap of tracked points by expiry time, with a task removing them when due"""
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.utcnow):
+        self.clock = clock
+        self._heap: List[Tuple[datetime, int, str, str]] = []
+        self._expiry: Dict[Tuple[str, str], datetime] = {}
+        self._layers: Dict[str, Set[str]] = {}
+        self._order = itertools.count()
+        self._wake = asyncio.Event()
+        self.listeners: List[Callable[[Expired], Optional[Awaitable[None]]]] = []
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def add_listener(self, listener: Callable[[Expired], Optional[Awaitable[None]]]) -> None:
+        """Called with {layer: [ids]} for every batch of expired points"""
+        self.listeners.append(listener)
+
+    def track(self, layer: str, points: Iterable[Dict[str, Any]]) -> None:
+        """Schedule a layer's points, replacing whatever was tracked for the layer before"""
+        earliest = self.next_expiry()
+        previous = self._layers.pop(layer, set())
+        current = self._layers[layer] = set()
+        for point in points:
+            at = expires_at(point)
+            if at is None:
+                continue
+            key = (layer, point["id"])
+            current.add(point["id"])
+            if self._expiry.get(key) != at:
+                self._expiry[key] = at
+                heapq.heappush(self._heap, (at, next(self._order), layer, point["id"]))
+        for point_id in previous - current:
+            del self._expiry[(layer, point_id)]
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            self._compact()
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._wake.set()
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._expiry.get((entry[2], entry[3])) == entry[0]]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            at, _, layer, point_id = self._heap[0]
+            if self._expiry.get((layer, point_id)) == at:
+                return
+            heapq.heappop(self._heap)
+
+    def next_expiry(self) -> Optional[datetime]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: datetime) -> Expired:
+        """Stop tracking every point due by now; returns their ids by layer"""
+        expired: Expired = {}
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return expired
+            _, _, layer, point_id = heapq.heappop(self._heap)
+            del self._expiry[(layer, point_id)]
+            self._layers[layer].discard(point_id)
+            expired.setdefault(layer, []).append(point_id)
+
+    async def run(self) -> None:
+        while True:
+            self._wake.clear()
+            due = self.next_expiry()
+            timeout = None if due is None else max(0.0, (due - self.clock()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            expired = self.pop_expired(self.clock())
+            if not expired:
+                continue
+            self.expired += sum(len(ids) for ids in expired.values())
+            for listener in self.listeners:
+                try:
+                    result = listener(expired)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Hazard expiry listener failed")
+
+    def stats(self) -> Dict[str, Any]:
+        due = self.next_expiry()
+        return {
+            "tracked": len(self._expiry),
+            "heap_entries": len(self._heap),
+            "expired": self.expired,
+            "next_expiry": due,
+        }
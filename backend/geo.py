@@ -0,0 +1,127 @@
+"""Lightweight geometry helpers shared by routing, search and alerting.
+
+These stay on plain floats (no geopy) so they are cheap enough to call in
+tight loops; at Illinois scale the spherical approximations are well within
+the accuracy of the underlying data. Bulk work uses the NumPy variants.
+"""
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Miles per degree of latitude; a degree of longitude is this times cos(lat)
+MILES_PER_DEGREE = 69.05
+
+METERS_PER_MILE = 1609.344
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in miles"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_matrix(
+    lats1: Sequence[float], lngs1: Sequence[float],
+    lats2: Sequence[float], lngs2: Sequence[float]
+) -> np.ndarray:
+    """Great-circle distances in miles between every pair of two point sets (N x M)"""
+    phi1 = np.radians(np.asarray(lats1, dtype=float))[:, None]
+    phi2 = np.radians(np.asarray(lats2, dtype=float))[None, :]
+    lmb1 = np.radians(np.asarray(lngs1, dtype=float))[:, None]
+    lmb2 = np.radians(np.asarray(lngs2, dtype=float))[None, :]
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin((lmb2 - lmb1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def point_segment_distance_miles(
+    lat: float, lng: float,
+    lat1: float, lng1: float,
+    lat2: float, lng2: float
+) -> float:
+    """Distance from a point to a short segment, using a local flat projection"""
+    kx = MILES_PER_DEGREE * math.cos(math.radians(lat))
+    ky = MILES_PER_DEGREE
+    px, py = (lng - lng1) * kx, (lat - lat1) * ky
+    dx, dy = (lng2 - lng1) * kx, (lat2 - lat1) * ky
+    seg_len_sq = dx * dx + dy * dy
+    t = 0.0 if seg_len_sq == 0 else max(0.0, min(1.0, (px * dx + py * dy) / seg_len_sq))
+    return math.hypot(px - t * dx, py - t * dy)
+
+
+def bounding_box(lat: float, lng: float, radius_miles: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a radius around a point"""
+    dlat = radius_miles / MILES_PER_DEGREE
+    dlng = radius_miles / (MILES_PER_DEGREE * max(0.01, math.cos(math.radians(lat))))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def encode_polyline(points: List[List[float]], precision: int = 5) -> str:
+    """Encode [lat, lng] pairs with the Google encoded polyline algorithm"""
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        ilat = int(round(lat * factor))
+        ilng = int(round(lng * factor))
+        for delta in (ilat - prev_lat, ilng - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(chunks)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Inverse of encode_polyline"""
+    factor = 10 ** precision
+    points = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append([lat / factor, lng / factor])
+    return points
+
+
+def simplify_polyline(points: List[List[float]], tolerance_meters: float) -> List[List[float]]:
+    """Douglas-Peucker simplification; no dropped point strays more than tolerance"""
+    if tolerance_meters <= 0 or len(points) < 3:
+        return list(points)
+    tolerance_miles = tolerance_meters / METERS_PER_MILE
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        a, b = points[first], points[last]
+        max_distance, max_index = 0.0, None
+        for i in range(first + 1, last):
+            distance = point_segment_distance_miles(points[i][0], points[i][1], a[0], a[1], b[0], b[1])
+            if distance > max_distance:
+                max_distance, max_index = distance, i
+        if max_index is not None and max_distance > tolerance_miles:
+            keep[max_index] = True
+            stack.append((first, max_index))
+            stack.append((max_index, last))
+    return [point for point, kept in zip(points, keep) if kept]
@@ -0,0 +1,303 @@
+"""Geofence subscriptions matched against hazards as layers change.
+
+Clients register an area (a polygon) or a route corridor (a polyline and a
+width) and get the hazards that appear inside it. Subscriptions are kept in
+a multi-resolution grid: each is filed under a handful of cells at the
+finest of a few cell sizes that covers it in at most 4 x 4 cells, and a
+corridor is filed segment by segment, so a long route is not indexed by its
+whole bounding box. Matching a point is then one cell lookup per level plus
+bounding box checks, and exact tests only inside those boxes, against the
+few subscriptions found there; the cost of a layer
+refresh grows with the points that changed, not with the number of
+subscriptions.
+
+Each match is serialized once and appended to the recent-matches queue of
+every geofence it falls in, where streams pick it up; a geofence keeps its
+latest matches while no stream is connected, so a client that reconnects
+with Last-Event-ID gets what it missed.
+"""
+import asyncio
+import itertools
+import math
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from broadcast import HEARTBEAT_SECONDS, encode_event
+from geo import MILES_PER_DEGREE, point_segment_distance_miles
+
+# Cell sizes in degrees, finest first; 0.0125 degrees is about 0.9 miles
+GRID_LEVELS = (0.0125, 0.05, 0.2, 0.8, 3.2)
+# A geofence (or corridor segment) is filed at the finest level covering it in this many cells
+MAX_CELLS_PER_SHAPE = 16
+# Matches a geofence keeps for streams that connect or reconnect later
+GEOFENCE_RECENT_MATCHES = 20
+# Registrations are unauthenticated, so both the index and each client are capped
+GEOFENCE_MAX_TOTAL = 100_000
+GEOFENCE_MAX_PER_OWNER = 20
+# Widest a geofence or corridor segment may be, in degrees of latitude or longitude; Illinois fits
+GEOFENCE_MAX_EXTENT_DEGREES = 6.0
+
+Point = Tuple[float, float]
+Cell = Tuple[int, int, int]
+Box = Tuple[float, float, float, float]
+
+
+class GeofenceLimitExceeded(Exception):
+    """Raised when the index or the registering client already has its maximum of geofences"""
+
+
+class GeofenceTooLarge(GeofenceLimitExceeded):
+    """Raised when a geofence or corridor segment is too wide to index, or not on the map"""
+
+
+def point_in_polygon(latitude: float, longitude: float, polygon: Sequence[Point]) -> bool:
+    """Ray casting in the latitude/longitude plane, fine for areas a few miles across"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lng_i = polygon[i]
+        lat_j, lng_j = polygon[j]
+        if (lat_i > latitude) != (lat_j > latitude):
+            crossing = lng_i + (latitude - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if longitude < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _in_box(latitude: float, longitude: float, box: Box) -> bool:
+    return box[0] <= latitude <= box[2] and box[1] <= longitude <= box[3]
+
+
+def _cells(box: Box) -> List[Cell]:
+    """Cells covering a (min_lat, min_lng, max_lat, max_lng) box at the finest level that fits.
+
+    Raises GeofenceTooLarge for a box that is off the map, wider than
+    GEOFENCE_MAX_EXTENT_DEGREES or not covered by MAX_CELLS_PER_SHAPE cells
+    even at the coarsest level, so one registration cannot file an
+    unbounded number of cells.
+    """
+    min_lat, min_lng, max_lat, max_lng = box
+    if not all(math.isfinite(edge) for edge in box) or min_lat < -90 or max_lat > 90:
+        raise GeofenceTooLarge(f"{box} is not on the map")
+    if max(max_lat - min_lat, max_lng - min_lng) > GEOFENCE_MAX_EXTENT_DEGREES:
+        raise GeofenceTooLarge(f"{box} is wider than {GEOFENCE_MAX_EXTENT_DEGREES} degrees")
+    for level, size in enumerate(GRID_LEVELS):
+        rows = range(math.floor(min_lat / size), math.floor(max_lat / size) + 1)
+        cols = range(math.floor(min_lng / size), math.floor(max_lng / size) + 1)
+        if len(rows) * len(cols) <= MAX_CELLS_PER_SHAPE:
+            return [(level, row, col) for row in rows for col in cols]
+    raise GeofenceTooLarge(f"{box} needs more than {MAX_CELLS_PER_SHAPE} cells")
+
+
+class Geofence:
+    """One subscription and the matches waiting for its streams"""
+
+    __slots__ = ("id", "owner", "name", "kind", "points", "width_miles", "layers", "created_at",
+                 "boxes", "cells", "recent", "matches", "changed")
+
+    def __init__(self, geofence_id: str, owner: Optional[str], name: str, kind: str, points: List[Point],
+                 width_miles: float, layers: Optional[frozenset]):
+        self.id = geofence_id
+        self.owner = owner
+        self.name = name
+        self.kind = kind
+        self.points = points
+        self.width_miles = width_miles
+        self.layers = layers
+        self.created_at = datetime.utcnow()
+        # The polygon's bounding box, or each corridor segment's widened by the corridor width
+        self.boxes: List[Box] = []
+        self.cells: List[Cell] = []
+        self.recent: deque = deque(maxlen=GEOFENCE_RECENT_MATCHES)
+        self.matches = 0
+        # Created when a stream first waits, so idle geofences cost no event
+        self.changed: Optional[asyncio.Event] = None
+
+    def contains(self, latitude: float, longitude: float, segments: Optional[List[int]]) -> bool:
+        if self.kind == "polygon":
+            return _in_box(latitude, longitude, self.boxes[0]) and point_in_polygon(latitude, longitude, self.points)
+        points, boxes = self.points, self.boxes
+        return any(
+            _in_box(latitude, longitude, boxes[i])
+            and point_segment_distance_miles(latitude, longitude, *points[i], *points[i + 1]) <= self.width_miles
+            for i in segments
+        )
+
+    def push(self, sequence: int, frame: bytes) -> None:
+        self.recent.append((sequence, frame))
+        self.matches += 1
+        if self.changed is not None:
+            self.changed.set()
+            self.changed = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "points": [list(point) for point in self.points],
+            "width_miles": self.width_miles if self.kind == "corridor" else None,
+            "layers": sorted(self.layers) if self.layers is not None else None,
+            "created_at": self.created_at,
+            "matches": self.matches,
+        }
+
+
+class GeofenceIndex:
+    """Registered geofences, filed by grid cell for reverse matching of points"""
+
+    def __init__(self, default_layers: Iterable[str] = (), max_total: int = GEOFENCE_MAX_TOTAL,
+                 max_per_owner: int = GEOFENCE_MAX_PER_OWNER):
+        self.default_layers = frozenset(default_layers) or None
+        self.max_total = max_total
+        self.max_per_owner = max_per_owner
+        self.fences: Dict[str, Geofence] = {}
+        self.owners: Dict[str, int] = {}
+        # cell -> geofence id -> corridor segments crossing the cell (None for polygons)
+        self.cells: Dict[Cell, Dict[str, Optional[List[int]]]] = {}
+        self._sequence = itertools.count(1)
+        self.points_matched = 0
+        self.deliveries = 0
+
+    def __len__(self):
+        return len(self.fences)
+
+    def get(self, geofence_id: str) -> Optional[Geofence]:
+        return self.fences.get(geofence_id)
+
+    def add_polygon(self, name: str, polygon: Sequence[Point],
+                    layers: Optional[Iterable[str]] = None, owner: Optional[str] = None) -> Geofence:
+        points = [(float(lat), float(lng)) for lat, lng in polygon]
+        lats = [lat for lat, _ in points]
+        lngs = [lng for _, lng in points]
+        box = (min(lats), min(lngs), max(lats), max(lngs))
+        cells = _cells(box)
+        geofence = self._new(owner, name, "polygon", points, 0.0, layers)
+        geofence.boxes.append(box)
+        self._file(geofence, cells, None)
+        return geofence
+
+    def add_corridor(self, name: str, route: Sequence[Point], width_miles: float,
+                     layers: Optional[Iterable[str]] = None, owner: Optional[str] = None) -> Geofence:
+        points = [(float(lat), float(lng)) for lat, lng in route]
+        dlat = width_miles / MILES_PER_DEGREE
+        boxes = []
+        for (lat1, lng1), (lat2, lng2) in zip(points, points[1:]):
+            dlng = width_miles / (MILES_PER_DEGREE * max(0.01, math.cos(math.radians(max(abs(lat1), abs(lat2)) + dlat))))
+            boxes.append((min(lat1, lat2) - dlat, min(lng1, lng2) - dlng, max(lat1, lat2) + dlat, max(lng1, lng2) + dlng))
+        # Every segment is checked before anything is registered
+        segment_cells = [_cells(box) for box in boxes]
+        geofence = self._new(owner, name, "corridor", points, width_miles, layers)
+        geofence.boxes.extend(boxes)
+        for i, cells in enumerate(segment_cells):
+            self._file(geofence, cells, i)
+        return geofence
+
+    def _new(self, owner, name, kind, points, width_miles, layers) -> Geofence:
+        if len(self.fences) >= self.max_total:
+            raise GeofenceLimitExceeded(f"{len(self.fences)} geofences registered")
+        if owner is not None:
+            if self.owners.get(owner, 0) >= self.max_per_owner:
+                raise GeofenceLimitExceeded(f"{owner} has {self.max_per_owner} geofences")
+            self.owners[owner] = self.owners.get(owner, 0) + 1
+        layers = frozenset(layers) if layers else self.default_layers
+        geofence = Geofence(str(uuid.uuid4()), owner, name, kind, points, width_miles, layers)
+        self.fences[geofence.id] = geofence
+        return geofence
+
+    def _file(self, geofence: Geofence, cells: List[Cell], segment: Optional[int]) -> None:
+        for cell in cells:
+            members = self.cells.setdefault(cell, {})
+            if geofence.id not in members:
+                geofence.cells.append(cell)
+                members[geofence.id] = None if segment is None else [segment]
+            elif segment is not None:
+                members[geofence.id].append(segment)
+
+    def remove(self, geofence_id: str) -> bool:
+        geofence = self.fences.pop(geofence_id, None)
+        if geofence is None:
+            return False
+        if geofence.owner is not None:
+            self.owners[geofence.owner] -= 1
+            if not self.owners[geofence.owner]:
+                del self.owners[geofence.owner]
+        for cell in geofence.cells:
+            members = self.cells.get(cell)
+            if members is not None:
+                members.pop(geofence_id, None)
+                if not members:
+                    del self.cells[cell]
+        if geofence.changed is not None:
+            # Wakes its streams so they see it is gone
+            geofence.changed.set()
+        return True
+
+    def lookup(self, latitude: float, longitude: float, layer: Optional[str] = None) -> List[Geofence]:
+        """Geofences containing a point (and watching the layer, if given)"""
+        found = {}
+        for level, size in enumerate(GRID_LEVELS):
+            members = self.cells.get((level, math.floor(latitude / size), math.floor(longitude / size)))
+            if not members:
+                continue
+            for geofence_id, segments in members.items():
+                if geofence_id in found:
+                    continue
+                geofence = self.fences[geofence_id]
+                if layer is not None and geofence.layers is not None and layer not in geofence.layers:
+                    continue
+                if geofence.contains(latitude, longitude, segments):
+                    found[geofence_id] = geofence
+        return list(found.values())
+
+    def match(self, layer: str, points: Iterable[Dict[str, Any]]) -> int:
+        """Queue new or changed points for the geofences they fall in; returns deliveries"""
+        if not self.fences:
+            return 0
+        deliveries = 0
+        for point in points:
+            self.points_matched += 1
+            location = point["location"]
+            geofences = self.lookup(location["latitude"], location["longitude"], layer)
+            if not geofences:
+                continue
+            sequence = next(self._sequence)
+            frame = encode_event("geofence_match", str(sequence), {"layer": layer, "hazard": point})
+            for geofence in geofences:
+                geofence.push(sequence, frame)
+            deliveries += len(geofences)
+        self.deliveries += deliveries
+        return deliveries
+
+    async def stream(self, geofence_id: str, last_event_id: int = 0,
+                     heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+        """Server-Sent Events body of one geofence's matches; ends if the geofence is removed"""
+        yield b"retry: 5000\n\n"
+        sent = last_event_id
+        while True:
+            geofence = self.fences.get(geofence_id)
+            if geofence is None:
+                return
+            pending = [frame for sequence, frame in geofence.recent if sequence > sent]
+            if pending:
+                sent = geofence.recent[-1][0]
+                yield b"".join(pending)
+                continue
+            if geofence.changed is None:
+                geofence.changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(geofence.changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "geofences": len(self.fences),
+            "owners": len(self.owners),
+            "cells": len(self.cells),
+            "points_matched": self.points_matched,
+            "deliveries": self.deliveries,
+        }
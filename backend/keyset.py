@@ -0,0 +1,43 @@
+"""Keyset pagination over (timestamp, id), newest first.
+
+A cursor is the key of the last document of the previous page, so each page
+is an index range scan that starts where the last one stopped, however deep
+the client has paged, instead of a skip over everything before it.
+"""
+import base64
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+Key = Tuple[datetime, str]
+
+# Sort order matching the (timestamp, id) indexes
+NEWEST_FIRST = [("timestamp", -1), ("id", -1)]
+
+
+def key_of(document: Dict[str, Any]) -> Key:
+    return document["timestamp"], document["id"]
+
+
+def encode_cursor(document: Dict[str, Any]) -> str:
+    raw = f"{document['timestamp'].isoformat()}|{document['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Key:
+    """(timestamp, id) of the last document of the previous page; ValueError if malformed"""
+    try:
+        timestamp, document_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), document_id
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def older_than(before: Optional[Key]) -> Dict[str, Any]:
+    """MongoDB filter for documents after the cursor in newest-first order"""
+    if before is None:
+        return {}
+    timestamp, document_id = before
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": document_id}},
+    ]}
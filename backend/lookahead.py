@@ -0,0 +1,68 @@
+"""Ranking of the hazards ahead of a driver for lookahead alerts.
+
+How far ahead to look depends on speed: the horizon is the distance
+covered in LOOKAHEAD_WARNING_SECONDS, kept between a floor for town
+driving (and for clients that send no speed) and a cap that bounds the
+candidates a request can see. Hazards inside the horizon are scored by
+severity over distance and the best k kept in a heap of size k, so a
+request never sorts the whole candidate list.
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from geo import haversine_matrix
+
+# Warn this long before reaching a hazard at the current speed
+LOOKAHEAD_WARNING_SECONDS = 180
+LOOKAHEAD_MIN_MILES = 2.0
+LOOKAHEAD_MAX_MILES = 10.0
+# Horizons are rounded up to this step so nearby speeds share cached answers
+LOOKAHEAD_HORIZON_STEP_MILES = 0.5
+
+# Most hazards a lookahead response lists
+LOOKAHEAD_MAX_RESULTS = 5
+
+SEVERITY_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+
+Ranked = Tuple[float, float, Dict[str, Any]]
+
+
+def horizon_miles(speed_mph: Optional[float]) -> float:
+    """Lookahead radius for a speed, rounded up to the horizon step.
+
+    Any reading is accepted: GPS speeds can be missing, negative or wildly
+    high, and an alert with the nearest bound is better than none.
+    """
+    if not speed_mph or not math.isfinite(speed_mph):
+        return LOOKAHEAD_MAX_MILES if speed_mph == math.inf else LOOKAHEAD_MIN_MILES
+    miles = speed_mph * LOOKAHEAD_WARNING_SECONDS / 3600
+    miles = math.ceil(miles / LOOKAHEAD_HORIZON_STEP_MILES) * LOOKAHEAD_HORIZON_STEP_MILES
+    return min(LOOKAHEAD_MAX_MILES, max(LOOKAHEAD_MIN_MILES, miles))
+
+
+def hazard_score(severity: str, distance_miles: float) -> float:
+    """Higher for worse and closer hazards; a high severity hazard 2 miles out ties a medium one at 1 mile"""
+    return SEVERITY_WEIGHTS.get(severity, 1.0) / (1.0 + distance_miles)
+
+
+def top_hazards(latitude: float, longitude: float, hazards: List[Dict[str, Any]],
+                radius_miles: float, k: int) -> List[Ranked]:
+    """Up to k (score, miles, hazard) within radius, best score first"""
+    if not hazards or k <= 0:
+        return []
+    distances = haversine_matrix(
+        [latitude], [longitude],
+        [h["location"]["latitude"] for h in hazards],
+        [h["location"]["longitude"] for h in hazards]
+    )[0]
+    best: List[Tuple[float, float, int]] = []
+    for index in (distances <= radius_miles).nonzero()[0]:
+        distance = float(distances[index])
+        # Ties go to the nearer hazard
+        entry = (hazard_score(hazards[index].get("severity", ""), distance), -distance, int(index))
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+    return [(score, -negative, hazards[index]) for score, negative, index in sorted(best, reverse=True)]
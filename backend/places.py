@@ -0,0 +1,550 @@
+"""Place search over a local gazetteer.
+
+Places are indexed two ways: an inverted index from normalized token to the
+places containing it, and a prefix trie over those tokens for autocomplete.
+Every trie node keeps the most popular places below it, so a one-letter prefix
+is answered from that list instead of walking a huge subtree. A sorted copy of
+the vocabulary gives the tokens under a prefix as one contiguous slice.
+
+Typo tolerance works on the vocabulary rather than the places: a trigram
+index proposes tokens that look like a mistyped word, bounded edit distance
+confirms them, and only their postings are scored.
+
+When the caller's location is known, places are also bucketed in a coarse
+lat/lng grid: the search starts with the cells around the caller and widens
+the radius only until enough matches turn up, and distance joins text match
+and popularity in the score.
+"""
+import bisect
+import csv
+import heapq
+import itertools
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from geo import bounding_box, haversine_miles
+
+# Most popular places remembered per trie node
+TRIE_TOP_K = 50
+# Prefixes matching at most this many postings are scored exhaustively;
+# broader prefixes fall back to the node's popularity list
+MAX_PREFIX_SCAN = 1000
+# Multi-word queries stop collecting once this many (most popular) places match
+MAX_RANK_CANDIDATES = 500
+# For multi-word queries the last word's prefix set is materialized when it is
+# at most this many times larger than the places matching the other words
+PREFIX_SET_FACTOR = 4
+# ...otherwise at most this many of the most popular matches are checked
+MAX_FILTER_SCAN = 2000
+
+# Fuzzy matching: a word may expand to at most this many similar tokens, and
+# at most this many (most popular) approximate matches are scored
+MAX_FUZZY_TOKENS = 24
+MAX_FUZZY_CANDIDATES = 200
+FUZZY_MEMO_SIZE = 4096
+
+# Spatial grid cell size in degrees (about 14 x 10 miles in Illinois)
+GRID_CELL_DEGREES = 0.2
+# Proximity search starts at this radius and doubles until enough places match
+SEARCH_RADIUS_MILES = 10.0
+MAX_SEARCH_RADIUS_MILES = 640.0
+# Only this many of the closest matches are scored
+MAX_NEARBY_CANDIDATES = 100
+# Score bonus for a place at the caller's location, halved at PROXIMITY_SCALE_MILES
+PROXIMITY_WEIGHT = 40.0
+PROXIMITY_SCALE_MILES = 10.0
+
+# Point-of-interest layers that are searchable alongside the gazetteer
+PLACE_LAYER_CATEGORIES = {
+    "rest_areas": "Rest Area",
+    "ev_stations": "EV Charging Station",
+    "travel_centers": "Travel Center",
+}
+
+Origin = Optional[Tuple[float, float]]
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and apostrophes, collapse punctuation to spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("'", "").replace("’", "")
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def max_edits(word: str) -> int:
+    """Typos tolerated for a word of this length"""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def trigrams(word: str, closed: bool = True) -> Set[str]:
+    """Padded trigrams; an open word (still being typed) gets no end padding"""
+    padded = f"$${word}$" if closed else f"$${word}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (transpositions count once), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class Place:
+    __slots__ = ("id", "name", "category", "latitude", "longitude", "address",
+                 "popularity", "normalized_name", "name_tokens", "tokens")
+
+    def __init__(self, place_id: int, record: Dict):
+        self.id = place_id
+        self.name = record["name"]
+        self.category = record["category"]
+        self.latitude = float(record["latitude"])
+        self.longitude = float(record["longitude"])
+        self.address = record.get("address") or f"{self.name}, Illinois, USA"
+        self.popularity = float(record.get("popularity") or 0)
+        self.normalized_name = normalize(self.name)
+        self.name_tokens = self.normalized_name.split()
+        self.tokens = set(self.name_tokens) | set(tokenize(self.category))
+
+
+class _TrieNode:
+    __slots__ = ("children", "token", "best", "count")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.token: Optional[str] = None
+        self.best: List[int] = []
+        self.count = 0
+
+
+def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES)
+
+
+def proximity(place: Place, origin: Origin) -> float:
+    """Score bonus for being close to the caller; zero without a location"""
+    if origin is None:
+        return 0.0
+    distance = haversine_miles(origin[0], origin[1], place.latitude, place.longitude)
+    return PROXIMITY_WEIGHT / (1.0 + distance / PROXIMITY_SCALE_MILES)
+
+
+def _top_unique(sorted_lists: Iterable[List[int]], k: int) -> List[int]:
+    """First k distinct ids from several ascending id lists"""
+    result = []
+    last = None
+    for place_id in heapq.merge(*sorted_lists):
+        if place_id != last:
+            result.append(place_id)
+            last = place_id
+            if len(result) == k:
+                break
+    return result
+
+
+class PlaceIndex:
+    """Inverted token index plus prefix trie, ranked by match quality and popularity"""
+
+    def __init__(self, records: Iterable[Dict], top_k: int = TRIE_TOP_K):
+        # Ids are assigned in descending popularity, so every ascending id
+        # list below is also a most-popular-first list
+        ordered = sorted(records, key=lambda r: -float(r.get("popularity") or 0))
+        self.places = [Place(i, record) for i, record in enumerate(ordered)]
+        self.max_popularity = max((p.popularity for p in self.places), default=0) or 1.0
+
+        self.postings: Dict[str, List[int]] = {}
+        for place in self.places:
+            for token in place.tokens:
+                self.postings.setdefault(token, []).append(place.id)
+
+        self.vocabulary = sorted(self.postings)
+        self.trigram_index: Dict[str, List[int]] = {}
+        for position, token in enumerate(self.vocabulary):
+            for gram in trigrams(token):
+                self.trigram_index.setdefault(gram, []).append(position)
+        self._fuzzy_memo: Dict[tuple, Dict[str, int]] = {}
+
+        # Cells hold ascending (most popular first) id lists like the postings
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        for place in self.places:
+            self.grid.setdefault(_cell(place.latitude, place.longitude), []).append(place.id)
+        self.root = _TrieNode()
+        for token in self.vocabulary:
+            node = self.root
+            for ch in token:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.token = token
+
+        # Fill best/count bottom-up: children are always visited after parents
+        # in this DFS order, so walking it backwards is a post-order
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            lists = [child.best for child in node.children.values()]
+            node.count = sum(child.count for child in node.children.values())
+            if node.token is not None:
+                lists.append(self.postings[node.token])
+                node.count += len(self.postings[node.token])
+            node.best = _top_unique(lists, top_k)
+
+    def __len__(self):
+        return len(self.places)
+
+    def _find_node(self, prefix: str) -> Optional[_TrieNode]:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + "\uffff", lo)
+        return self.vocabulary[lo:hi]
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids: Set[int] = set()
+        for token in self._prefix_tokens(prefix):
+            ids.update(self.postings[token])
+        return ids
+
+    def _prefix_candidates(self, prefix: str) -> Set[int]:
+        node = self._find_node(prefix)
+        if node is None:
+            return set()
+        if node.count <= MAX_PREFIX_SCAN:
+            return self._prefix_ids(prefix)
+        # Too broad to score everything: popular places plus exact-word matches
+        candidates = set(node.best)
+        candidates.update(self.postings.get(prefix, ())[:TRIE_TOP_K])
+        return candidates
+
+    def candidates(self, tokens: List[str]) -> Iterable[int]:
+        """Places containing every complete token and a token starting with the last one"""
+        *complete, prefix = tokens
+        if not complete:
+            return self._prefix_candidates(prefix)
+
+        required = []
+        for token in complete:
+            postings = self.postings.get(token)
+            if postings is None:
+                return []
+            required.append(postings)
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+
+        # Set intersections run at C speed; postings are most-popular-first,
+        # so the lowest ids are the most popular matches
+        required.sort(key=len)
+        matches = set(required[0])
+        for postings in required[1:]:
+            matches.intersection_update(postings)
+            if not matches:
+                return []
+
+        if node.count <= PREFIX_SET_FACTOR * len(matches):
+            matches &= self._prefix_ids(prefix)
+            return heapq.nsmallest(MAX_RANK_CANDIDATES, matches)
+
+        # Broad prefix: filter the most popular matches only, so the work per
+        # keystroke stays bounded however many places share the other words
+        prefix_tokens = set(self._prefix_tokens(prefix))
+        filtered = []
+        for place_id in heapq.nsmallest(MAX_FILTER_SCAN, matches):
+            if not prefix_tokens.isdisjoint(self.places[place_id].tokens):
+                filtered.append(place_id)
+                if len(filtered) >= MAX_RANK_CANDIDATES:
+                    break
+        return filtered
+
+    def _region_ids(self, origin: Tuple[float, float], radius_miles: float) -> Set[int]:
+        """Places in the grid cells overlapping a radius around origin"""
+        min_lat, min_lng, max_lat, max_lng = bounding_box(origin[0], origin[1], radius_miles)
+        (row_lo, col_lo), (row_hi, col_hi) = _cell(min_lat, min_lng), _cell(max_lat, max_lng)
+        ids: Set[int] = set()
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                ids.update(self.grid.get((row, col), ()))
+        return ids
+
+    def _filter_region(self, tokens: List[str], region: Set[int]) -> Set[int]:
+        """The places of a region that match the query, as in candidates()"""
+        if not tokens:
+            return region
+        *complete, prefix = tokens
+        matches = region
+        for token in sorted(complete, key=lambda t: len(self.postings.get(t, ()))):
+            postings = self.postings.get(token)
+            if postings is None:
+                return set()
+            matches = matches.intersection(postings)
+            if not matches:
+                return matches
+        node = self._find_node(prefix)
+        if node is None:
+            return set()
+        if node.count <= PREFIX_SET_FACTOR * len(matches):
+            return matches & self._prefix_ids(prefix)
+        prefix_tokens = set(self._prefix_tokens(prefix))
+        return {
+            place_id for place_id in matches
+            if not prefix_tokens.isdisjoint(self.places[place_id].tokens)
+        }
+
+    def nearby_candidates(self, tokens: List[str], origin: Tuple[float, float], limit: int) -> List[int]:
+        """Matching places around origin, widening the search radius until limit are found"""
+        if tokens:
+            *complete, prefix = tokens
+            node = self._find_node(prefix)
+            if node is None or any(token not in self.postings for token in complete):
+                return []
+            # Rare words: every match is cheap to check wherever it is, while
+            # widening the radius would mostly sweep in non-matching places
+            if complete:
+                required = sorted((self.postings[token] for token in complete), key=len)
+                matches = set(required[0]).intersection(*required[1:])
+                if len(matches) <= PREFIX_SET_FACTOR * MAX_FILTER_SCAN:
+                    return self._nearest(self._filter_region([prefix], matches), origin)
+            elif node.count <= MAX_PREFIX_SCAN:
+                return self._nearest(self._prefix_ids(prefix), origin)
+        radius = SEARCH_RADIUS_MILES
+        while True:
+            matches = self._filter_region(tokens, self._region_ids(origin, radius))
+            if len(matches) >= limit or radius >= MAX_SEARCH_RADIUS_MILES:
+                break
+            radius *= 2
+        return self._nearest(matches, origin)
+
+    def _nearest(self, place_ids: Set[int], origin: Tuple[float, float]) -> List[int]:
+        """At most MAX_NEARBY_CANDIDATES of the places closest to origin"""
+        if len(place_ids) <= MAX_NEARBY_CANDIDATES:
+            return list(place_ids)
+        lat, lng = origin
+        kx = math.cos(math.radians(lat)) ** 2
+        places = self.places
+        return heapq.nsmallest(
+            MAX_NEARBY_CANDIDATES, place_ids,
+            key=lambda i: (places[i].latitude - lat) ** 2 + kx * (places[i].longitude - lng) ** 2
+        )
+
+    def match_quality(self, place: Place, normalized_query: str, tokens: List[str]) -> float:
+        """How well a candidate matches the query text, independent of popularity"""
+        if place.normalized_name == normalized_query:
+            return 100.0
+        if place.normalized_name.startswith(normalized_query):
+            return 80.0
+        name_tokens = place.name_tokens
+        prefix = tokens[-1]
+        if prefix in name_tokens:
+            return 60.0
+        if any(token.startswith(prefix) for token in name_tokens):
+            return 45.0
+        # Matched only through the category
+        return 30.0
+
+    def rank(
+        self, candidate_ids: Iterable[int], query: str, limit: int, origin: Origin = None
+    ) -> List[Tuple[float, Place]]:
+        normalized_query = normalize(query)
+        tokens = normalized_query.split()
+        scored = []
+        for place_id in candidate_ids:
+            place = self.places[place_id]
+            quality = self.match_quality(place, normalized_query, tokens) if tokens else 0.0
+            score = (quality + 20.0 * math.sqrt(place.popularity / self.max_popularity)
+                     + proximity(place, origin))
+            scored.append((score, place_id))
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        return [(score, self.places[place_id]) for score, place_id in best]
+
+    def fuzzy_tokens(self, word: str, prefix: bool = False) -> Dict[str, int]:
+        """Vocabulary tokens within max_edits of word, mapped to their distance.
+
+        With prefix=True the word is still being typed, so it is compared
+        against token prefixes of about the same length.
+        """
+        key = (word, prefix)
+        cached = self._fuzzy_memo.get(key)
+        if cached is None:
+            # Keystroke sequences repeat the same completed words over and over
+            if len(self._fuzzy_memo) >= FUZZY_MEMO_SIZE:
+                self._fuzzy_memo.clear()
+            cached = self._fuzzy_memo[key] = self._fuzzy_tokens(word, prefix)
+        return cached
+
+    def _fuzzy_tokens(self, word: str, prefix: bool) -> Dict[str, int]:
+        limit = max_edits(word)
+        if limit == 0:
+            if prefix:
+                return {token: 0 for token in self._prefix_tokens(word)[:MAX_FUZZY_TOKENS]}
+            return {word: 0} if word in self.postings else {}
+
+        grams = trigrams(word, closed=not prefix)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_index.get(gram, ()))
+        # Each edit destroys at most three trigrams
+        min_shared = max(1, len(grams) - 3 * limit)
+
+        matches = {}
+        for position, count in shared.most_common():
+            if count < min_shared:
+                break
+            token = self.vocabulary[position]
+            if prefix:
+                distance = min(
+                    edit_distance(word, token[:length], limit)
+                    for length in range(len(word) - limit, len(word) + limit + 1)
+                    if length > 0
+                )
+            else:
+                distance = edit_distance(word, token, limit)
+            if distance <= limit:
+                matches[token] = distance
+        if len(matches) > MAX_FUZZY_TOKENS:
+            closest = heapq.nsmallest(MAX_FUZZY_TOKENS, matches.items(), key=lambda item: item[1])
+            matches = dict(closest)
+        return matches
+
+    def fuzzy_search(self, tokens: List[str], limit: int, origin: Origin = None) -> List[Tuple[float, Place]]:
+        """Places whose tokens approximately match every query word"""
+        # Words too short to tolerate typos add nothing beyond the exact search
+        if all(max_edits(word) == 0 for word in tokens):
+            return []
+        *complete, prefix = tokens
+        expansions = [self.fuzzy_tokens(word) for word in complete]
+        expansions.append(self.fuzzy_tokens(prefix, prefix=True))
+        if not all(expansions):
+            return []
+
+        # Drive from the word with the fewest postings and check the others
+        # against each candidate's token set
+        sizes = [sum(len(self.postings[token]) for token in expansion) for expansion in expansions]
+        driver = expansions[sizes.index(min(sizes))]
+        others = [expansion.keys() for expansion in expansions if expansion is not driver]
+
+        # Postings are already most-popular-first, so merge them lazily
+        # instead of materialising a union that can span most of the index
+        merged = heapq.merge(*(self.postings[token] for token in driver))
+        scored = []
+        previous = None
+        for place_id in itertools.islice(merged, MAX_FILTER_SCAN):
+            if place_id == previous:
+                continue
+            previous = place_id
+            place = self.places[place_id]
+            if any(other.isdisjoint(place.tokens) for other in others):
+                continue
+            typos = sum(
+                min(expansion[token] for token in place.tokens if token in expansion)
+                for expansion in expansions
+            )
+            score = (60.0 - 15.0 * typos + 20.0 * math.sqrt(place.popularity / self.max_popularity)
+                     + proximity(place, origin))
+            scored.append((score, place_id))
+            if len(scored) >= MAX_FUZZY_CANDIDATES:
+                break
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        return [(score, self.places[place_id]) for score, place_id in best]
+
+    def scored_search(
+        self, query: str, limit: int = 10, fuzzy: bool = False, origin: Origin = None
+    ) -> List[Tuple[float, Place]]:
+        """Best matches with their scores, which are comparable across indexes"""
+        tokens = tokenize(query)
+        if origin is not None:
+            candidate_ids = self.nearby_candidates(tokens, origin, limit)
+        elif not tokens:
+            return [(0.0, place) for place in self.places[:limit]]
+        else:
+            candidate_ids = self.candidates(tokens)
+        results = self.rank(candidate_ids, query, limit, origin)
+        # Exact matches come first; typo-tolerant matches only fill the gap
+        if fuzzy and tokens and len(results) < limit:
+            seen = {place.id for _, place in results}
+            for score, place in self.fuzzy_search(tokens, limit, origin):
+                if place.id not in seen:
+                    results.append((score, place))
+                    if len(results) == limit:
+                        break
+        return results
+
+    def search(
+        self, query: str, limit: int = 10, fuzzy: bool = False, origin: Origin = None
+    ) -> List[Place]:
+        return [place for _, place in self.scored_search(query, limit, fuzzy, origin)]
+
+
+class PlaceCatalog:
+    """The gazetteer index plus small indexes rebuilt from live POI layers"""
+
+    def __init__(self, gazetteer: PlaceIndex):
+        self.gazetteer = gazetteer
+        self.layers: Dict[str, PlaceIndex] = {}
+        # Bumped on every layer change so callers can tell stale results apart
+        self.version = 0
+
+    def set_layer(self, layer_type: str, points: List[Dict]):
+        """Re-index a POI layer; layers are small, so rebuilding is cheap"""
+        self.layers[layer_type] = PlaceIndex(layer_records(layer_type, points))
+        self.version += 1
+
+    def search(
+        self, query: str, limit: int = 10, fuzzy: bool = False, origin: Origin = None
+    ) -> List[Place]:
+        results = self.gazetteer.scored_search(query, limit, fuzzy, origin)
+        for index in list(self.layers.values()):
+            results.extend(index.scored_search(query, limit, fuzzy, origin))
+        best = heapq.nlargest(limit, results, key=lambda item: item[0])
+        return [place for _, place in best]
+
+
+def load_gazetteer(path: str) -> List[Dict]:
+    """Read a gazetteer CSV (name, category, latitude, longitude[, address, popularity])"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def layer_records(layer_type: str, points: List[Dict]) -> List[Dict]:
+    """Gazetteer-style records for the points of a POI layer"""
+    category = PLACE_LAYER_CATEGORIES[layer_type]
+    return [
+        {
+            "name": point["title"],
+            "category": category,
+            "latitude": point["location"]["latitude"],
+            "longitude": point["location"]["longitude"],
+        }
+        for point in points
+    ]
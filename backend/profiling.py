@@ -0,0 +1,250 @@
+"""On-demand sampling profiler for single requests.
+
+Profiling is off by default and then costs one attribute check per request.
+Once an admin enables it, a request is profiled when it carries an admin
+token in the X-Profile header or the _profile query parameter, or when it
+is picked at the configured sample rate from the configured paths. While
+such a request runs, a background thread samples the event loop thread's
+stack every few milliseconds; the samples are kept as folded stacks (one
+"frame;frame;frame count" line per distinct stack), which flamegraph.pl and
+speedscope render as a flame graph. Samples taken while the loop waits show
+up under the selector, so time spent in worker pools or the database is
+visible as waiting rather than missing.
+
+Only one request is profiled at a time. The sampler profiles the event loop
+thread, not the request, so every sample also includes whatever else the
+loop runs concurrently: other requests show up in the profile. Sampling
+stops after PROFILE_MAX_SECONDS even if the response is still going, and
+long-lived streams (SSE, NDJSON) can be excluded from sampling altogether,
+so a streaming client cannot hold the profiler for the life of its
+connection.
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import unquote
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Seconds between stack samples
+PROFILE_INTERVAL = 0.002
+# Profiles kept for browsing; the oldest are dropped first
+PROFILE_STORE_SIZE = 50
+# Longest a profile runs; the rest of a slower response is not sampled
+PROFILE_MAX_SECONDS = 30.0
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "_profile"
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            module = code.co_filename.rsplit("/", 1)[-1]
+            label = self._labels[code] = f"{code.co_name} ({module}:{code.co_firstlineno})"
+        return label
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+class ProfileStore:
+    """Most recent request profiles, bounded"""
+
+    def __init__(self, maxsize: int = PROFILE_STORE_SIZE):
+        self.maxsize = maxsize
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries, newest first"""
+        return [
+            {key: value for key, value in profile.items() if key != "stacks"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+def folded(profile: Dict[str, Any]) -> str:
+    """Collapsed-stack text, the input format of flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+def hottest(profile: Dict[str, Any], limit: int = 20) -> List[Dict[str, Any]]:
+    """Functions by samples spent in them (self) and under them (total)"""
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in profile["stacks"].items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    samples = max(1, profile["samples"])
+    return [
+        {"function": frame, "self": count, "total": total[frame], "self_percent": round(100 * count / samples, 1)}
+        for frame, count in own.most_common(limit)
+    ]
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps their profiles"""
+
+    def __init__(self, authorize: Callable[[str], bool], store: Optional[ProfileStore] = None,
+                 interval: float = PROFILE_INTERVAL, max_duration: float = PROFILE_MAX_SECONDS,
+                 exclude: Sequence[str] = ()):
+        self.authorize = authorize
+        self.store = store or ProfileStore()
+        self.interval = interval
+        self.max_duration = max_duration
+        # Path prefixes never picked by sampling, such as streaming endpoints
+        self.exclude = tuple(exclude)
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.paths: Sequence[str] = ()
+        self.min_duration_ms = 0.0
+        self.busy = False
+
+    def configure(self, enabled: bool, sample_rate: float = 0.0, paths: Sequence[str] = (),
+                  min_duration_ms: float = 0.0) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+        self.min_duration_ms = min_duration_ms
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "paths": list(self.paths),
+            "min_duration_ms": self.min_duration_ms,
+            "stored_profiles": len(self.store),
+        }
+
+    def trigger(self, scope) -> Optional[str]:
+        """"requested" or "sampled" if this request should be profiled"""
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                token = value.decode("latin-1")
+                break
+        if token is None and PROFILE_QUERY.encode() in scope.get("query_string", b""):
+            for pair in scope["query_string"].decode("latin-1").split("&"):
+                key, _, value = pair.partition("=")
+                if key == PROFILE_QUERY:
+                    token = unquote(value)
+                    break
+        if token is not None:
+            return "requested" if self.authorize(token.removeprefix("Bearer ").strip()) else None
+        if self.sample_rate and not scope["path"].startswith(self.exclude) and (
+                not self.paths or scope["path"] in self.paths):
+            if random.random() < self.sample_rate:
+                return "sampled"
+        return None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running the sampler around chosen requests"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if not profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = profiler.trigger(scope)
+        if trigger is None or profiler.busy:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "requested":
+                    # Tells the caller where to find its profile
+                    headers = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.busy = True
+        sampler = StackSampler(threading.get_ident(), profiler.interval)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        finished = False
+
+        def finish(truncated: bool) -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            stacks = sampler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            profiler.busy = False
+            if trigger == "requested" or duration_ms >= profiler.min_duration_ms:
+                profiler.store.add({
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "trigger": trigger,
+                    "started_at": started_at,
+                    "duration_ms": round(duration_ms, 2),
+                    "truncated": truncated,
+                    "samples": sum(stacks.values()),
+                    "interval_ms": profiler.interval * 1000,
+                    "stacks": stacks,
+                })
+
+        sampler.start()
+        deadline = asyncio.get_running_loop().call_later(profiler.max_duration, finish, True)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            deadline.cancel()
+            finish(False)
@@ -0,0 +1,541 @@
+"""Road graph routing over the Illinois interstate network.
+
+The network is small (a few dozen junctions) but is shaped like the real
+interstate system, so routes follow plausible corridors. Live conditions from
+the map layers are joined onto edges when a layer refreshes; route queries
+only read the precomputed edge weights.
+"""
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from cache import LRUCache
+from geo import haversine_miles, haversine_matrix, point_segment_distance_miles, bounding_box
+
+# Junctions on the interstate network (name -> (lat, lng))
+ILLINOIS_JUNCTIONS = {
+    "Chicago": (41.8781, -87.6298),
+    "Cicero": (41.8456, -87.7539),
+    "O'Hare": (41.9742, -87.9073),
+    "Schaumburg": (42.0334, -88.0834),
+    "Elgin": (42.0354, -88.2826),
+    "Rockford": (42.2711, -89.0940),
+    "Waukegan": (42.3636, -87.8448),
+    "Naperville": (41.7508, -88.1535),
+    "Aurora": (41.7606, -88.3201),
+    "Joliet": (41.5250, -88.0817),
+    "Kankakee": (41.1200, -87.8612),
+    "DeKalb": (41.9295, -88.7504),
+    "Dixon": (41.8389, -89.4795),
+    "Moline": (41.5067, -90.5151),
+    "LaSalle": (41.3334, -89.0918),
+    "Galesburg": (40.9478, -90.3712),
+    "Peoria": (40.6936, -89.5890),
+    "Bloomington": (40.4842, -88.9937),
+    "Champaign": (40.1164, -88.2434),
+    "Decatur": (39.8403, -88.9548),
+    "Springfield": (39.7817, -89.6501),
+    "Quincy": (39.9356, -91.4099),
+    "Litchfield": (39.1753, -89.6540),
+    "Collinsville": (38.6703, -89.9845),
+    "Effingham": (39.1200, -88.5434),
+    "Mount Vernon": (38.3173, -88.9031),
+    "Marion": (37.7306, -88.9331),
+}
+
+# Highway segments between junctions: (highway, from, to)
+ILLINOIS_HIGHWAYS = [
+    ("I-94", "Chicago", "Waukegan"),
+    ("I-90", "Chicago", "O'Hare"),
+    ("I-90", "O'Hare", "Schaumburg"),
+    ("I-90", "Schaumburg", "Elgin"),
+    ("I-90", "Elgin", "Rockford"),
+    ("I-290", "Chicago", "Cicero"),
+    ("I-290", "Cicero", "Schaumburg"),
+    ("I-88", "Cicero", "Naperville"),
+    ("I-88", "Naperville", "Aurora"),
+    ("I-88", "Aurora", "DeKalb"),
+    ("I-88", "DeKalb", "Dixon"),
+    ("I-88", "Dixon", "Moline"),
+    ("I-355", "Naperville", "Joliet"),
+    ("I-55", "Chicago", "Joliet"),
+    ("I-55", "Joliet", "Bloomington"),
+    ("I-55", "Bloomington", "Springfield"),
+    ("I-55", "Springfield", "Litchfield"),
+    ("I-55", "Litchfield", "Collinsville"),
+    ("I-57", "Chicago", "Kankakee"),
+    ("I-57", "Kankakee", "Champaign"),
+    ("I-57", "Champaign", "Effingham"),
+    ("I-57", "Effingham", "Mount Vernon"),
+    ("I-57", "Mount Vernon", "Marion"),
+    ("I-80", "Joliet", "LaSalle"),
+    ("I-80", "LaSalle", "Moline"),
+    ("I-39", "Rockford", "LaSalle"),
+    ("I-39", "LaSalle", "Bloomington"),
+    ("I-74", "Moline", "Galesburg"),
+    ("I-74", "Galesburg", "Peoria"),
+    ("I-74", "Peoria", "Bloomington"),
+    ("I-74", "Bloomington", "Champaign"),
+    ("I-72", "Quincy", "Springfield"),
+    ("I-72", "Springfield", "Decatur"),
+    ("I-72", "Decatur", "Champaign"),
+    ("I-155", "Peoria", "Springfield"),
+    ("I-70", "Effingham", "Collinsville"),
+    ("I-64", "Collinsville", "Mount Vernon"),
+]
+
+HIGHWAY_SPEED_MPH = 65
+LOCAL_SPEED_MPH = 35
+# Door-to-door average used when estimating travel time without the graph
+GREAT_CIRCLE_SPEED_MPH = 45
+# Surface streets wind more than the straight line between two points
+LOCAL_DETOUR_FACTOR = 1.25
+
+# Layers whose points are joined onto edges, and how far a point may sit from
+# the road and still be considered on it
+CONDITION_LAYERS = ["traffic", "closures", "construction", "winter"]
+CONDITION_MATCH_RADIUS_MILES = 1.0
+
+CONSTRUCTION_DELAY_MINUTES = {"low": 3, "medium": 8, "high": 15}
+CLOSURE_DELAY_MINUTES = {"low": 5, "medium": 10, "high": 20}
+WINTER_SPEED_FACTOR = {"low": 1.15, "medium": 1.3, "high": 1.5}
+MAX_SPEED_FACTOR = 3.0
+
+# Junction-to-junction paths are cached; entries are dropped early when a
+# layer refresh changes the weight of any edge they use
+ROUTE_CACHE_SIZE = 4096
+ROUTE_CACHE_TTL_SECONDS = 300
+
+_DELAY_PATTERN = re.compile(r"delay:\s*(\d+)\s*minutes", re.IGNORECASE)
+
+
+class Edge:
+    """An undirected highway segment between two junctions"""
+    __slots__ = ("id", "highway", "start", "end", "shape", "miles", "base_minutes")
+
+    def __init__(self, edge_id: int, highway: str, start: str, end: str, shape: List[List[float]]):
+        self.id = edge_id
+        self.highway = highway
+        self.start = start
+        self.end = end
+        self.shape = shape
+        self.miles = sum(
+            haversine_miles(a[0], a[1], b[0], b[1]) for a, b in zip(shape, shape[1:])
+        )
+        self.base_minutes = self.miles / HIGHWAY_SPEED_MPH * 60
+
+
+class EdgeCondition:
+    """Aggregated live condition on one edge, and the point effects it was built from"""
+    __slots__ = ("blocked", "speed_factor", "delay_minutes", "point_ids", "effects")
+
+    def __init__(self):
+        self.blocked = False
+        self.speed_factor = 1.0
+        self.delay_minutes = 0.0
+        self.point_ids: List[str] = []
+        self.effects: List[Tuple[bool, float, float]] = []
+
+    def add(self, point_id: str, blocked: bool, speed_factor: float, delay_minutes: float) -> None:
+        self.blocked = self.blocked or blocked
+        self.speed_factor = min(MAX_SPEED_FACTOR, self.speed_factor * speed_factor)
+        self.delay_minutes += delay_minutes
+        self.point_ids.append(point_id)
+        self.effects.append((blocked, speed_factor, delay_minutes))
+
+
+class RoutePlan:
+    """Result of a route query"""
+    __slots__ = ("polyline", "distance_miles", "minutes", "instructions", "edge_ids")
+
+    def __init__(self, polyline, distance_miles, minutes, instructions, edge_ids):
+        self.polyline = polyline
+        self.distance_miles = distance_miles
+        self.minutes = minutes
+        self.instructions = instructions
+        self.edge_ids = edge_ids
+
+
+def _edge_shape(a: Tuple[float, float], b: Tuple[float, float]) -> List[List[float]]:
+    """Deterministic gently-curving shape points between two junctions"""
+    span = haversine_miles(a[0], a[1], b[0], b[1])
+    segments = max(2, int(math.ceil(span / 2)))
+    # Perpendicular bow of ~2% of the span, so roads are not ruler-straight
+    dlat, dlng = b[0] - a[0], b[1] - a[1]
+    bow = 0.02
+    shape = []
+    for i in range(segments + 1):
+        t = i / segments
+        offset = bow * math.sin(math.pi * t)
+        shape.append([a[0] + dlat * t - dlng * offset, a[1] + dlng * t + dlat * offset])
+    return shape
+
+
+def condition_for_point(layer_type: str, point: Dict) -> Tuple[bool, float, float]:
+    """Map a live layer point to (blocks_edge, speed_factor, delay_minutes)"""
+    severity = point.get("severity", "medium")
+    if layer_type == "closures":
+        if point.get("title") == "Full Road Closure":
+            return True, 1.0, 0.0
+        return False, 1.0, CLOSURE_DELAY_MINUTES.get(severity, 10)
+    if layer_type == "traffic":
+        match = _DELAY_PATTERN.search(point.get("details", ""))
+        return False, 1.0, float(match.group(1)) if match else 0.0
+    if layer_type == "construction":
+        return False, 1.0, CONSTRUCTION_DELAY_MINUTES.get(severity, 8)
+    if layer_type == "winter":
+        return False, WINTER_SPEED_FACTOR.get(severity, 1.3), 0.0
+    return False, 1.0, 0.0
+
+
+class RoadNetwork:
+    """Interstate graph with live, precomputed edge weights"""
+
+    def __init__(self, junctions: Dict[str, Tuple[float, float]], highways: List[Tuple[str, str, str]],
+                 cache_size: int = ROUTE_CACHE_SIZE, cache_ttl: Optional[float] = ROUTE_CACHE_TTL_SECONDS):
+        self.nodes = dict(junctions)
+        self.edges: List[Edge] = []
+        self.adjacency: Dict[str, List[Tuple[int, str]]] = {name: [] for name in self.nodes}
+        for highway, start, end in highways:
+            edge = Edge(len(self.edges), highway, start, end, _edge_shape(self.nodes[start], self.nodes[end]))
+            self.edges.append(edge)
+            self.adjacency[start].append((edge.id, end))
+            self.adjacency[end].append((edge.id, start))
+
+        self._node_names = list(self.nodes)
+        self._node_index = {name: i for i, name in enumerate(self._node_names)}
+        self._node_lats = np.array([self.nodes[name][0] for name in self._node_names])
+        self._node_lngs = np.array([self.nodes[name][1] for name in self._node_names])
+
+        # Bounding boxes let the spatial join skip most edges per point
+        self._edge_bounds = []
+        for edge in self.edges:
+            lats = [p[0] for p in edge.shape]
+            lngs = [p[1] for p in edge.shape]
+            self._edge_bounds.append((min(lats), min(lngs), max(lats), max(lngs)))
+
+        self.conditions: Dict[int, EdgeCondition] = {}
+        # Point id -> the edge its condition is joined to
+        self.point_edges: Dict[str, int] = {}
+        self.edge_minutes: List[Optional[float]] = [edge.base_minutes for edge in self.edges]
+        self.path_cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        # Bumped on every layer join; lets callers detect weights changing under them
+        self.version = 0
+
+    def match_point(self, latitude: float, longitude: float,
+                    radius_miles: float = CONDITION_MATCH_RADIUS_MILES) -> Optional[int]:
+        """Nearest edge within radius of a point, or None"""
+        min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_miles)
+        best_id, best_distance = None, radius_miles
+        for edge, (e_min_lat, e_min_lng, e_max_lat, e_max_lng) in zip(self.edges, self._edge_bounds):
+            if e_max_lat < min_lat or e_min_lat > max_lat or e_max_lng < min_lng or e_min_lng > max_lng:
+                continue
+            for a, b in zip(edge.shape, edge.shape[1:]):
+                distance = point_segment_distance_miles(latitude, longitude, a[0], a[1], b[0], b[1])
+                if distance <= best_distance:
+                    best_id, best_distance = edge.id, distance
+        return best_id
+
+    def apply_conditions(self, layers: Dict[str, List[Dict]]) -> None:
+        """Join live layer points onto edges and recompute edge weights.
+
+        Called when layers refresh so that route queries pay no join cost.
+        """
+        conditions: Dict[int, EdgeCondition] = {}
+        point_edges: Dict[str, int] = {}
+        for layer_type in CONDITION_LAYERS:
+            for point in layers.get(layer_type, []):
+                location = point["location"]
+                edge_id = self.match_point(location["latitude"], location["longitude"])
+                if edge_id is None:
+                    continue
+                conditions.setdefault(edge_id, EdgeCondition()).add(point["id"], *condition_for_point(layer_type, point))
+                point_edges[point["id"]] = edge_id
+        self._set_conditions(conditions, point_edges, range(len(self.edges)))
+
+    def remove_points(self, point_ids: Iterable[str]) -> None:
+        """Take points out of the live conditions without a new join.
+
+        Only the edges the points were joined to are recomputed, from the
+        effects of the points left on them, so the result is what
+        apply_conditions would give for the layers without those points.
+        """
+        point_edges = dict(self.point_edges)
+        touched = set()
+        for point_id in point_ids:
+            edge_id = point_edges.pop(point_id, None)
+            if edge_id is not None:
+                touched.add(edge_id)
+        if not touched:
+            return
+        conditions = dict(self.conditions)
+        for edge_id in touched:
+            old = conditions.pop(edge_id)
+            condition = EdgeCondition()
+            for point_id, effect in zip(old.point_ids, old.effects):
+                if point_id in point_edges:
+                    condition.add(point_id, *effect)
+            if condition.point_ids:
+                conditions[edge_id] = condition
+        self._set_conditions(conditions, point_edges, touched)
+
+    def _set_conditions(self, conditions: Dict[int, EdgeCondition], point_edges: Dict[str, int],
+                        edge_ids: Iterable[int]) -> None:
+        """Swap in new conditions, recomputing the weights of the given edges"""
+        edge_minutes = list(self.edge_minutes)
+        slower, faster = [], False
+        for edge_id in edge_ids:
+            condition = conditions.get(edge_id)
+            if condition is None:
+                new = self.edges[edge_id].base_minutes
+            elif condition.blocked:
+                new = None
+            else:
+                new = self.edges[edge_id].base_minutes * condition.speed_factor + condition.delay_minutes
+            old = edge_minutes[edge_id]
+            if old == new:
+                continue
+            edge_minutes[edge_id] = new
+            if new is None or (old is not None and new > old):
+                slower.append(edge_id)
+            else:
+                faster = True
+
+        # Swap in one assignment so concurrent readers see a consistent view
+        self.conditions, self.point_edges, self.edge_minutes = conditions, point_edges, edge_minutes
+        self.version += 1
+
+        # A slower edge only affects cached paths that use it, but a faster or
+        # reopened edge may create a better path for any pair
+        if faster:
+            self.path_cache.invalidate_all()
+        else:
+            self.path_cache.invalidate_tags(slower)
+
+    def nearest_node(self, latitude: float, longitude: float) -> str:
+        """Junction closest to a point"""
+        return min(
+            self.nodes,
+            key=lambda name: haversine_miles(latitude, longitude, *self.nodes[name])
+        )
+
+    def shortest_path(self, source: str, target: str) -> Optional[Tuple[float, List[Tuple[int, str]]]]:
+        """Dijkstra over live edge weights; returns (minutes, [(edge_id, next_node)])"""
+        edge_minutes = self.edge_minutes
+        best = {source: 0.0}
+        previous: Dict[str, Tuple[int, str]] = {}
+        queue = [(0.0, source)]
+        while queue:
+            minutes, node = heapq.heappop(queue)
+            if node == target:
+                break
+            if minutes > best.get(node, math.inf):
+                continue
+            for edge_id, neighbor in self.adjacency[node]:
+                weight = edge_minutes[edge_id]
+                if weight is None:
+                    continue
+                candidate = minutes + weight
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    previous[neighbor] = (edge_id, node)
+                    heapq.heappush(queue, (candidate, neighbor))
+
+        if target not in best:
+            return None
+        steps = []
+        node = target
+        while node != source:
+            edge_id, prior = previous[node]
+            steps.append((edge_id, node))
+            node = prior
+        steps.reverse()
+        return best[target], steps
+
+    def shortest_from(self, source: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """One-to-all Dijkstra; returns (minutes, miles) to every reachable junction"""
+        edge_minutes = self.edge_minutes
+        best = {source: 0.0}
+        miles = {source: 0.0}
+        queue = [(0.0, source)]
+        while queue:
+            minutes, node = heapq.heappop(queue)
+            if minutes > best[node]:
+                continue
+            for edge_id, neighbor in self.adjacency[node]:
+                weight = edge_minutes[edge_id]
+                if weight is None:
+                    continue
+                candidate = minutes + weight
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    miles[neighbor] = miles[node] + self.edges[edge_id].miles
+                    heapq.heappush(queue, (candidate, neighbor))
+        return best, miles
+
+    def nearest_nodes(self, lats: List[float], lngs: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized nearest_node; returns (junction indices, straight-line miles)"""
+        distances = haversine_matrix(lats, lngs, self._node_lats, self._node_lngs)
+        indices = distances.argmin(axis=1)
+        return indices, distances[np.arange(len(indices)), indices]
+
+    def matrix(self, origins: List[Tuple[float, float]],
+               destinations: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Travel (miles, minutes) between every origin and destination.
+
+        Runs one one-to-all search per distinct origin junction rather than one
+        search per cell. Unreachable cells are inf.
+        """
+        o_lats, o_lngs = [p[0] for p in origins], [p[1] for p in origins]
+        d_lats, d_lngs = [p[0] for p in destinations], [p[1] for p in destinations]
+        o_nodes, o_access = self.nearest_nodes(o_lats, o_lngs)
+        d_nodes, d_egress = self.nearest_nodes(d_lats, d_lngs)
+        o_access = o_access * LOCAL_DETOUR_FACTOR
+        d_egress = d_egress * LOCAL_DETOUR_FACTOR
+
+        sources = np.unique(o_nodes)
+        row_of = {node: row for row, node in enumerate(sources)}
+        node_miles = np.full((len(sources), len(self._node_names)), np.inf)
+        node_minutes = np.full((len(sources), len(self._node_names)), np.inf)
+        for row, node in enumerate(sources):
+            minutes, miles = self.shortest_from(self._node_names[node])
+            for name, value in minutes.items():
+                column = self._node_index[name]
+                node_minutes[row, column] = value
+                node_miles[row, column] = miles[name]
+
+        rows = np.array([row_of[node] for node in o_nodes])
+        highway_miles = node_miles[rows][:, d_nodes]
+        highway_minutes = node_minutes[rows][:, d_nodes]
+        local_speed = LOCAL_SPEED_MPH / 60
+        total_miles = o_access[:, None] + highway_miles + d_egress[None, :]
+        total_minutes = (o_access[:, None] + d_egress[None, :]) / local_speed + highway_minutes
+
+        # Points sharing a junction are routed directly on local roads, as in route()
+        same_node = o_nodes[:, None] == d_nodes[None, :]
+        if same_node.any():
+            direct = haversine_matrix(o_lats, o_lngs, d_lats, d_lngs) * LOCAL_DETOUR_FACTOR
+            total_miles = np.where(same_node, direct, total_miles)
+            total_minutes = np.where(same_node, direct / local_speed, total_minutes)
+        return total_miles, total_minutes
+
+    def cached_path(self, source: str, target: str) -> Optional[Tuple[float, List[Tuple[int, str]]]]:
+        """shortest_path behind the route cache, tagged with the edges it uses"""
+        key = (source, target)
+        path = self.path_cache.get(key)
+        if path is None:
+            path = self.shortest_path(source, target)
+            self.store_path(source, target, path, self.version)
+        return path
+
+    def store_path(self, source: str, target: str,
+                   path: Optional[Tuple[float, List[Tuple[int, str]]]], version: int) -> None:
+        """Cache a path computed against the edge weights of the given version"""
+        # Paths computed before the latest layer refresh may already be stale.
+        # Unreachable pairs are not cached; None doubles as the cache-miss value.
+        if path is not None and version == self.version:
+            self.path_cache.set((source, target), path, tags=[edge_id for edge_id, _ in path[1]])
+
+    def route(self, start_lat: float, start_lng: float, end_lat: float, end_lng: float,
+              path: Optional[Tuple[float, List[Tuple[int, str]]]] = None) -> Optional[RoutePlan]:
+        """Plan a route between two points, or None if every path is closed.
+
+        A junction path computed elsewhere (e.g. in a worker process) may be
+        passed in; otherwise it comes from the route cache.
+        """
+        source = self.nearest_node(start_lat, start_lng)
+        target = self.nearest_node(end_lat, end_lng)
+
+        if source == target:
+            miles = haversine_miles(start_lat, start_lng, end_lat, end_lng) * LOCAL_DETOUR_FACTOR
+            return RoutePlan(
+                polyline=[[start_lat, start_lng], [end_lat, end_lng]],
+                distance_miles=miles,
+                minutes=miles / LOCAL_SPEED_MPH * 60,
+                instructions=["Head toward your destination on local roads",
+                              f"Continue for {miles:.1f} miles",
+                              "Approaching destination on the right"],
+                edge_ids=[]
+            )
+
+        if path is None:
+            path = self.cached_path(source, target)
+        if path is None:
+            return None
+        highway_minutes, steps = path
+
+        access_miles = haversine_miles(start_lat, start_lng, *self.nodes[source]) * LOCAL_DETOUR_FACTOR
+        egress_miles = haversine_miles(end_lat, end_lng, *self.nodes[target]) * LOCAL_DETOUR_FACTOR
+
+        polyline = [[start_lat, start_lng]]
+        instructions = []
+        if access_miles >= 0.1:
+            instructions.append(f"Head toward {source} on local roads for {access_miles:.1f} miles")
+        highway_miles = 0.0
+        current = source
+        leg_highway, leg_miles = None, 0.0
+        for edge_id, node in steps:
+            edge = self.edges[edge_id]
+            shape = edge.shape if edge.start == current else edge.shape[::-1]
+            # Consecutive edges share their junction point
+            polyline.extend(shape[1:] if polyline[-1] == shape[0] else shape)
+            highway_miles += edge.miles
+            if edge.highway != leg_highway and leg_highway is not None:
+                instructions.append(f"Take {leg_highway} toward {current} for {leg_miles:.1f} miles")
+                leg_miles = 0.0
+            leg_highway = edge.highway
+            leg_miles += edge.miles
+            current = node
+        instructions.append(f"Take {leg_highway} toward {current} for {leg_miles:.1f} miles")
+        if egress_miles >= 0.1:
+            instructions.append(f"Exit at {target} and continue {egress_miles:.1f} miles")
+        instructions.append("Approaching destination on the right")
+        polyline.append([end_lat, end_lng])
+
+        local_minutes = (access_miles + egress_miles) / LOCAL_SPEED_MPH * 60
+        return RoutePlan(
+            polyline=polyline,
+            distance_miles=access_miles + highway_miles + egress_miles,
+            minutes=highway_minutes + local_minutes,
+            instructions=instructions,
+            edge_ids=[edge_id for edge_id, _ in steps]
+        )
+
+
+def great_circle_matrix(origins: List[Tuple[float, float]],
+                        destinations: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Straight-line (miles, minutes) between every origin and destination"""
+    miles = haversine_matrix(
+        [p[0] for p in origins], [p[1] for p in origins],
+        [p[0] for p in destinations], [p[1] for p in destinations]
+    )
+    return miles, miles / GREAT_CIRCLE_SPEED_MPH * 60
+
+
+# Process-pool workers keep their own copy of the static graph and receive the
+# current edge weights with each task, so no live state has to be shared
+_worker_network: Optional[RoadNetwork] = None
+
+
+def init_worker(junctions: Dict[str, Tuple[float, float]], highways: List[Tuple[str, str, str]]) -> None:
+    global _worker_network
+    _worker_network = RoadNetwork(junctions, highways, cache_size=0)
+
+
+def _network_with(edge_minutes: List[Optional[float]]) -> RoadNetwork:
+    _worker_network.edge_minutes = edge_minutes
+    return _worker_network
+
+
+def shortest_path_task(edge_minutes: List[Optional[float]], source: str, target: str):
+    """RoadNetwork.shortest_path for a worker process"""
+    return _network_with(edge_minutes).shortest_path(source, target)
+
+
+def matrix_task(edge_minutes: List[Optional[float]], origins: List[Tuple[float, float]],
+                destinations: List[Tuple[float, float]]):
+    """RoadNetwork.matrix for a worker process"""
+    return _network_with(edge_minutes).matrix(origins, destinations)
@@ -1,20 +1,45 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import json
+import ipaddress
+import math
+import time
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Literal
 import uuid
 from datetime import datetime, timedelta
 import random
 import asyncio
-from geopy.distance import geodesic
-from jose import JWTError, jwt
 from passlib.context import CryptContext
+from routing import (
+    RoadNetwork, ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS, CONDITION_LAYERS,
+    great_circle_matrix, init_worker, shortest_path_task, matrix_task
+)
+from geo import encode_polyline, simplify_polyline, haversine_miles
+from workers import BoundedThreadPool, ComputePool, ComputeOverloaded, ComputeTimeout
+from places import PlaceCatalog, PlaceIndex, PLACE_LAYER_CATEGORIES, load_gazetteer, normalize
+from cache import CoalescingCache, SingleFlight, SnapshotCache
+from amenities import AMENITY_LAYERS, AmenityIndex, amenity_filter
+from auth import TokenVerifier
+from metrics import Counter, DailyTally, Gauge, MetricsMiddleware, MetricsRegistry
+from audit import AuditLog, MongoAuditStore, naive_utc
+from broadcast import BroadcastHub
+from expiry import ExpiryEngine
+from geofence import GeofenceIndex, GeofenceLimitExceeded, GeofenceTooLarge
+from lookahead import LOOKAHEAD_MAX_RESULTS, horizon_miles, top_hazards
+from profiling import ProfilingMiddleware, RequestProfiler, folded, hottest
+from admission import AdmissionController, AdmissionMiddleware, tiers_for_layers
+from status_checks import (
+    MAX_STATUS_PAGE_SIZE, STATUS_PAGE_SIZE, StatusCheckStore, WriteBehindBuffer, WriteBufferFull, dumps
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,6 +52,20 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 # Security
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+token_verifier = TokenVerifier(SECRET_KEY, ALGORITHM)
+
+# bcrypt takes ~100 ms per call; it runs in its own small pool so a burst of
+# logins can neither block the event loop nor queue ahead of map compute
+auth_pool = BoundedThreadPool(
+    "auth",
+    workers=int(os.environ.get("AUTH_HASH_WORKERS", 2)),
+    max_pending=int(os.environ.get("AUTH_MAX_PENDING", 16)),
+    timeout=float(os.environ.get("AUTH_HASH_TIMEOUT", 5))
+)
+
+# Demo admin account; deployments set ADMIN_PASSWORD_HASH instead
+ADMIN_USERNAME = "idot_admin"
+ADMIN_PASSWORD_HASH = os.environ.get("ADMIN_PASSWORD_HASH") or pwd_context.hash("password123")
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
@@ -35,6 +74,85 @@ db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
 app = FastAPI()
+START_TIME = time.monotonic()
+
+# Sheds low-priority requests first when overloaded; tiers are assigned below
+admission = AdmissionController.from_env()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# Request metrics, served in Prometheus format at /metrics
+metrics = MetricsRegistry(prefix="gaima_")
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+def is_admin_token(token: str) -> bool:
+    payload = token_verifier.verify(token)
+    return payload is not None and payload.get("sub") == ADMIN_USERNAME
+
+# Off until an admin enables it through /api/admin/profiling; streams stay
+# open for as long as the client does, so sampling never picks them
+profiler = RequestProfiler(
+    authorize=is_admin_token,
+    max_duration=float(os.environ.get("PROFILE_MAX_SECONDS", 30)),
+    exclude=("/api/alerts/stream", "/api/alerts/geofences/", "/api/layers/stream")
+)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+alerts_sent = metrics.counter("alerts_sent_total", "Alerts delivered to drivers", ("kind",))
+layer_refresh_seconds = metrics.histogram(
+    "layer_refresh_duration_seconds", "Time to apply a layer refresh", ("layer",)
+)
+alerts_today = DailyTally()
+
+# CPU-bound work (graph search, bulk distance maths) runs off the event loop
+compute = ComputePool.from_env(
+    process_initializer=init_worker,
+    process_initargs=(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+)
+
+# Lookahead alerts are never shed by admission control, so they rank hazards in
+# their own pool: a burst of searches filling the compute pool cannot refuse them
+lookahead_pool = BoundedThreadPool(
+    "lookahead",
+    workers=int(os.environ.get("LOOKAHEAD_WORKERS", 2)),
+    max_pending=int(os.environ.get("LOOKAHEAD_MAX_PENDING", 64)),
+    timeout=float(os.environ.get("LOOKAHEAD_TIMEOUT", 5))
+)
+
+@app.exception_handler(ComputeOverloaded)
+async def compute_overloaded_handler(request: Request, exc: ComputeOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(WriteBufferFull)
+async def write_buffer_full_handler(request: Request, exc: WriteBufferFull):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many writes pending, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(GeofenceLimitExceeded)
+async def geofence_limit_handler(request: Request, exc: GeofenceLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many geofences; delete one before adding another"}
+    )
+
+@app.exception_handler(GeofenceTooLarge)
+async def geofence_too_large_handler(request: Request, exc: GeofenceTooLarge):
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": f"Geofence too large: {exc}"}
+    )
+
+@app.exception_handler(ComputeTimeout)
+async def compute_timeout_handler(request: Request, exc: ComputeTimeout):
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request took too long to compute"}
+    )
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -64,27 +182,56 @@ class MapDataPoint(BaseModel):
 class LookAheadRequest(BaseModel):
     latitude: float
     longitude: float
-    heading: float  # Direction in degrees (0-360)
+    heading: float  # Direction in degrees (0-360); hazards are ranked all around, not only ahead
+    speed: Optional[float] = None  # mph; sets how far ahead to look, noisy readings are clamped
+    limit: int = Field(default=3, ge=1, le=LOOKAHEAD_MAX_RESULTS)  # Ranked hazards to return
+
+class LookAheadHazard(BaseModel):
+    id: str
+    type: str
+    title: str
+    severity: str
+    location: LocationPoint
+    distance_miles: float
+    score: float  # Severity over distance; hazards come best first
 
 class AlertResponse(BaseModel):
     alert: bool
-    message: str = ""
+    message: str = ""  # Spoken alert for the top hazard
+    hazards: List[LookAheadHazard] = []
+    horizon_miles: Optional[float] = None
 
 class RouteRequest(BaseModel):
     start_latitude: float
     start_longitude: float
     end_latitude: float
     end_longitude: float
+    format: Literal["coordinates", "encoded"] = "coordinates"  # "encoded" = Google polyline string
+    tolerance: Optional[float] = Field(default=None, ge=0)  # Douglas-Peucker tolerance in meters
     
+class MatrixRequest(BaseModel):
+    origins: List[LocationPoint] = Field(min_length=1, max_length=500)
+    destinations: List[LocationPoint] = Field(min_length=1, max_length=500)
+    mode: Literal["road", "great_circle"] = "road"
+
+class MatrixResponse(BaseModel):
+    distances_miles: List[List[Optional[float]]]  # [origin][destination]; null if unreachable
+    durations_minutes: List[List[Optional[float]]]
+    mode: str
+
 class PlaceSearchRequest(BaseModel):
     query: str
-    limit: int = 10
+    limit: int = Field(default=10, ge=1, le=100)
+    fuzzy: bool = False  # Also return typo-tolerant matches when exact ones run short
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)  # Caller's location, to favour
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)  # nearby places
 
 class RouteResponse(BaseModel):
     distance_miles: float
     estimated_time_minutes: int
-    polyline: List[List[float]]  # Array of [lat, lng] coordinates
+    polyline: Union[List[List[float]], str]  # Array of [lat, lng] coordinates, or encoded string
     instructions: List[str]
+    polyline_format: str = "coordinates"
     
 class PlaceResult(BaseModel):
     name: str
@@ -92,11 +239,35 @@ class PlaceResult(BaseModel):
     latitude: float
     longitude: float
     category: str
+    distance_miles: Optional[float] = None  # From the caller's location, when given
 
 class PlaceSearchResponse(BaseModel):
     results: List[PlaceResult]
     count: int
 
+class AmenitySearchRequest(BaseModel):
+    layer: Literal["ev_stations", "rest_areas", "travel_centers"]
+    latitude: float
+    longitude: float
+    k: int = Field(default=3, ge=1, le=50)
+    max_distance_miles: float = Field(default=5.0, gt=0, le=100)  # Search radius or route corridor half-width
+    heading: Optional[float] = Field(default=None, ge=0, lt=360)  # Only amenities ahead in this direction
+    end_latitude: Optional[float] = None  # Destination: search along the route to it instead
+    end_longitude: Optional[float] = None
+    min_available: Optional[int] = Field(default=None, ge=0)  # EV stalls free right now
+    connector: Optional[str] = None  # EV connector type, e.g. "CCS"
+    truck_parking: Optional[bool] = None
+    amenity: Optional[str] = None  # Rest area amenity or travel center service, e.g. "Gas Station"
+
+class AmenityResult(BaseModel):
+    distance_miles: float  # From the caller, or off the route for route searches
+    route_miles: Optional[float] = None  # How far along the route, for route searches
+    data: Dict[str, Any]
+
+class AmenitySearchResponse(BaseModel):
+    results: List[AmenityResult]
+    count: int
+
 class AdminLoginRequest(BaseModel):
     username: str
     password: str
@@ -106,6 +277,34 @@ class AdminLoginResponse(BaseModel):
     token_type: str = "bearer"
     expires_in: int
 
+class BroadcastRegion(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    radius_miles: float = Field(gt=0, le=500)
+
+class AlertBroadcastRequest(BaseModel):
+    title: str = "Untitled"
+    message: str = ""
+    priority: Literal["low", "medium", "high"] = "medium"
+    region: Optional[BroadcastRegion] = None  # Only clients streaming from inside this circle
+
+class GeofencePoint(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+
+class GeofenceRequest(BaseModel):
+    name: str = Field(default="", max_length=100)
+    polygon: Optional[List[GeofencePoint]] = Field(default=None, min_length=3, max_length=100)  # An area
+    corridor: Optional[List[GeofencePoint]] = Field(default=None, min_length=2, max_length=500)  # Or a route
+    width_miles: float = Field(default=0.5, gt=0, le=10)  # Either side of the corridor
+    layers: Optional[List[str]] = None  # Layers to be notified about; hazard layers by default
+
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    sample_rate: float = Field(default=0.0, ge=0, le=1)  # Fraction of matching requests profiled unasked
+    paths: List[str] = []  # Request paths eligible for sampling; empty means all
+    min_duration_ms: float = Field(default=0.0, ge=0)  # Keep sampled profiles only for slower requests
+
 class AdminUser(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     username: str
@@ -122,21 +321,14 @@ class AdminDashboardStats(BaseModel):
     system_uptime: str
 
 # Authentication functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await auth_pool.run(pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await auth_pool.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_verifier.issue(data, expires_delta or timedelta(minutes=15))
 
 async def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
@@ -144,19 +336,17 @@ async def get_current_admin_user(credentials: HTTPAuthorizationCredentials = Dep
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    # Verified tokens are cached until they expire or are revoked
+    payload = token_verifier.verify(credentials.credentials)
+    if payload is None:
         raise credentials_exception
+    username: str = payload.get("sub")
     
     # In a real app, you'd fetch the user from database
-    if username != "idot_admin":
+    if username != ADMIN_USERNAME:
         raise credentials_exception
     
-    return {"username": username}
+    return {"username": username, "token": credentials.credentials}
 
 # Mock admin data
 MOCK_ADMIN_USERS = [
@@ -167,13 +357,11 @@ MOCK_ADMIN_USERS = [
     AdminUser(username="system_admin", email="system@illinois.gov", last_login=datetime.utcnow() - timedelta(days=3))
 ]
 
-MOCK_AUDIT_LOGS = [
-    {"id": str(uuid.uuid4()), "action": "User login", "user": "admin_user", "timestamp": datetime.utcnow() - timedelta(hours=1), "details": "Successful admin login"},
-    {"id": str(uuid.uuid4()), "action": "Layer update", "user": "traffic_manager", "timestamp": datetime.utcnow() - timedelta(hours=2), "details": "Updated traffic layer data"},
-    {"id": str(uuid.uuid4()), "action": "Alert broadcast", "user": "admin_user", "timestamp": datetime.utcnow() - timedelta(hours=3), "details": "Sent emergency alert to all users"},
-    {"id": str(uuid.uuid4()), "action": "User creation", "user": "system_admin", "timestamp": datetime.utcnow() - timedelta(days=1), "details": "Created new user account"},
-    {"id": str(uuid.uuid4()), "action": "System maintenance", "user": "system_admin", "timestamp": datetime.utcnow() - timedelta(days=2), "details": "Performed system backup"}
-]
+# Admin audit trail: recent entries in memory, everything in MongoDB
+audit_log = AuditLog(MongoAuditStore(db.audit_log))
+
+# Connected alert streams that admin broadcasts fan out to
+broadcast_hub = BroadcastHub()
 
 # Illinois major cities and highways for realistic data generation
 ILLINOIS_LOCATIONS = [
@@ -196,6 +384,20 @@ LAYER_PRIORITIES = {
     "lower": ["special_events", "maintenance", "emergency_services", "travel_centers"]
 }
 
+# Admission tiers, shed first to last: lower layers, medium layers, admin,
+# high layers and searches; lookahead alerts are never shed, and streams and
+# scrapes are not counted at all
+admission.assign(tiers_for_layers(LAYER_PRIORITIES, "/api/layers/"))
+admission.assign({
+    "/api/layers/all": "medium",
+    "/api/layers/stream": "high",
+    "/api/alerts/lookahead": "critical",
+    "/api/alerts/stream": None,
+    "/metrics": None,
+})
+admission.assign_prefix("/api/admin/", "admin")
+admission.assign_prefix("/api/alerts/geofences/", None)
+
 def generate_random_location_near_illinois():
     """Generate random coordinates near Illinois cities"""
     base_location = random.choice(ILLINOIS_LOCATIONS)
@@ -233,23 +435,29 @@ def generate_mock_data(data_type: str, count: int = 20) -> List[Dict[str, Any]]:
             
         elif data_type == "construction":
             work_types = ["Road Resurfacing", "Bridge Repair", "Lane Expansion", "Utility Work", "Shoulder Repair"]
+            days = random.randint(1, 90)
             point.update({
                 "title": f"Construction: {random.choice(work_types)}",
-                "details": f"Work zone active. Expect delays. Estimated completion: {random.randint(1, 90)} days."
+                "details": f"Work zone active. Expect delays. Estimated completion: {days} days.",
+                "expires_at": point["timestamp"] + timedelta(days=days)
             })
             
         elif data_type == "closures":
             closure_types = ["Lane Closure", "Ramp Closure", "Full Road Closure", "Shoulder Closure"]
+            hours = random.randint(2, 24)
             point.update({
                 "title": random.choice(closure_types),
-                "details": f"Duration: {random.randint(2, 24)} hours. Use alternate route recommended."
+                "details": f"Duration: {hours} hours. Use alternate route recommended.",
+                "expires_at": point["timestamp"] + timedelta(hours=hours)
             })
             
         elif data_type == "incidents":
             incident_types = ["Vehicle Breakdown", "Accident", "Debris on Road", "Disabled Vehicle", "Emergency Response"]
+            minutes = random.randint(30, 180)
             point.update({
                 "title": f"Incident: {random.choice(incident_types)}",
-                "details": f"Emergency services on scene. Avoid area if possible. Clear time: {random.randint(30, 180)} minutes."
+                "details": f"Emergency services on scene. Avoid area if possible. Clear time: {minutes} minutes.",
+                "expires_at": point["timestamp"] + timedelta(minutes=minutes)
             })
             
         elif data_type == "weather":
@@ -380,13 +588,154 @@ def generate_mock_data(data_type: str, count: int = 20) -> List[Dict[str, Any]]:
 # Store for real-time data updates
 data_store = {}
 last_update = {}
+# Bumped on every refresh so cached answers can be keyed on the data they used
+layer_versions = {}
+
+# Place search: the gazetteer is indexed once, POI layers on every refresh
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", str(ROOT_DIR / "data" / "illinois_places.csv"))
+place_catalog = PlaceCatalog(PlaceIndex(load_gazetteer(GAZETTEER_PATH)))
+
+# Autocomplete results keyed on normalized query, limit, fuzzy and location
+# cell; concurrent identical searches share one computation
+PLACE_CACHE_SIZE = 4096
+PLACE_CACHE_CELL_DEGREES = 0.01  # about 0.7 miles
+place_cache = CoalescingCache(maxsize=PLACE_CACHE_SIZE)
+
+# Lookahead answers keyed on position cell, horizon and hazard layer versions,
+# so drivers on the same stretch of road share one computation
+LOOKAHEAD_LAYERS = ["incidents", "construction", "closures", "weather"]
+LOOKAHEAD_CELL_DEGREES = 0.001  # about 350 feet
+LOOKAHEAD_CACHE_SIZE = 8192
+LOOKAHEAD_CACHE_TTL = float(os.environ.get("LOOKAHEAD_CACHE_TTL", "5"))
+lookahead_cache = CoalescingCache(maxsize=LOOKAHEAD_CACHE_SIZE, ttl=LOOKAHEAD_CACHE_TTL)
+
+# Concurrent searches between the same road graph nodes share one worker run
+route_flight = SingleFlight()
+
+# Spatial index for nearest-amenity queries, rebuilt on every layer refresh
+amenity_index = AmenityIndex()
+
+# Road graph used for routing; live layers are joined onto it at refresh time
+road_network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+
+# Time-bounded hazards are removed when they expire instead of by regenerating layers
+EXPIRING_LAYERS = ["closures", "incidents", "construction"]
+hazard_expiry = ExpiryEngine()
+hazards_expired = metrics.counter("hazards_expired_total", "Hazards removed on expiry", ("layer",))
+# Chance of a new incident every 30 seconds, about 0.3 a minute
+INCIDENT_ARRIVAL_CHANCE = 0.15
+
+# Saved areas and route corridors, told about hazards that appear in them
+GEOFENCE_LAYERS = ["incidents", "closures", "construction", "weather", "winter", "restrictions"]
+geofences = GeofenceIndex(
+    default_layers=GEOFENCE_LAYERS,
+    max_total=int(os.environ.get("GEOFENCE_MAX_TOTAL", 100_000)),
+    max_per_owner=int(os.environ.get("GEOFENCE_MAX_PER_CLIENT", 20))
+)
+geofence_deliveries = metrics.counter(
+    "geofence_deliveries_total", "Hazards queued for geofence subscribers", ("layer",))
+
+# Reverse proxies whose X-Forwarded-For is believed, as comma separated addresses or networks
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.environ.get("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if proxy.strip()
+]
+
+def _trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_address(request: Request) -> Optional[str]:
+    """Address of the client behind any trusted proxies.
+
+    X-Forwarded-For is read right to left, skipping the TRUSTED_PROXIES
+    that appended to it, and the first other address is the client; a
+    request that did not come through a trusted proxy is keyed on its
+    peer address, so a client cannot choose its own by sending the header.
+    """
+    address = request.client.host if request.client else None
+    if address is None or not _trusted_proxy(address):
+        return address
+    for hop in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if not _trusted_proxy(hop):
+            break
+    return address
+
+def changed_points(previous: List[Dict[str, Any]], points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Points that are new or differ from the point with the same id before"""
+    before = {point["id"]: point for point in previous}
+    changed = []
+    for point in points:
+        old = before.get(point["id"])
+        if old is None or (old is not point and old != point):
+            changed.append(point)
+    return changed
+
+def refresh_layer(layer_type: str, points: List[Dict[str, Any]],
+                  changed: Optional[List[Dict[str, Any]]] = None):
+    """Replace a layer's data and update everything derived from it.
+
+    Callers that know which points are new or changed pass them as changed;
+    otherwise they are found by comparing with the layer's previous points.
+    """
+    started = time.perf_counter()
+    if len(geofences):
+        if changed is None:
+            changed = changed_points(data_store.get(layer_type, []), points)
+        geofence_deliveries.inc(layer_type, amount=geofences.match(layer_type, changed))
+    data_store[layer_type] = points
+    last_update[layer_type] = datetime.utcnow()
+    layer_versions[layer_type] = layer_versions.get(layer_type, 0) + 1
+    if layer_type in EXPIRING_LAYERS:
+        hazard_expiry.track(layer_type, points)
+    if layer_type in CONDITION_LAYERS:
+        road_network.apply_conditions(data_store)
+    if layer_type in PLACE_LAYER_CATEGORIES:
+        place_catalog.set_layer(layer_type, points)
+        place_cache.invalidate_all()
+    if layer_type in AMENITY_LAYERS:
+        amenity_index.set_layer(layer_type, points)
+    layer_refresh_seconds.observe(time.perf_counter() - started, layer_type)
 
 async def update_incident_data():
-    """Update incident data every 30 seconds to simulate real-time"""
+    """Add new incidents now and then to simulate real-time; cleared ones expire"""
     while True:
-        data_store["incidents"] = generate_mock_data("incidents", 25)
-        last_update["incidents"] = datetime.utcnow()
         await asyncio.sleep(30)
+        if random.random() < INCIDENT_ARRIVAL_CHANCE:
+            arrivals = generate_mock_data("incidents", 1)
+            refresh_layer("incidents", data_store["incidents"] + arrivals, changed=arrivals)
+
+async def expire_hazards(expired: Dict[str, List[str]]):
+    """Drop expired hazards from their layers and tell connected clients.
+
+    Not a layer refresh: the expiry engine has already stopped tracking the
+    points, nothing new can match a geofence, and the expiring layers feed
+    no place or amenity index, so only the layer list is filtered and the
+    road edges the points were joined to are recomputed.
+    """
+    for layer_type, ids in expired.items():
+        started = time.perf_counter()
+        gone = set(ids)
+        data_store[layer_type] = [point for point in data_store.get(layer_type, []) if point["id"] not in gone]
+        last_update[layer_type] = datetime.utcnow()
+        layer_versions[layer_type] = layer_versions.get(layer_type, 0) + 1
+        if layer_type in CONDITION_LAYERS:
+            road_network.remove_points(gone)
+        layer_refresh_seconds.observe(time.perf_counter() - started, layer_type)
+        hazards_expired.inc(layer_type, amount=len(ids))
+    await broadcast_hub.publish("hazards_cleared", {
+        "hazards": expired,
+        "cleared_at": datetime.utcnow().isoformat() + "Z"
+    })
+
+hazard_expiry.add_listener(expire_hazards)
 
 # Initialize data store
 all_layer_types = ["traffic", "construction", "closures", "incidents", "weather", "winter", "restrictions", 
@@ -396,11 +745,24 @@ all_layer_types = ["traffic", "construction", "closures", "incidents", "weather"
 for layer_type in all_layer_types:
     data_store[layer_type] = generate_mock_data(layer_type, 15 if layer_type == "incidents" else 8)
     last_update[layer_type] = datetime.utcnow()
+road_network.apply_conditions(data_store)
+for layer_type in EXPIRING_LAYERS:
+    hazard_expiry.track(layer_type, data_store[layer_type])
+for layer_type in PLACE_LAYER_CATEGORIES:
+    place_catalog.set_layer(layer_type, data_store[layer_type])
+for layer_type in AMENITY_LAYERS:
+    amenity_index.set_layer(layer_type, data_store[layer_type])
 
 # Start real-time update task
 @app.on_event("startup")
 async def startup_event():
+    admission.monitor.start()
     asyncio.create_task(update_incident_data())
+    asyncio.create_task(hazard_expiry.run())
+    asyncio.create_task(audit_log.run())
+    asyncio.create_task(status_store.ensure_indexes())
+    if status_writer is not None:
+        status_writer.start()
 
 # API Routes
 @api_router.get("/")
@@ -553,139 +915,337 @@ async def get_all_layers_info():
         "total_data_points": sum(len(data_store.get(layer, [])) for layer in all_layer_types)
     }
 
-@api_router.post("/alerts/lookahead")
-async def get_lookahead_alerts(request: LookAheadRequest):
-    """Check for hazards within 2 miles in direction of travel"""
-    user_location = (request.latitude, request.longitude)
-    
+# Layers in the order a cold map load needs them: high, then medium, then lower
+LAYER_STREAM_ORDER = [
+    (priority, layer_type) for priority in ("high", "medium", "lower") for layer_type in LAYER_PRIORITIES[priority]
+]
+
+async def _layer_lines(layers: Optional[set]):
+    for priority, layer_type in LAYER_STREAM_ORDER:
+        if layers is not None and layer_type not in layers:
+            continue
+        points = data_store.get(layer_type, [])
+        yield (dumps({
+            "layer": layer_type,
+            "priority": priority,
+            "data": points,
+            "last_updated": last_update.get(layer_type, datetime.utcnow()),
+            "count": len(points)
+        }) + "\n").encode()
+        # Each layer goes out as its own chunk, with other requests let in between
+        await asyncio.sleep(0)
+
+@api_router.get("/layers/stream")
+async def stream_layers(layers: Optional[str] = None):
+    """Layers as newline-delimited JSON, one line per layer, highest priority first.
+
+    Takes an optional comma-separated subset of layer names; each line has
+    the same fields as the single-layer endpoints plus layer and priority.
+    """
+    selected = None
+    if layers:
+        selected = {name.strip().replace("-", "_") for name in layers.split(",") if name.strip()}
+        unknown = sorted(selected.difference(all_layer_types))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown layers: {', '.join(unknown)}"
+            )
+    return StreamingResponse(
+        _layer_lines(selected),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def lookahead_version():
+    return tuple(layer_versions.get(layer_type, 0) for layer_type in LOOKAHEAD_LAYERS)
+
+async def _lookahead_hazards(latitude: float, longitude: float, horizon: float):
     # Check all high priority incidents and hazards
     all_hazards = []
-    for layer_type in ["incidents", "construction", "closures", "weather"]:
+    for layer_type in LOOKAHEAD_LAYERS:
         all_hazards.extend(data_store.get(layer_type, []))
     
-    # Find hazards within 2 miles
-    nearby_hazards = []
-    for hazard in all_hazards:
-        hazard_location = (hazard["location"]["latitude"], hazard["location"]["longitude"])
-        distance = geodesic(user_location, hazard_location).miles
-        
-        if distance <= 2.0:
-            # Simple direction calculation (in a real app, you'd use proper bearing calculation)
-            # For demo purposes, we'll include hazards that are roughly in the direction of travel
-            nearby_hazards.append({
-                "hazard": hazard,
-                "distance": round(distance, 1)
-            })
+    # Hazards all around are ranked; heading is not used, so it is not part of the cache key
+    return await lookahead_pool.run(
+        top_hazards, latitude, longitude, all_hazards, horizon, LOOKAHEAD_MAX_RESULTS
+    )
+
+@api_router.post("/alerts/lookahead", response_model=AlertResponse)
+async def get_lookahead_alerts(request: LookAheadRequest):
+    """Rank hazards around the driver within the distance covered in about three minutes at speed"""
+    # Drivers in the same cell get the answer for the cell centre
+    cell = (round(request.latitude / LOOKAHEAD_CELL_DEGREES), round(request.longitude / LOOKAHEAD_CELL_DEGREES))
+    horizon = horizon_miles(request.speed)
+    ranked = await lookahead_cache.get(
+        (cell, horizon, lookahead_version()),
+        lambda: _lookahead_hazards(cell[0] * LOOKAHEAD_CELL_DEGREES, cell[1] * LOOKAHEAD_CELL_DEGREES, horizon),
+        version=lookahead_version
+    )
+    ranked = ranked[:request.limit]
     
-    if nearby_hazards:
-        # Pick the closest, highest severity hazard
-        closest_hazard = min(nearby_hazards, key=lambda x: x["distance"])
-        hazard_info = closest_hazard["hazard"]
-        distance = closest_hazard["distance"]
-        
-        # Generate audio alert message
-        distance_text = f"{distance} mile{'s' if distance != 1 else ''}"
-        message = f"{hazard_info['title']} ahead, {distance_text}. {hazard_info['details'][:50]}..."
-        
-        return AlertResponse(alert=True, message=message)
+    if not ranked:
+        return AlertResponse(alert=False, horizon_miles=horizon)
+    
+    hazards = [
+        LookAheadHazard(
+            id=hazard["id"], type=hazard["type"], title=hazard["title"], severity=hazard["severity"],
+            location=hazard["location"], distance_miles=round(distance, 2), score=round(score, 3)
+        )
+        for score, distance, hazard in ranked
+    ]
+    top = ranked[0][2]
+    distance = round(ranked[0][1], 1)
+    
+    # Generate audio alert message
+    distance_text = f"{distance} mile{'s' if distance != 1 else ''}"
+    message = f"{top['title']} ahead, {distance_text}. {top['details'][:50]}..."
+    alerts_sent.inc("lookahead")
+    alerts_today.add()
     
+    return AlertResponse(alert=True, message=message, hazards=hazards, horizon_miles=horizon)
+
+@api_router.get("/alerts/stream")
+async def stream_alerts(
+    latitude: Optional[float] = Query(default=None, ge=-90, le=90),
+    longitude: Optional[float] = Query(default=None, ge=-180, le=180)
+):
+    """Server-Sent Events stream of admin broadcasts and hazards_cleared updates; pass a location to also get regional broadcasts"""
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="latitude and longitude must be given together"
+        )
+    return StreamingResponse(
+        broadcast_hub.stream(latitude, longitude),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    
+@api_router.post("/geofences", status_code=status.HTTP_201_CREATED)
+async def create_geofence(request: GeofenceRequest, http_request: Request):
+    """Save an area or route corridor; new hazards inside it stream from /api/alerts/geofences/{id}.
+
+    Each client address may hold GEOFENCE_MAX_PER_CLIENT geofences, and the
+    server GEOFENCE_MAX_TOTAL; past either, registration answers 429. The
+    address is the one the TRUSTED_PROXIES in front of the server saw, from
+    X-Forwarded-For, not the proxy's own. An
+    area or corridor segment wider than GEOFENCE_MAX_EXTENT_DEGREES answers 422.
+    """
+    if (request.polygon is None) == (request.corridor is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Give exactly one of polygon and corridor"
+        )
+    layers = None
+    if request.layers:
+        layers = {layer.replace("-", "_") for layer in request.layers}
+        unknown = sorted(layers.difference(all_layer_types))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown layers: {', '.join(unknown)}"
+            )
+    owner = client_address(http_request)
+    if request.polygon is not None:
+        geofence = geofences.add_polygon(
+            request.name, [(p.latitude, p.longitude) for p in request.polygon], layers, owner
+        )
+    else:
+        geofence = geofences.add_corridor(
+            request.name, [(p.latitude, p.longitude) for p in request.corridor], request.width_miles, layers, owner
+        )
+    return geofence.describe()
+
+@api_router.get("/geofences/{geofence_id}")
+async def get_geofence(geofence_id: str):
+    geofence = geofences.get(geofence_id)
+    if geofence is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geofence not found")
+    return geofence.describe()
+
+@api_router.delete("/geofences/{geofence_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_geofence(geofence_id: str):
+    if not geofences.remove(geofence_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geofence not found")
+
+@api_router.get("/alerts/geofences/{geofence_id}")
+async def stream_geofence_alerts(geofence_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """Server-Sent Events stream of hazards appearing in a saved geofence"""
+    if geofences.get(geofence_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Geofence not found")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        geofences.stream(geofence_id, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def plan_route(start_lat: float, start_lng: float, end_lat: float, end_lng: float):
+    """Route through the path cache, running uncached graph searches in a worker process"""
+    source = road_network.nearest_node(start_lat, start_lng)
+    target = road_network.nearest_node(end_lat, end_lng)
+    path = None
+    if source != target:
+        path = road_network.path_cache.get((source, target))
+        if path is None:
+            version = road_network.version
+            path = await route_flight.run(
+                (source, target, version), lambda: _search_path(source, target, version)
+            )
+            if path is None:
+                return None
+    return road_network.route(start_lat, start_lng, end_lat, end_lng, path=path)
+
+async def _search_path(source: str, target: str, version: int):
+    path = await compute.run_in_process(shortest_path_task, road_network.edge_minutes, source, target)
+    if path is not None:
+        road_network.store_path(source, target, path, version)
+    return path
+
 @api_router.post("/search/route")
 async def search_route(request: RouteRequest):
     """Search for a route between two points"""
-    # Calculate distance using geodesic
-    start_point = (request.start_latitude, request.start_longitude)
-    end_point = (request.end_latitude, request.end_longitude)
-    distance = geodesic(start_point, end_point).miles
-    
-    # Estimate time (assuming average speed of 45 mph)
-    estimated_time = int((distance / 45) * 60)  # Convert to minutes
-    
-    # Generate a simple polyline (in real app, this would use routing service)
-    # For demo, create a simple straight line with some waypoints
-    num_points = max(5, int(distance / 10))  # More points for longer distances
-    polyline = []
-    
-    for i in range(num_points + 1):
-        ratio = i / num_points
-        lat = request.start_latitude + (request.end_latitude - request.start_latitude) * ratio
-        lng = request.start_longitude + (request.end_longitude - request.start_longitude) * ratio
-        
-        # Add small random variation to make it look more realistic
-        if i > 0 and i < num_points:
-            lat += random.uniform(-0.01, 0.01)
-            lng += random.uniform(-0.01, 0.01)
-        
-        polyline.append([lat, lng])
-    
-    # Generate mock turn-by-turn instructions
-    directions = [
-        "Head northwest on your starting road",
-        f"Continue for {distance/3:.1f} miles",
-        "Stay on the main route",
-        f"In {distance/2:.1f} miles, continue straight",
-        "Approaching destination on the right"
-    ]
+    plan = await plan_route(
+        request.start_latitude, request.start_longitude,
+        request.end_latitude, request.end_longitude
+    )
+    if plan is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No open route between the requested points"
+        )
+    
+    polyline = plan.polyline
+    if request.tolerance:
+        polyline = simplify_polyline(polyline, request.tolerance)
+    if request.format == "encoded":
+        polyline = encode_polyline(polyline)
     
     return RouteResponse(
-        distance_miles=round(distance, 1),
-        estimated_time_minutes=estimated_time,
+        distance_miles=round(plan.distance_miles, 1),
+        estimated_time_minutes=int(round(plan.minutes)),
         polyline=polyline,
-        instructions=directions
+        instructions=plan.instructions,
+        polyline_format=request.format
+    )
+
+def _matrix_rows(values) -> List[List[Optional[float]]]:
+    return [[None if math.isinf(v) else round(v, 1) for v in row] for row in values.tolist()]
+
+@api_router.post("/search/matrix", response_model=MatrixResponse)
+async def search_matrix(request: MatrixRequest):
+    """Travel distance/time between every origin and every destination"""
+    origins = [(p.latitude, p.longitude) for p in request.origins]
+    destinations = [(p.latitude, p.longitude) for p in request.destinations]
+    if request.mode == "road":
+        miles, minutes = await compute.run_in_process(
+            matrix_task, road_network.edge_minutes, origins, destinations
+        )
+    else:
+        miles, minutes = await compute.run_in_thread(great_circle_matrix, origins, destinations)
+    
+    return MatrixResponse(
+        distances_miles=_matrix_rows(miles),
+        durations_minutes=_matrix_rows(minutes),
+        mode=request.mode
+    )
+
+async def find_places(query: str, limit: int, fuzzy: bool, origin: Optional[tuple]):
+    """Place search through the autocomplete cache, run on the thread pool on a miss"""
+    cell = None
+    if origin is not None:
+        # Callers in the same cell share results ranked from the cell centre
+        cell = (round(origin[0] / PLACE_CACHE_CELL_DEGREES), round(origin[1] / PLACE_CACHE_CELL_DEGREES))
+        origin = (cell[0] * PLACE_CACHE_CELL_DEGREES, cell[1] * PLACE_CACHE_CELL_DEGREES)
+    query = normalize(query)
+    return await place_cache.get(
+        (query, limit, fuzzy, cell),
+        lambda: compute.run_in_thread(place_catalog.search, query, limit, fuzzy, origin),
+        version=lambda: place_catalog.version
     )
 
 @api_router.post("/search/place")
 async def search_place(request: PlaceSearchRequest):
-    """Search for places by name or address"""
-    # Mock place search results based on Illinois locations
-    mock_places = [
-        {"name": "Chicago O'Hare International Airport", "category": "Airport", "lat": 41.9742, "lng": -87.9073},
-        {"name": "Millennium Park", "category": "Park", "lat": 41.8826, "lng": -87.6226},
-        {"name": "Navy Pier", "category": "Attraction", "lat": 41.8917, "lng": -87.6086},
-        {"name": "Springfield State Capitol", "category": "Government", "lat": 39.7990, "lng": -89.6544},
-        {"name": "University of Illinois", "category": "Education", "lat": 40.1020, "lng": -88.2272},
-        {"name": "Starved Rock State Park", "category": "Park", "lat": 41.3184, "lng": -88.9942},
-        {"name": "Route 66 Begin Sign", "category": "Landmark", "lat": 41.8781, "lng": -87.6298},
-        {"name": "Illinois State Fair", "category": "Event", "lat": 39.7817, "lng": -89.6501},
-        {"name": "Cahokia Mounds", "category": "Historic", "lat": 38.6581, "lng": -90.0629},
-        {"name": "Woodfield Mall", "category": "Shopping", "lat": 42.0409, "lng": -88.0359}
+    """Search for places by name or address, nearest first when a location is given"""
+    if (request.latitude is None) != (request.longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="latitude and longitude must be given together"
+        )
+    origin = None if request.latitude is None else (request.latitude, request.longitude)
+    matching_places = [
+        PlaceResult(
+            name=place.name,
+            address=place.address,
+            latitude=place.latitude,
+            longitude=place.longitude,
+            category=place.category,
+            distance_miles=None if origin is None else round(
+                haversine_miles(origin[0], origin[1], place.latitude, place.longitude), 1
+            )
+        )
+        for place in await find_places(request.query, request.limit, request.fuzzy, origin)
     ]
     
-    # Filter places based on search query
-    query_lower = request.query.lower()
-    matching_places = []
-    
-    for place in mock_places:
-        if (query_lower in place["name"].lower() or 
-            query_lower in place["category"].lower() or
-            len(query_lower) < 3):  # Show all for short queries
-            
-            matching_places.append(PlaceResult(
-                name=place["name"],
-                address=f"{place['name']}, Illinois, USA",
-                latitude=place["lat"],
-                longitude=place["lng"],
-                category=place["category"]
-            ))
-    
-    # Limit results
-    matching_places = matching_places[:request.limit]
-    
     return PlaceSearchResponse(
         results=matching_places,
         count=len(matching_places)
     )
 
+@api_router.post("/search/amenities", response_model=AmenitySearchResponse)
+async def search_amenities(request: AmenitySearchRequest):
+    """Nearest matching amenities around a point, ahead on a heading, or along a route"""
+    if (request.end_latitude is None) != (request.end_longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end_latitude and end_longitude must be given together"
+        )
+    predicate = amenity_filter(
+        request.min_available, request.connector, request.truck_parking, request.amenity
+    )
+    
+    if request.end_latitude is not None:
+        plan = await plan_route(
+            request.latitude, request.longitude, request.end_latitude, request.end_longitude
+        )
+        if plan is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No open route between the requested points"
+            )
+        matches = await compute.run_in_thread(
+            amenity_index.along_route, request.layer, plan.polyline,
+            request.k, request.max_distance_miles, predicate
+        )
+        results = [
+            AmenityResult(distance_miles=round(offset, 2), route_miles=round(route_miles, 1), data=point)
+            for route_miles, offset, point in matches
+        ]
+    else:
+        matches = await compute.run_in_thread(
+            amenity_index.nearest, request.layer, request.latitude, request.longitude,
+            request.k, request.max_distance_miles, predicate, request.heading
+        )
+        results = [AmenityResult(distance_miles=round(miles, 2), data=point) for miles, point in matches]
+    
+    return AmenitySearchResponse(results=results, count=len(results))
+
 # Admin Authentication Endpoints
 @api_router.post("/admin/login", response_model=AdminLoginResponse)
 async def admin_login(login_request: AdminLoginRequest):
     """Admin login endpoint"""
-    # Hardcoded credentials for demo (in real app, check against database)
-    if login_request.username != "idot_admin" or login_request.password != "password123":
+    # Demo account (in real app, check against database). The hash is checked
+    # even for unknown usernames so both failures take equally long
+    password_ok = await verify_password(login_request.password, ADMIN_PASSWORD_HASH)
+    if login_request.username != ADMIN_USERNAME or not password_ok:
+        audit_log.record("Failed login", login_request.username, "Incorrect username or password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
+    audit_log.record("User login", login_request.username, "Successful admin login")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": login_request.username}, expires_delta=access_token_expires
@@ -696,18 +1256,34 @@ async def admin_login(login_request: AdminLoginRequest):
         expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60  # Convert to seconds
     )
 
+@api_router.post("/admin/logout")
+async def admin_logout(all_sessions: bool = False, current_user: dict = Depends(get_current_admin_user)):
+    """Revoke the caller's token, or every token issued to them so far"""
+    if all_sessions:
+        token_verifier.revoke_subject(current_user["username"])
+    else:
+        token_verifier.revoke(current_user["token"])
+    audit_log.record(
+        "User logout", current_user["username"],
+        "Revoked all sessions" if all_sessions else "Revoked current session"
+    )
+    return {"revoked": "all_sessions" if all_sessions else "token"}
+
 # Admin Dashboard Endpoints (Protected)
 @api_router.get("/admin/dashboard", response_model=AdminDashboardStats)
 async def get_admin_dashboard(current_user: dict = Depends(get_current_admin_user)):
     """Get admin dashboard statistics"""
     total_data_points = sum(len(data_store.get(layer, [])) for layer in all_layer_types)
     
+    uptime_minutes = int(time.monotonic() - START_TIME) // 60
+    days, minutes = divmod(uptime_minutes, 24 * 60)
+    
     return AdminDashboardStats(
-        total_users=len(MOCK_ADMIN_USERS) + random.randint(1500, 2500),  # Include public users
+        total_users=len(MOCK_ADMIN_USERS),  # Public users are anonymous and not counted
         active_layers=len(all_layer_types),
         total_data_points=total_data_points,
-        alerts_sent_today=random.randint(45, 120),
-        system_uptime="15 days, 8 hours"
+        alerts_sent_today=alerts_today.value(),
+        system_uptime=f"{days} days, {minutes // 60} hours, {minutes % 60} minutes"
     )
 
 @api_router.get("/admin/users", response_model=List[AdminUser])
@@ -734,61 +1310,340 @@ async def get_admin_content(current_user: dict = Depends(get_current_admin_user)
 @api_router.get("/admin/alerts")
 async def get_admin_alerts(current_user: dict = Depends(get_current_admin_user)):
     """Get alert broadcast management data"""
+    hub = broadcast_hub.stats()
     return {
-        "recent_alerts": [
-            {"id": 1, "title": "Winter Weather Advisory", "sent_at": "2025-01-15T10:30:00Z", "recipients": 1250},
-            {"id": 2, "title": "Highway Construction Notice", "sent_at": "2025-01-14T14:15:00Z", "recipients": 890},
-            {"id": 3, "title": "System Update Notification", "sent_at": "2025-01-13T09:00:00Z", "recipients": 2100}
-        ],
-        "total_alerts_sent": 3,
-        "total_recipients_reached": 4240
+        "recent_alerts": broadcast_hub.history(),
+        "total_alerts_sent": hub["broadcasts"],
+        "total_recipients_reached": hub["delivered"],
+        "connected_clients": hub["connections"]
     }
 
 @api_router.get("/admin/audit")
-async def get_admin_audit_logs(current_user: dict = Depends(get_current_admin_user)):
-    """Get audit logs"""
+async def get_admin_audit_logs(
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Get audit logs, newest first; pass next_cursor back to get the following page.
+
+    total_logs is an estimate of the entries in the whole log, whatever the
+    filters; count is the number on this page.
+    """
+    try:
+        logs, next_cursor = await audit_log.page(limit, cursor, user, action, naive_utc(since), naive_utc(until))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {
+        "logs": logs,
+        "count": len(logs),
+        "total_logs": await audit_log.estimated_total(),
+        "next_cursor": next_cursor
+    }
+
+# Admin overview sections: the version token each depends on, and how to build it
+ADMIN_OVERVIEW_SECTIONS = {
+    "dashboard": (
+        lambda: (
+            sum(len(data_store.get(layer, ())) for layer in all_layer_types),
+            alerts_today.value(),
+            int(time.monotonic() - START_TIME) // 60
+        ),
+        get_admin_dashboard
+    ),
+    "users": (lambda: len(MOCK_ADMIN_USERS), get_admin_users),
+    "content": (lambda: 0, get_admin_content),
+    "alerts": (lambda: tuple(broadcast_hub.stats().values()), get_admin_alerts),
+    "audit": (
+        lambda: audit_log.version,
+        lambda current_user: get_admin_audit_logs(
+            limit=50, cursor=None, user=None, action=None, since=None, until=None, current_user=current_user
+        )
+    ),
+}
+
+admin_snapshots = SnapshotCache()
+
+def parse_etags(header: Optional[str]) -> set:
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+@api_router.get("/admin/overview")
+async def get_admin_overview(
+    sections: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Dashboard, users, content, alerts and audit in one response.
+
+    Each section carries an ETag; send the ETags from the last response in
+    If-None-Match and sections that have not changed are left out (listed
+    under "unchanged"). 304 when nothing requested has changed.
+    """
+    names = [name.strip() for name in sections.split(",")] if sections else list(ADMIN_OVERVIEW_SECTIONS)
+    unknown = [name for name in names if name not in ADMIN_OVERVIEW_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sections: {', '.join(unknown)}"
+        )
+    
+    snapshots = {}
+    stale = {}
+    for name in names:
+        version_of, _ = ADMIN_OVERVIEW_SECTIONS[name]
+        version = version_of()
+        snapshot = admin_snapshots.get(name, version)
+        if snapshot is None:
+            stale[name] = version
+        else:
+            snapshots[name] = snapshot
+    if stale:
+        # Rebuild what changed concurrently, passing on the already verified user
+        documents = await asyncio.gather(*(
+            ADMIN_OVERVIEW_SECTIONS[name][1](current_user) for name in stale
+        ))
+        for (name, version), document in zip(stale.items(), documents):
+            snapshots[name] = admin_snapshots.set(name, version, jsonable_encoder(document))
+    
+    known = parse_etags(if_none_match)
+    changed = [name for name in names if snapshots[name][0] not in known]
+    if not changed:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    
+    # Section bodies are spliced in as stored, without being serialized again
+    compact = {"separators": (",", ":")}
+    body = "{%s,%s,%s}" % (
+        '"etags":' + json.dumps({name: snapshots[name][0] for name in names}, **compact),
+        '"sections":{' + ",".join(f"{json.dumps(name)}:{snapshots[name][1]}" for name in changed) + "}",
+        '"unchanged":' + json.dumps([name for name in names if name not in changed], **compact)
+    )
+    return Response(content=body, media_type="application/json")
+
+@api_router.get("/admin/cache")
+async def get_admin_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    """Get hit/miss statistics for the in-process caches"""
     return {
-        "logs": MOCK_AUDIT_LOGS,
-        "total_logs": len(MOCK_AUDIT_LOGS)
+        "route": {**road_network.path_cache.stats(), "coalescing": route_flight.stats()},
+        "place": place_cache.stats(),
+        "lookahead": lookahead_cache.stats(),
+        "auth_tokens": token_verifier.stats(),
+        "admin_overview": admin_snapshots.stats()
     }
 
+@api_router.get("/admin/profiling")
+async def get_profiling_settings(current_user: dict = Depends(get_current_admin_user)):
+    """Get request profiling settings"""
+    return profiler.settings()
+
+@api_router.put("/admin/profiling")
+async def update_profiling_settings(
+    settings: ProfilingSettings,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Turn request profiling on or off.
+
+    While enabled, a request carrying an admin token in the X-Profile header
+    or _profile query parameter is profiled and answers with X-Profile-Id;
+    requests to the given paths (all but the streaming endpoints, when none
+    are given) are also profiled at sample_rate. A profile stops sampling
+    after PROFILE_MAX_SECONDS.
+    """
+    profiler.configure(settings.enabled, settings.sample_rate, settings.paths, settings.min_duration_ms)
+    audit_log.record(
+        "Profiling update", current_user["username"],
+        f"Profiling {'enabled' if settings.enabled else 'disabled'}, sample rate {settings.sample_rate:g}"
+    )
+    return profiler.settings()
+
+@api_router.get("/admin/profiles")
+async def list_profiles(current_user: dict = Depends(get_current_admin_user)):
+    """Stored request profiles, newest first"""
+    profiles = profiler.store.list()
+    return {"profiles": profiles, "count": len(profiles)}
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["json", "folded"] = "json",
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """One profile: its hottest functions, or folded stacks for a flame graph viewer"""
+    profile = profiler.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(folded(profile))
+    summary = {key: value for key, value in profile.items() if key != "stacks"}
+    return {**summary, "hottest": hottest(profile)}
+
 @api_router.post("/admin/broadcast")
 async def broadcast_alert(
-    alert_data: dict,
+    alert_data: AlertBroadcastRequest,
     current_user: dict = Depends(get_current_admin_user)
 ):
-    """Broadcast an alert to all users"""
-    # In a real app, this would send push notifications or alerts
-    alert_id = str(uuid.uuid4())
+    """Broadcast an alert to every connected client, or to those inside a region"""
+    alert = {
+        "id": str(uuid.uuid4()),
+        "title": alert_data.title,
+        "message": alert_data.message,
+        "priority": alert_data.priority,
+        "sent_at": datetime.utcnow().isoformat() + "Z"
+    }
+    region = alert_data.region
+    record = await broadcast_hub.broadcast(
+        alert, (region.latitude, region.longitude, region.radius_miles) if region else None
+    )
+    
+    alerts_sent.inc("broadcast", amount=record["recipients"])
+    alerts_today.add()
     
     # Add to audit log
-    MOCK_AUDIT_LOGS.insert(0, {
-        "id": str(uuid.uuid4()),
-        "action": "Alert broadcast",
-        "user": current_user["username"],
-        "timestamp": datetime.utcnow(),
-        "details": f"Broadcasted alert: {alert_data.get('title', 'Untitled')}"
-    })
+    audit_log.record(
+        "Alert broadcast", current_user["username"],
+        f"Broadcasted alert: {alert_data.title}"
+        + (f" within {region.radius_miles:g} miles of ({region.latitude}, {region.longitude})" if region else "")
+    )
     
     return {
         "success": True,
-        "alert_id": alert_id,
+        "alert_id": alert["id"],
         "message": "Alert broadcasted successfully",
-        "estimated_recipients": random.randint(800, 1500)
+        "recipients": record["recipients"],
+        # Kept for existing clients; it was a random estimate and is now the real count
+        "estimated_recipients": record["recipients"]
     }
 
 # Original routes
+status_store = StatusCheckStore(db.status_checks)
+# Optional (STATUS_WRITE_BEHIND=1): batch concurrent status inserts into insert_many calls
+status_writer = WriteBehindBuffer.from_env(db.status_checks)
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    if status_writer is not None:
+        # Returns once the batch holding this check has been written
+        await status_writer.insert(status_obj.dict())
+    else:
+        _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/status")
+async def get_status_checks(
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,  # Comma-separated subset of id, client_name, timestamp
+    format: Literal["json", "ndjson"] = "json"
+):
+    """Status checks, newest first.
+
+    json: a page (100 by default, at most 1000) as a list, with the cursor
+    for the next page in the X-Next-Cursor header. ndjson: every check from
+    the cursor on, or the first limit of them, streamed one per line.
+    """
+    field_list = [field.strip() for field in fields.split(",")] if fields else None
+    try:
+        if format == "ndjson":
+            return StreamingResponse(
+                status_store.stream(cursor, field_list, limit),
+                media_type="application/x-ndjson"
+            )
+        page_size = limit or STATUS_PAGE_SIZE
+        if page_size > MAX_STATUS_PAGE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"limit must be at most {MAX_STATUS_PAGE_SIZE}; use format=ndjson for more"
+            )
+        documents, next_cursor = await status_store.page(page_size, cursor, field_list)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(
+        content="[" + ",".join(dumps(document) for document in documents) + "]",
+        media_type="application/json",
+        headers=headers
+    )
+
+@metrics.collector
+def collect_component_metrics():
+    """Cache and worker pool statistics, read at scrape time"""
+    caches = {
+        "route": road_network.path_cache.stats(),
+        "place": place_cache.stats(),
+        "lookahead": lookahead_cache.stats(),
+        "auth_token": token_verifier.stats(),
+    }
+    cache_lookups = Counter("gaima_cache_lookups_total", "Cache lookups by result", ("cache", "result"))
+    cache_evictions = Counter("gaima_cache_evictions_total", "Entries evicted for space", ("cache",))
+    cache_size = Gauge("gaima_cache_entries", "Entries currently cached", ("cache",))
+    for name, stats in caches.items():
+        cache_lookups.inc(name, "hit", amount=stats["hits"])
+        cache_lookups.inc(name, "miss", amount=stats["misses"])
+        cache_evictions.inc(name, amount=stats["evictions"])
+        cache_size.set(stats["size"], name)
+    coalesced = Counter("gaima_requests_coalesced_total", "Requests that waited on an identical one in flight", ("cache",))
+    flights = {"route": route_flight.stats(), "place": caches["place"]["coalescing"],
+               "lookahead": caches["lookahead"]["coalescing"]}
+    for name, stats in flights.items():
+        coalesced.inc(name, amount=stats["coalesced"])
+    
+    pending = Gauge("gaima_pool_pending_tasks", "Tasks queued or running per worker pool", ("pool",))
+    rejected = Counter("gaima_pool_rejected_total", "Tasks rejected because a pool was full", ("pool",))
+    pools = {**compute.stats(), "auth": auth_pool.stats(), "lookahead": lookahead_pool.stats()}
+    for name, stats in pools.items():
+        pending.set(stats["pending"], name)
+        rejected.inc(name, amount=stats["rejected"])
+    
+    audit = audit_log.stats()
+    audit_pending = Gauge("gaima_audit_pending_entries", "Audit entries waiting to be written")
+    audit_pending.set(audit["pending"])
+    audit_dropped = Counter("gaima_audit_dropped_total", "Audit entries that could not be persisted")
+    audit_dropped.inc(amount=audit["dropped"])
+    
+    hub = broadcast_hub.stats()
+    streams = Gauge("gaima_alert_streams", "Connected alert streams")
+    streams.set(hub["connections"])
+    frames = Counter("gaima_broadcast_frames_total", "Broadcast frames by outcome", ("outcome",))
+    frames.inc("delivered", amount=hub["delivered"])
+    frames.inc("dropped", amount=hub["dropped"])
+    
+    load = admission.stats()
+    loop_lag = Gauge("gaima_event_loop_lag_seconds", "How late the event loop runs a due task")
+    loop_lag.set(load["loop_lag_ms"] / 1000)
+    shed = Counter("gaima_requests_shed_total", "Requests refused by admission control", ("tier",))
+    for tier, count in load["shed"].items():
+        shed.inc(tier, amount=count)
+    tracked = Gauge("gaima_hazards_tracked", "Hazards waiting for their expiry time")
+    tracked.set(len(hazard_expiry))
+    fences = Gauge("gaima_geofences", "Registered geofence subscriptions")
+    fences.set(len(geofences))
+    collected = [
+        cache_lookups, cache_evictions, cache_size, coalesced, pending, rejected,
+        audit_pending, audit_dropped, streams, frames, loop_lag, shed, tracked, fences
+    ]
+    
+    if status_writer is not None:
+        writer = status_writer.stats()
+        buffered = Gauge("gaima_status_write_buffered", "Status checks waiting for the next batch")
+        buffered.set(writer["buffered"])
+        written = Counter("gaima_status_writes_total", "Status checks written behind by outcome", ("outcome",))
+        for outcome in ("written", "failed", "rejected"):
+            written.inc(outcome, amount=writer[outcome])
+        batches = Counter("gaima_status_write_batches_total", "insert_many batches written")
+        batches.inc(amount=writer["batches"])
+        collected += [buffered, written, batches]
+    return collected
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -799,6 +1654,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
 # Configure logging
@@ -810,4 +1666,10 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await admission.monitor.stop()
+    if status_writer is not None:
+        await status_writer.close()
+    client.close()
+    compute.shutdown()
+    auth_pool.shutdown()
+    lookahead_pool.shutdown()
\ No newline at end of file
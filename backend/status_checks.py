@@ -0,0 +1,256 @@
+"""Status check documents in MongoDB: keyset pages, NDJSON streams and batched writes.
+
+Reads never materialize the collection. A page is one range scan of the
+(timestamp, id) index limited to the page size, and a stream writes
+documents out as the driver's cursor yields them, a batch at a time, so
+memory stays constant however large the collection grows. Documents go
+straight from the driver to JSON without building a model for each one.
+
+Writes can go through a write-behind buffer that turns many concurrent
+inserts into one insert_many round trip.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from keyset import NEWEST_FIRST, decode_cursor, encode_cursor, older_than
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELDS = ("id", "client_name", "timestamp")
+STATUS_PAGE_SIZE = 100
+MAX_STATUS_PAGE_SIZE = 1000
+# Documents fetched per round trip, and written per response chunk, when streaming
+STATUS_STREAM_BATCH = 1000
+
+# Write-behind defaults: flush at this many documents or this long after the first
+STATUS_WRITE_BATCH = 500
+STATUS_WRITE_DELAY = 0.01
+# Documents buffered or being written before inserts wait for room
+STATUS_WRITE_MAX_PENDING = 5000
+# How long an insert waits for room before giving up
+STATUS_WRITE_WAIT = 1.0
+
+
+class WriteBufferFull(Exception):
+    """Raised when an insert waited too long for room in the write-behind buffer"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=_json_default, separators=(",", ":"))
+
+
+def projection(fields: Optional[Sequence[str]]) -> Dict[str, int]:
+    """MongoDB projection for the requested fields (all by default); ValueError if unknown"""
+    fields = STATUS_FIELDS if fields is None else fields
+    unknown = [field for field in fields if field not in STATUS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+class StatusCheckStore:
+    """Read side of the status_checks collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.collection.create_index(NEWEST_FIRST)
+        except Exception:
+            logger.exception("Could not create status check indexes")
+
+    async def page(self, limit: int = STATUS_PAGE_SIZE, cursor: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Up to limit documents older than the cursor, and the cursor for the next page"""
+        before = decode_cursor(cursor) if cursor else None
+        wanted = projection(fields)
+        # The next cursor needs the key fields even when they were not asked for
+        query = self.collection.find(
+            older_than(before), {**wanted, "timestamp": 1, "id": 1}
+        ).sort(NEWEST_FIRST).limit(limit)
+        documents = await query.to_list(limit)
+        next_cursor = encode_cursor(documents[-1]) if len(documents) == limit else None
+        extra = {"timestamp", "id"} - wanted.keys()
+        if extra:
+            for document in documents:
+                for field in extra:
+                    del document[field]
+        return documents, next_cursor
+
+    def stream(self, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None,
+               limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """NDJSON body of every document older than the cursor, up to limit if given.
+
+        Arguments are checked here, before the response starts, so bad ones
+        raise ValueError instead of cutting a stream short.
+        """
+        before = decode_cursor(cursor) if cursor else None
+        query = self.collection.find(older_than(before), projection(fields))
+        query = query.sort(NEWEST_FIRST).batch_size(STATUS_STREAM_BATCH)
+        if limit is not None:
+            query = query.limit(limit)
+        return self._lines(query)
+
+    async def _lines(self, query) -> AsyncIterator[bytes]:
+        lines = []
+        async for document in query:
+            lines.append(dumps(document))
+            if len(lines) == STATUS_STREAM_BATCH:
+                yield ("\n".join(lines) + "\n").encode()
+                lines.clear()
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+
+class WriteBehindBuffer:
+    """Collects inserts and writes them with insert_many(ordered=False).
+
+    A batch is flushed when it reaches batch_size documents or max_delay
+    seconds after its first document arrived, whichever comes first. Each
+    insert waits for its own batch to be acknowledged by MongoDB and fails
+    with that document's error if it was not written, so a successful
+    return still means the document is stored. At most max_pending
+    documents are buffered or in flight; further inserts wait for room and
+    raise WriteBufferFull after wait_timeout seconds.
+    """
+
+    def __init__(self, collection, batch_size: int = STATUS_WRITE_BATCH, max_delay: float = STATUS_WRITE_DELAY,
+                 max_pending: int = STATUS_WRITE_MAX_PENDING, wait_timeout: float = STATUS_WRITE_WAIT):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.wait_timeout = wait_timeout
+        self._buffer: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._room = asyncio.Semaphore(max_pending)
+        self._waiting = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Inserts accepted but still waiting for room; close() writes them too
+        self._entering = 0
+        self.max_pending = max_pending
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, collection) -> Optional["WriteBehindBuffer"]:
+        """Buffer configured by STATUS_WRITE_* variables, or None unless STATUS_WRITE_BEHIND is set"""
+        if os.environ.get("STATUS_WRITE_BEHIND", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            collection,
+            batch_size=int(os.environ.get("STATUS_WRITE_BATCH", STATUS_WRITE_BATCH)),
+            max_delay=float(os.environ.get("STATUS_WRITE_DELAY", STATUS_WRITE_DELAY)),
+            max_pending=int(os.environ.get("STATUS_WRITE_MAX_PENDING", STATUS_WRITE_MAX_PENDING)),
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def insert(self, document: Dict[str, Any]) -> None:
+        """Buffer a document and return once MongoDB has acknowledged it"""
+        if self._closing:
+            raise RuntimeError("Write-behind buffer is closed")
+        if self._room.locked():
+            self._entering += 1
+            try:
+                await asyncio.wait_for(self._room.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise WriteBufferFull(f"{self.max_pending} status checks already pending")
+            finally:
+                self._entering -= 1
+                # Lets a closing writer re-check whether anything is still on its way
+                self._waiting.set()
+        else:
+            await self._room.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((document, future))
+        self._waiting.set()
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+        # A caller that goes away does not take its document out of the batch
+        await asyncio.shield(future)
+
+    async def _run(self) -> None:
+        while True:
+            await self._waiting.wait()
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+            if self._closing and not self._buffer and not self._entering:
+                return
+
+    async def _flush(self) -> None:
+        batch = self._buffer[:self.batch_size]
+        del self._buffer[:self.batch_size]
+        if len(self._buffer) < self.batch_size:
+            self._full.clear()
+        if not self._buffer:
+            self._waiting.clear()
+        if not batch:
+            return
+
+        errors: Dict[int, Exception] = {}
+        try:
+            await self.collection.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as exc:
+            # ordered=False writes everything it can; only the listed documents failed
+            for error in exc.details.get("writeErrors", []):
+                errors[error["index"]] = BulkWriteError({"writeErrors": [error]})
+            if exc.details.get("writeConcernErrors"):
+                errors = dict.fromkeys(range(len(batch)), exc)
+        except Exception as exc:
+            logger.exception("Status check batch of %d failed", len(batch))
+            errors = dict.fromkeys(range(len(batch)), exc)
+        finally:
+            for _ in batch:
+                self._room.release()
+
+        self.batches += 1
+        self.failed += len(errors)
+        self.written += len(batch) - len(errors)
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """Stop taking inserts and write everything already buffered"""
+        self._closing = True
+        self._waiting.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "max_pending": self.max_pending,
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,146 @@
+"""Executor layer for CPU-bound work that must not run on the event loop.
+
+NumPy work goes to a thread pool (NumPy releases the GIL for array maths);
+pure-Python graph search goes to a process pool. Both are fronted by a bound
+on pending tasks so that a burst of heavy requests is rejected early instead
+of queueing without limit, and each task has a timeout.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ComputeOverloaded(Exception):
+    """Raised when a pool already has its maximum number of pending tasks"""
+
+
+class ComputeTimeout(Exception):
+    """Raised when a task does not finish within its timeout"""
+
+
+class _BoundedPool:
+    def __init__(self, name: str, factory: Callable[[], Any], max_pending: int, timeout: float):
+        self.name = name
+        self._factory = factory
+        self._executor = None
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def executor(self):
+        # Created on first use so importing the app never spawns workers
+        if self._executor is None:
+            self._executor = self._factory()
+        return self._executor
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ComputeOverloaded(f"{self.name} pool has {self.pending} pending tasks")
+        self.pending += 1
+        try:
+            try:
+                # Submitting to a pool that is already broken raises here, not from the future
+                future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+                result = await asyncio.wait_for(future, timeout or self.timeout)
+            except asyncio.TimeoutError:
+                # The worker keeps running to completion; only the caller gives up
+                self.timed_out += 1
+                raise ComputeTimeout(f"{self.name} task exceeded {timeout or self.timeout}s")
+            except BrokenExecutor:
+                # A crashed worker poisons the whole pool; start a fresh one next time
+                logger.exception("%s pool broke, recreating", self.name)
+                self._executor = None
+                raise
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class BoundedThreadPool(_BoundedPool):
+    """A standalone bounded thread pool, for work that must not queue behind map compute"""
+
+    def __init__(self, name: str, workers: int, max_pending: int, timeout: float):
+        super().__init__(
+            name,
+            lambda: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name),
+            max_pending, timeout
+        )
+
+
+class ComputePool:
+    """Thread pool for NumPy work and process pool for pure-Python work"""
+
+    def __init__(
+        self,
+        thread_workers: int = 4,
+        process_workers: int = 2,
+        max_pending: int = 64,
+        timeout: float = 10.0,
+        process_initializer: Optional[Callable] = None,
+        process_initargs: Tuple = (),
+    ):
+        self.threads = _BoundedPool(
+            "thread",
+            lambda: ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="compute"),
+            max_pending, timeout
+        )
+        self.processes = _BoundedPool(
+            "process",
+            lambda: ProcessPoolExecutor(
+                max_workers=process_workers,
+                # spawn rather than fork: the parent has database and executor threads
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=process_initializer,
+                initargs=process_initargs,
+            ),
+            max_pending, timeout
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ComputePool":
+        """Build a pool sized by COMPUTE_* environment variables"""
+        return cls(
+            thread_workers=int(os.environ.get("COMPUTE_THREAD_WORKERS", 4)),
+            process_workers=int(os.environ.get("COMPUTE_PROCESS_WORKERS", 2)),
+            max_pending=int(os.environ.get("COMPUTE_MAX_PENDING", 64)),
+            timeout=float(os.environ.get("COMPUTE_TASK_TIMEOUT", 10)),
+            **kwargs
+        )
+
+    async def run_in_thread(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        return await self.threads.run(fn, *args, timeout=timeout)
+
+    async def run_in_process(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        return await self.processes.run(fn, *args, timeout=timeout)
+
+    def shutdown(self):
+        self.threads.shutdown()
+        self.processes.shutdown()
+
+    def stats(self):
+        return {"thread": self.threads.stats(), "process": self.processes.stats()}
@@ -448,7 +448,9 @@ class TestGAIMABackend(unittest.TestCase):
         # Validate data
         self.assertTrue(isinstance(data["logs"], list))
         self.assertGreater(len(data["logs"]), 0)
-        self.assertEqual(data["total_logs"], len(data["logs"]))
+        # A page of the log; total_logs estimates the whole log
+        self.assertEqual(data["count"], len(data["logs"]))
+        self.assertGreaterEqual(data["total_logs"], len(data["logs"]))
         
         # Validate log structure
         for log in data["logs"]:
@@ -499,7 +501,9 @@ class TestGAIMABackend(unittest.TestCase):
         self.assertTrue(data["success"])
         self.assertTrue(len(data["alert_id"]) > 0)
         self.assertTrue(len(data["message"]) > 0)
-        self.assertGreater(data["estimated_recipients"], 0)
+        self.assertIn("recipients", data)
+        # Connected alert streams, so 0 when no client is listening
+        self.assertEqual(data["estimated_recipients"], data["recipients"])
         
         print(f"✅ Admin broadcast endpoint working")
         print(f"   - Alert ID: {data['alert_id']}")
@@ -0,0 +1,7 @@
+"""Summary statistics shared by the benchmark scripts."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of samples, pct from 0 to 100"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Load test for admission control: lookahead latency under a request flood.
+
+Drivers poll /api/alerts/lookahead as in the load suite while a flood of
+clients hammers lower- and medium-priority layers and the admin overview
+back to back. The drivers are measured three times: alone, under the flood
+with admission control off, and under the flood with it on. With it on the
+flood is shed, lower layers first, no lookahead request is refused, and
+lookahead p99 stays within --max-p99 while without it the loop saturates.
+
+The flood clients run in the same event loop as the app, so part of the
+lookahead latency left under flood is the load generator's own work; the
+unloaded p99 is printed for comparison rather than used as the limit. Flood
+clients honour Retry-After, scaled by --retry-scale so a run stays short,
+as real clients backing off would.
+
+    python benchmarks/admission_bench.py [--drivers 200] [--flood 300] [--duration 10]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from _stats import percentile
+from api_load_suite import ADMIN_CREDENTIALS, Outcome, driver_setup, lookahead
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+FLOOD_TARGETS = [
+    # (share of flood requests, path)
+    (0.3, "/api/layers/travel-centers"),
+    (0.2, "/api/layers/special-events"),
+    (0.2, "/api/layers/cameras"),
+    (0.1, "/api/layers/ev-stations"),
+    (0.2, "/api/admin/overview?sections=dashboard,users,content,alerts"),
+]
+
+
+async def drive(client, drivers, poll_interval, deadline, seed):
+    latencies, totals = [], Outcome()
+
+    async def driver(index):
+        state = driver_setup(random.Random(seed * 10_000 + index))
+        await asyncio.sleep(state["rng"].uniform(0, poll_interval))
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            await lookahead(client, state, totals)
+            latencies.append(time.perf_counter() - began)
+            await asyncio.sleep(poll_interval)
+
+    await asyncio.gather(*(driver(i) for i in range(drivers)))
+    return latencies, totals
+
+
+async def flood(client, clients, token, retry_scale, deadline, seed):
+    paths = [path for _, path in FLOOD_TARGETS]
+    weights = [share for share, _ in FLOOD_TARGETS]
+    headers = {"Authorization": f"Bearer {token}"}
+    by_path = {path: Outcome() for path in paths}
+
+    async def flooder(index):
+        rng = random.Random(seed * 10_000 + index)
+        # The flood ramps up over the first second rather than landing at once
+        await asyncio.sleep(rng.uniform(0, 1))
+        while time.perf_counter() < deadline:
+            path = rng.choices(paths, weights)[0]
+            response = by_path[path].check(await client.get(path, headers=headers))
+            if response.status_code == 503:
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)) * retry_scale)
+
+    await asyncio.gather(*(flooder(i) for i in range(clients)))
+    return by_path
+
+
+async def phase(client, args, label, flood_clients, token, seed):
+    deadline = time.perf_counter() + args.duration
+    tasks = [drive(client, args.drivers, args.poll_interval, deadline, seed)]
+    if flood_clients:
+        tasks.append(flood(client, flood_clients, token, args.retry_scale, deadline, seed))
+    results = await asyncio.gather(*tasks)
+    latencies, totals = results[0]
+    ms = 1000
+    p99 = percentile(latencies, 99) * ms
+    print(f"{label:>18}: lookahead p50 {percentile(latencies, 50) * ms:7.2f}  p99 {p99:7.2f} ms  "
+          f"{totals.requests} polls  errors {totals.errors}  shed {totals.shed}")
+    if flood_clients:
+        for path, outcome in results[1].items():
+            served = outcome.requests - outcome.shed
+            print(f"{'':>18}  {path.split('?')[0]:<28} {outcome.requests:7} requests  "
+                  f"{served:7} served  {outcome.shed:7} shed")
+    return p99, totals
+
+
+async def run(args):
+    import server
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    transport = httpx.ASGITransport(app=server.app)
+    limits = httpx.Limits(max_connections=None)
+    # ASGITransport sends no lifespan events, so the lag monitor is started here
+    server.admission.monitor.start()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://gaima", timeout=60, limits=limits) as client:
+            response = await client.post("/api/admin/login", json=ADMIN_CREDENTIALS)
+            response.raise_for_status()
+            token = response.json()["access_token"]
+            await phase(client, argparse.Namespace(**{**vars(args), "duration": 1}), "warm-up", 0, token, 0)
+
+            baseline, _ = await phase(client, args, "no flood", 0, token, 1)
+            server.admission.enabled = False
+            unprotected, _ = await phase(client, args, "flood, admission off", args.flood, token, 2)
+            server.admission.enabled = True
+            protected, totals = await phase(client, args, "flood, admission on", args.flood, token, 3)
+            stats = server.admission.stats()
+            print(f"admission shed by tier: {stats['shed']}")
+    finally:
+        await server.admission.monitor.stop()
+        server.compute.shutdown()
+        server.auth_pool.shutdown()
+
+    failures = []
+    # Admission never refuses lookahead; the worker pool still may if its queue fills
+    if totals.errors or totals.shed > totals.requests * 0.01:
+        failures.append(f"{totals.shed} lookahead requests refused, {totals.errors} failed")
+    if not stats["shed"]["lower"]:
+        failures.append("no lower-priority requests were shed")
+    if protected > args.max_p99:
+        failures.append(f"lookahead p99 {protected:.2f} ms under flood exceeds {args.max_p99:.2f} ms")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        return 1
+    print(f"ok: lookahead p99 {protected:.2f} ms under flood, {baseline:.2f} ms unloaded, "
+          f"{unprotected:.2f} ms without admission control")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drivers", type=int, default=200)
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between a driver's polls")
+    parser.add_argument("--flood", type=int, default=300, help="clients flooding lower-priority endpoints")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--retry-scale", type=float, default=0.1, help="fraction of Retry-After flood clients wait")
+    parser.add_argument("--max-p99", type=float, default=250.0,
+                        help="fail when lookahead p99 under flood with admission control exceeds this many ms")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark nearest-amenity queries over a statewide set of EV chargers.
+
+Indexes synthetic chargers (5,000 by default) and times k-NN queries around
+random points, ahead on random headings, and along real routes from the road
+network, each filtered to stations with free stalls.
+
+    python benchmarks/amenity_knn_bench.py [--stations 5000] [--queries 500]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from amenities import AmenityIndex, amenity_filter  # noqa: E402
+from routing import ILLINOIS_HIGHWAYS, ILLINOIS_JUNCTIONS, RoadNetwork  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+
+def synthesize(count, rng):
+    return [
+        {
+            "id": str(i),
+            "location": {"latitude": rng.uniform(37.0, 42.5), "longitude": rng.uniform(-91.5, -87.5)},
+            "total_stations": 4,
+            "available_stations": rng.randint(0, 4),
+            "connector_types": rng.sample(["CCS", "CHAdeMO", "Tesla", "J1772"], 2),
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--max-p99-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    index = AmenityIndex()
+    build_ms, _ = timed(index.set_layer, "ev_stations", synthesize(args.stations, rng))
+    print(f"indexed {args.stations:,} stations in {build_ms:.1f} ms")
+
+    free = amenity_filter(min_available=1)
+    network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+    junctions = list(ILLINOIS_JUNCTIONS.values())
+    routes = [
+        network.route(*rng.choice(junctions), *rng.choice(junctions)).polyline
+        for _ in range(50)
+    ]
+
+    worst = 0.0
+    for label, query in (
+        ("point", lambda: index.nearest(
+            "ev_stations", rng.uniform(37.5, 42.0), rng.uniform(-91.0, -88.0), 3, 5.0, free)),
+        ("heading", lambda: index.nearest(
+            "ev_stations", rng.uniform(37.5, 42.0), rng.uniform(-91.0, -88.0), 3, 25.0, free,
+            heading=rng.uniform(0, 360))),
+        ("route", lambda: index.along_route("ev_stations", rng.choice(routes), 3, 5.0, free)),
+    ):
+        latencies = [timed(query)[0] for _ in range(args.queries)]
+        p99 = percentile(latencies, 99)
+        worst = max(worst, p99)
+        print(f"{label:>8}: p50 {statistics.median(latencies):6.3f} ms  p99 {p99:6.3f} ms  "
+              f"max {max(latencies):6.3f} ms")
+
+    if worst > args.max_p99_ms:
+        print(f"FAIL: p99 above {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
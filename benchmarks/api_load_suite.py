@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""Load-test suite for the API: latency, throughput and memory per scenario.
+
+Drives the FastAPI app in-process through an ASGI transport by default, or
+over HTTP against a local uvicorn it starts (--uvicorn) or any running
+server (--url). Each scenario runs its virtual clients for a fixed time:
+
+    map_cold_load   a map opening: all 15 layers fetched at once
+    map_stream      a map opening from the NDJSON layer stream
+    lookahead       drivers polling /api/alerts/lookahead as they move
+    route_search    routes between random Illinois towns
+    place_search    autocomplete-style place queries, some near the caller
+    admin_polling   the admin dashboard refreshing /api/admin/overview
+
+Results (p50/p95/p99/max latency, throughput, errors, memory) are printed
+and can be saved as JSON. Given a baseline file from an earlier run, the
+suite exits non-zero when a scenario's p99 or throughput regresses past
+the tolerance, or when a --max-p99 threshold is exceeded.
+
+    python benchmarks/api_load_suite.py [--scenarios lookahead,place_search] [--duration 10]
+        [--clients 20] [--drivers 200] [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+from places import load_gazetteer  # noqa: E402
+from routing import ILLINOIS_JUNCTIONS  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+LAYER_PATHS = [
+    "traffic", "construction", "closures", "incidents", "weather", "winter", "restrictions", "cameras",
+    "rest-areas", "ev-stations", "toll-info", "special-events", "maintenance", "emergency-services",
+    "travel-centers",
+]
+TOWNS = list(ILLINOIS_JUNCTIONS.values())
+PLACE_NAMES = list(ILLINOIS_JUNCTIONS) + [
+    row["name"] for row in load_gazetteer(str(BACKEND_DIR / "data" / "illinois_places.csv"))
+]
+ADMIN_CREDENTIALS = {"username": "idot_admin", "password": "password123"}
+# Responses that are a valid outcome for the request rather than a failure
+EXPECTED = {200, 304, 404}
+MILES_PER_DEGREE = 69.05
+
+
+class Outcome:
+    """Requests made by one scenario iteration and how they ended"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.shed = 0
+
+    def check(self, response):
+        self.requests += 1
+        if response.status_code == 503:
+            self.shed += 1
+        elif response.status_code not in EXPECTED:
+            self.errors += 1
+        return response
+
+
+# Scenario steps: one timed iteration of a virtual client, given its own state
+
+async def map_cold_load(client, state, outcome):
+    responses = await asyncio.gather(*(client.get(f"/api/layers/{path}") for path in LAYER_PATHS))
+    for response in responses:
+        outcome.check(response)
+
+
+async def map_stream(client, state, outcome):
+    async with client.stream("GET", "/api/layers/stream") as response:
+        async for _ in response.aiter_lines():
+            pass
+    outcome.check(response)
+
+
+def driver_setup(rng):
+    latitude, longitude = rng.choice(TOWNS)
+    return {"rng": rng, "latitude": latitude, "longitude": longitude, "heading": rng.uniform(0, 360),
+            "speed": rng.uniform(25, 75)}
+
+
+async def lookahead(client, state, outcome):
+    # About a mile between polls, drifting heading
+    rng = state["rng"]
+    state["heading"] = (state["heading"] + rng.uniform(-15, 15)) % 360
+    step = 1.0 / MILES_PER_DEGREE
+    state["latitude"] += step * math.cos(math.radians(state["heading"]))
+    state["longitude"] += step * math.sin(math.radians(state["heading"])) / math.cos(math.radians(state["latitude"]))
+    outcome.check(await client.post("/api/alerts/lookahead", json={
+        "latitude": state["latitude"], "longitude": state["longitude"], "heading": state["heading"],
+        "speed": state["speed"]
+    }))
+
+
+async def route_search(client, state, outcome):
+    (start_lat, start_lng), (end_lat, end_lng) = state["rng"].sample(TOWNS, 2)
+    outcome.check(await client.post("/api/search/route", json={
+        "start_latitude": start_lat, "start_longitude": start_lng,
+        "end_latitude": end_lat, "end_longitude": end_lng, "format": "encoded"
+    }))
+
+
+async def place_search(client, state, outcome):
+    rng = state["rng"]
+    name = rng.choice(PLACE_NAMES)
+    body = {"query": name[:rng.randint(2, max(2, len(name)))], "limit": 10, "fuzzy": rng.random() < 0.2}
+    if rng.random() < 0.5:
+        body["latitude"], body["longitude"] = rng.choice(TOWNS)
+    outcome.check(await client.post("/api/search/place", json=body))
+
+
+async def admin_polling(client, state, outcome):
+    headers = {"Authorization": f"Bearer {state['token']}"}
+    if state["etags"]:
+        headers["If-None-Match"] = ", ".join(state["etags"].values())
+    response = outcome.check(await client.get(
+        "/api/admin/overview", params={"sections": state["sections"]}, headers=headers
+    ))
+    if response.status_code == 200:
+        state["etags"] = response.json()["etags"]
+
+
+SCENARIOS = {
+    "map_cold_load": map_cold_load,
+    "map_stream": map_stream,
+    "lookahead": lookahead,
+    "route_search": route_search,
+    "place_search": place_search,
+    "admin_polling": admin_polling,
+}
+
+
+async def run_scenario(client, name, clients, duration, think, args, seed):
+    step = SCENARIOS[name]
+    latencies, totals = [], Outcome()
+    token = None
+    if name == "admin_polling":
+        response = await client.post("/api/admin/login", json=ADMIN_CREDENTIALS)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    async def virtual_client(index):
+        rng = random.Random(seed * 10_000 + index)
+        state = driver_setup(rng) if name == "lookahead" else {"rng": rng}
+        if token:
+            state.update(token=token, etags={}, sections=args.admin_sections)
+        # Spread the first requests out instead of starting in lockstep
+        await asyncio.sleep(rng.uniform(0, think))
+        deadline = started + duration
+        while time.perf_counter() < deadline:
+            outcome = Outcome()
+            began = time.perf_counter()
+            try:
+                await step(client, state, outcome)
+            except httpx.HTTPError:
+                outcome.requests += 1
+                outcome.errors += 1
+            latencies.append(time.perf_counter() - began)
+            totals.requests += outcome.requests
+            totals.errors += outcome.errors
+            totals.shed += outcome.shed
+            if think:
+                await asyncio.sleep(think)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    ms = 1000
+    return {
+        "clients": clients,
+        "iterations": len(latencies),
+        "requests": totals.requests,
+        "errors": totals.errors,
+        "shed": totals.shed,
+        "throughput_rps": round(totals.requests / elapsed, 1),
+        "iterations_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * ms, 3),
+            "p95": round(percentile(latencies, 95) * ms, 3),
+            "p99": round(percentile(latencies, 99) * ms, 3),
+            "max": round(max(latencies) * ms, 3),
+        } if latencies else None,
+    }
+
+
+def rss_mib(pid="self"):
+    """Resident memory of a process on Linux, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/statm") as handle:
+            return round(int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        return None
+
+
+def start_uvicorn(port):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30 s")
+
+
+async def run(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server_process = server_module = None
+    if args.url:
+        mode, client_args = "url", {"base_url": args.url}
+    elif args.uvicorn:
+        server_process = start_uvicorn(args.port)
+        mode, client_args = "uvicorn", {"base_url": f"http://127.0.0.1:{args.port}"}
+    else:
+        import server as server_module
+        mode = "asgi"
+        client_args = {"transport": httpx.ASGITransport(app=server_module.app), "base_url": "http://gaima"}
+
+    server_pid = server_process.pid if server_process else ("self" if server_module else None)
+    limits = httpx.Limits(max_connections=args.max_connections)
+    results = {}
+    memory = {"before_mib": rss_mib(server_pid) if server_pid else None}
+    try:
+        async with httpx.AsyncClient(timeout=60, limits=limits, **client_args) as client:
+            # Warm-up: worker pools, caches and imports are not part of the measurement
+            for name in args.scenarios:
+                await run_scenario(client, name, 1, 0.2, 0, args, seed=0)
+            for seed, name in enumerate(args.scenarios, 1):
+                clients = args.drivers if name == "lookahead" else args.clients
+                think = args.poll_interval if name == "lookahead" else args.think
+                results[name] = await run_scenario(client, name, clients, args.duration, think, args, seed)
+                results[name]["memory_mib"] = rss_mib(server_pid) if server_pid else None
+                print_result(name, results[name])
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait()
+        if server_module is not None:
+            server_module.compute.shutdown()
+            server_module.auth_pool.shutdown()
+
+    if server_module is not None:
+        # ru_maxrss is in KiB on Linux
+        memory["peak_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    memory["after_mib"] = results[args.scenarios[-1]]["memory_mib"] if results else None
+    return {
+        "meta": {
+            "mode": mode,
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "duration_s": args.duration,
+            "clients": args.clients,
+            "drivers": args.drivers,
+            "python": platform.python_version(),
+            "commit": git_commit(),
+        },
+        "memory": memory,
+        "scenarios": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BACKEND_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(name, result):
+    latency = result["latency_ms"] or {}
+    print(f"{name:>14}: {result['throughput_rps']:8.1f} req/s  "
+          f"p50 {latency.get('p50', 0):7.2f}  p95 {latency.get('p95', 0):7.2f}  p99 {latency.get('p99', 0):7.2f} ms  "
+          f"errors {result['errors']}  shed {result['shed']}  rss {result['memory_mib']} MiB")
+
+
+def compare(report, baseline, tolerance, max_p99):
+    """Regressions against a baseline report and absolute p99 limits"""
+    failures = []
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        if latency is None:
+            failures.append(f"{name}: no iterations completed")
+            continue
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} failed requests")
+        if name in max_p99 and latency["p99"] > max_p99[name]:
+            failures.append(f"{name}: p99 {latency['p99']:.2f} ms exceeds the {max_p99[name]:.2f} ms limit")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if not previous or not previous.get("latency_ms"):
+            continue
+        allowed = previous["latency_ms"]["p99"] * (1 + tolerance)
+        if latency["p99"] > allowed:
+            failures.append(f"{name}: p99 {latency['p99']:.2f} ms vs baseline {previous['latency_ms']['p99']:.2f} ms")
+        floor = previous["throughput_rps"] * (1 - tolerance)
+        if result["throughput_rps"] < floor:
+            failures.append(
+                f"{name}: {result['throughput_rps']:.1f} req/s vs baseline {previous['throughput_rps']:.1f} req/s"
+            )
+    return failures
+
+
+def parse_limits(values):
+    limits = {}
+    for value in values:
+        name, _, milliseconds = value.partition("=")
+        if name not in SCENARIOS or not milliseconds:
+            raise argparse.ArgumentTypeError(f"expected SCENARIO=MS, got {value!r}")
+        limits[name] = float(milliseconds)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--clients", type=int, default=20, help="virtual clients per scenario")
+    parser.add_argument("--think", type=float, default=0.0, help="pause between a client's iterations, seconds")
+    parser.add_argument("--drivers", type=int, default=200, help="drivers in the lookahead scenario")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between a driver's polls")
+    parser.add_argument("--admin-sections", default="dashboard,users,content,alerts",
+                        help="overview sections to poll; audit reads MongoDB")
+    parser.add_argument("--max-connections", type=int, default=200, help="HTTP connection pool size")
+    parser.add_argument("--uvicorn", action="store_true", help="start uvicorn locally and test over HTTP")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="test a running server instead, e.g. http://127.0.0.1:8001")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p99 increase and throughput drop against the baseline, as a fraction")
+    parser.add_argument("--max-p99", action="append", default=[], metavar="SCENARIO=MS",
+                        help="fail when a scenario's p99 exceeds this many milliseconds")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    max_p99 = parse_limits(args.max_p99)
+
+    report = asyncio.run(run(args))
+    print(f"memory: {report['memory']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"results written to {args.output}")
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    if baseline and baseline["meta"]["mode"] != report["meta"]["mode"]:
+        print(f"warning: baseline ran in {baseline['meta']['mode']} mode, this run in {report['meta']['mode']} mode")
+    failures = compare(report, baseline, args.tolerance, max_p99)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
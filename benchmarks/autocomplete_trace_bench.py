@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Replay an autocomplete keystroke trace against /api/search/place.
+
+Simulated users type popular queries (Zipf-distributed) one keystroke at a
+time, concurrently, through the FastAPI app in-process and over a
+statewide-scale gazetteer. The trace is replayed once with the result cache
+disabled and once with it enabled; the report shows per-keystroke latency,
+cache hit ratio and how many searches were coalesced.
+
+    python benchmarks/autocomplete_trace_bench.py [--users 100] [--places 100000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+from place_search_bench import TYPING_SEQUENCES, synthesize  # noqa: E402
+
+QUERIES = TYPING_SEQUENCES + ["shell", "mcdonalds", "walgreens", "hampton inn", "target", "casey's"]
+# A few shared locations so location-biased keystrokes can hit the cache too
+ORIGINS = [None, None, (41.8781, -87.6298), (39.7817, -89.6501), (40.6936, -89.5890)]
+
+
+def build_trace(users, seed):
+    """One (query, origin) per user, popular queries far more common"""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(QUERIES) + 1)]
+    return [(rng.choices(QUERIES, weights)[0], rng.choice(ORIGINS)) for _ in range(users)]
+
+
+async def type_query(client, query, origin, delay, rng, latencies):
+    await asyncio.sleep(rng.uniform(0, 0.5))
+    for end in range(1, len(query) + 1):
+        body = {"query": query[:end], "limit": 10}
+        if origin is not None:
+            body["latitude"], body["longitude"] = origin
+        started = time.perf_counter()
+        response = await client.post("/api/search/place", json=body)
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        await asyncio.sleep(delay)
+
+
+async def replay(client, trace, delay, seed):
+    rng = random.Random(seed)
+    latencies = []
+    await asyncio.gather(*(
+        type_query(client, query, origin, delay, rng, latencies) for query, origin in trace
+    ))
+    return latencies
+
+
+async def main(args):
+    import server
+    from cache import CoalescingCache
+    from places import PlaceIndex, load_gazetteer
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    records = load_gazetteer(server.GAZETTEER_PATH) + synthesize(args.places)
+    server.place_catalog.gazetteer = PlaceIndex(records)
+    trace = build_trace(args.users, args.seed)
+    keystrokes = sum(len(query) for query, _ in trace)
+    print(f"{len(trace)} users, {keystrokes} keystrokes over {len(server.place_catalog.gazetteer):,} places")
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gaima", timeout=60) as client:
+        results = {}
+        for label, cache_size in (("uncached", 0), ("cached", server.PLACE_CACHE_SIZE)):
+            server.place_cache = CoalescingCache(maxsize=cache_size)
+            started = time.perf_counter()
+            latencies = await replay(client, trace, args.delay, args.seed)
+            elapsed = time.perf_counter() - started
+            results[label] = latencies
+            cache = server.place_cache.stats()
+            flight = cache["coalescing"]
+            print(f"{label:>9}: p50 {statistics.median(latencies):6.2f} ms  "
+                  f"p99 {percentile(latencies, 99):6.2f} ms  {len(latencies) / elapsed:7.0f} req/s  "
+                  f"hit ratio {cache['hit_ratio']:.2f}  searches {flight['calls']}  "
+                  f"coalesced {flight['coalesced']}  evictions {cache['evictions']}")
+
+    server.compute.shutdown()
+    if percentile(results["cached"], 99) > percentile(results["uncached"], 99):
+        print("FAIL: caching did not improve p99")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--delay", type=float, default=0.15, help="seconds between keystrokes")
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark admin broadcast delivery to many connected alert streams.
+
+Opens 10,000 streams by default, each a consumer task draining its
+subscriber queue the way the Server-Sent Events response does, spread over
+Illinois. Each broadcast (statewide, then regional) reports how long it
+takes to queue the alert for every recipient, the delivery latency from
+sending to each stream receiving it, and the worst event-loop stall seen by
+an unrelated task ticking every millisecond meanwhile.
+
+    python benchmarks/broadcast_fanout_bench.py [--connections 10000] [--broadcasts 20]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from broadcast import BroadcastHub  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+
+async def consume(subscriber, sent_at, latencies):
+    while True:
+        alert_id, _ = await subscriber.next()
+        latencies.append(time.perf_counter() - sent_at[alert_id])
+
+
+async def ticker(stalls, stop):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.001)
+        last = now
+
+
+async def run(connections, broadcasts, region):
+    rng = random.Random(7)
+    hub = BroadcastHub()
+    sent_at = {}
+    latencies = []
+    consumers = [
+        asyncio.ensure_future(consume(
+            hub.subscribe(rng.uniform(37.0, 42.5), rng.uniform(-91.5, -87.5)), sent_at, latencies
+        ))
+        for _ in range(connections)
+    ]
+    await asyncio.sleep(0.1)
+
+    fanout, delivery, stalls_all, recipients = [], [], [], []
+    for i in range(broadcasts):
+        stalls, stop = [], asyncio.Event()
+        tick = asyncio.ensure_future(ticker(stalls, stop))
+        await asyncio.sleep(0.01)
+        latencies.clear()
+        alert_id = f"bench-{region is not None}-{i}"
+        sent_at[alert_id] = started = time.perf_counter()
+        record = await hub.broadcast({"id": alert_id, "title": "Benchmark", "message": "x" * 200}, region)
+        fanout.append(time.perf_counter() - started)
+        while len(latencies) < record["recipients"]:
+            await asyncio.sleep(0.001)
+        stop.set()
+        await tick
+        delivery.extend(latencies)
+        stalls_all.extend(stalls)
+        recipients.append(record["recipients"])
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    return fanout, delivery, stalls_all, recipients
+
+
+def report(label, fanout, delivery, stalls, recipients):
+    ms = 1000
+    print(f"{label}: {statistics.mean(recipients):,.0f} recipients per broadcast")
+    print(f"  queue all   p50 {percentile(fanout, 50) * ms:7.2f} ms   max {max(fanout) * ms:7.2f} ms")
+    print(f"  delivery    p50 {percentile(delivery, 50) * ms:7.2f} ms   p99 {percentile(delivery, 99) * ms:7.2f} ms"
+          f"   max {max(delivery) * ms:7.2f} ms")
+    print(f"  loop stall  p99 {percentile(stalls, 99) * ms:7.2f} ms   max {max(stalls) * ms:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.connections:,} connected streams, {args.broadcasts} broadcasts each")
+    report("statewide", *asyncio.run(run(args.connections, args.broadcasts, None)))
+    # 50 miles around Springfield
+    report("regional", *asyncio.run(run(args.connections, args.broadcasts, (39.78, -89.65, 50.0))))
+
+
+if __name__ == "__main__":
+    main()
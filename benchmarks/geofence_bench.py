@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark matching changed hazards against 100k geofence subscriptions.
+
+Registers synthetic subscriptions (100,000 by default): half are areas a
+few miles across around random points in Illinois, half are commute
+corridors half a mile either side of 10 to 40 mile stretches of routes from
+the road network, so that many of them share a highway. Then
+times matching batches of new incidents, as a layer refresh does, through
+the grid index, and matching single points by checking every subscription,
+which is what the index replaces. Both must find the same geofences.
+
+    python benchmarks/geofence_bench.py [--subscriptions 100000] [--batch 50] [--batches 200]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from geofence import GeofenceIndex  # noqa: E402
+from routing import ILLINOIS_HIGHWAYS, ILLINOIS_JUNCTIONS, RoadNetwork  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+
+def random_location(rng):
+    return rng.uniform(37.0, 42.5), rng.uniform(-91.5, -87.5)
+
+
+def subscribe(index, count, rng):
+    network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+    junctions = list(ILLINOIS_JUNCTIONS.values())
+    routes = []
+    while len(routes) < 500:
+        route = network.route(*rng.choice(junctions), *rng.choice(junctions))
+        if route is not None and len(route.polyline) > 20:
+            routes.append(route.polyline)
+    for i in range(count):
+        if i % 2:
+            route = rng.choice(routes)
+            start = rng.randrange(len(route) - 5)
+            index.add_corridor(f"commute {i}", route[start:start + rng.randint(5, 20)], 0.5)
+        else:
+            lat, lng = random_location(rng)
+            half = rng.uniform(0.01, 0.05)
+            index.add_polygon(f"area {i}", [
+                (lat - half, lng - half), (lat + half, lng - half), (lat + half, lng + half), (lat - half, lng + half),
+            ])
+
+
+def incidents(count, rng):
+    points = []
+    for _ in range(count):
+        lat, lng = random_location(rng)
+        points.append({"id": str(rng.random()), "location": {"latitude": lat, "longitude": lng}})
+    return points
+
+
+def brute_force(index, latitude, longitude):
+    return {
+        geofence.id for geofence in index.fences.values()
+        if geofence.contains(latitude, longitude, range(len(geofence.points) - 1))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscriptions", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=50, help="changed points per layer refresh")
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--brute-points", type=int, default=20, help="points checked against every subscription")
+    parser.add_argument("--max-p99-ms", type=float, default=50.0, help="per refresh batch")
+    args = parser.parse_args()
+
+    rng = random.Random(49)
+    index = GeofenceIndex(max_total=args.subscriptions)
+    started = time.perf_counter()
+    subscribe(index, args.subscriptions, rng)
+    build = time.perf_counter() - started
+    print(f"registered {args.subscriptions:,} geofences in {build:.1f} s, {len(index.cells):,} cells")
+
+    batches = []
+    for _ in range(args.batches):
+        points = incidents(args.batch, rng)
+        started = time.perf_counter()
+        index.match("incidents", points)
+        batches.append((time.perf_counter() - started) * 1000)
+    per_point = [ms / args.batch for ms in batches]
+    print(f"   index: batch of {args.batch} p50 {statistics.median(batches):7.3f} ms  "
+          f"p99 {percentile(batches, 99):7.3f} ms   per point p50 {statistics.median(per_point) * 1000:7.1f} us  "
+          f"({index.deliveries / index.points_matched:.1f} geofences per point)")
+
+    brute, mismatched = [], 0
+    for point in incidents(args.brute_points, rng):
+        location = point["location"]
+        started = time.perf_counter()
+        expected = brute_force(index, location["latitude"], location["longitude"])
+        brute.append((time.perf_counter() - started) * 1000)
+        found = {geofence.id for geofence in index.lookup(location["latitude"], location["longitude"])}
+        mismatched += found != expected
+    print(f"   brute: per point p50 {statistics.median(brute):7.1f} ms  "
+          f"({statistics.median(brute) / statistics.median(per_point):,.0f}x the index)")
+
+    if mismatched:
+        print(f"FAIL: the index disagrees with brute force on {mismatched} points")
+        return 1
+    if percentile(batches, 99) > args.max_p99_ms:
+        print(f"FAIL: batch p99 above {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
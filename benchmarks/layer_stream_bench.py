@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark a cold map load: 15 layer requests vs the NDJSON layer stream.
+
+Simulates map openings, --clients at a time, loading every layer either
+the way the client used to (one request per layer, rendered once all have
+arrived, as Promise.all does) or from GET /api/layers/stream, which sends
+layers high priority first and is rendered line by line. Each simulated
+browser keeps at most six connections to the server, as browsers do over
+HTTP/1.1.
+
+Reports time to first hazard (traffic, closures and incidents all
+renderable) and time until every layer is in, p50/p95/p99 over all loads,
+and how many layer requests admission control shed (503) along the way.
+Runs over HTTP against a uvicorn it starts, since an in-process transport
+would hand the streamed body over in one piece, or against --url.
+
+    python benchmarks/layer_stream_bench.py [--clients 20] [--loads 500] [--url http://127.0.0.1:8001]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from _stats import percentile
+from api_load_suite import LAYER_PATHS, start_uvicorn
+
+# What the driver most needs on a cold load
+FIRST_HAZARD_LAYERS = {"traffic", "closures", "incidents"}
+# Connections a browser opens to one HTTP/1.1 origin
+BROWSER_LIMITS = httpx.Limits(max_connections=6)
+
+
+async def per_layer_load(client):
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(f"/api/layers/{path}") for path in LAYER_PATHS))
+    shed = 0
+    for response in responses:
+        if response.status_code == 503:
+            shed += 1
+        else:
+            response.raise_for_status()
+    # Nothing is rendered until every request is back
+    done = time.perf_counter() - started
+    return done, done, shed
+
+
+async def streamed_load(client):
+    started = time.perf_counter()
+    waiting = set(FIRST_HAZARD_LAYERS)
+    first_hazard = None
+    layers = 0
+    async with client.stream("GET", "/api/layers/stream") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            layers += 1
+            waiting.discard(json.loads(line)["layer"])
+            if not waiting and first_hazard is None:
+                first_hazard = time.perf_counter() - started
+    if layers != len(LAYER_PATHS):
+        raise RuntimeError(f"stream ended after {layers} layers")
+    return first_hazard, time.perf_counter() - started, 0
+
+
+async def measure(base_url, load, clients, loads):
+    first_hazard, complete = [], []
+    remaining, shed = loads, 0
+
+    async def user():
+        nonlocal remaining, shed
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=BROWSER_LIMITS) as client:
+            while remaining > 0:
+                remaining -= 1
+                hazard, done, refused = await load(client)
+                first_hazard.append(hazard)
+                complete.append(done)
+                shed += refused
+
+    await asyncio.gather(*(user() for _ in range(clients)))
+    return first_hazard, complete, shed
+
+
+def report(label, first_hazard, complete, shed):
+    ms = 1000
+    print(f"{label:>10}: first hazard p50 {percentile(first_hazard, 50) * ms:7.2f}  "
+          f"p95 {percentile(first_hazard, 95) * ms:7.2f}  p99 {percentile(first_hazard, 99) * ms:7.2f} ms   "
+          f"all layers p50 {percentile(complete, 50) * ms:7.2f}  p99 {percentile(complete, 99) * ms:7.2f} ms   "
+          f"{shed} layers shed")
+
+
+async def run(args, base_url):
+    for load in (per_layer_load, streamed_load):
+        await measure(base_url, load, args.clients, args.clients)  # warm-up
+    results = {}
+    for label, load in (("per-layer", per_layer_load), ("stream", streamed_load)):
+        results[label] = await measure(base_url, load, args.clients, args.loads)
+        report(label, *results[label])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20, help="map loads in progress at once")
+    parser.add_argument("--loads", type=int, default=500, help="map loads per variant")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--url", help="test a running server instead, e.g. http://127.0.0.1:8001")
+    args = parser.parse_args()
+
+    server = None
+    if not args.url:
+        server = start_uvicorn(args.port)
+    try:
+        results = asyncio.run(run(args, args.url or f"http://127.0.0.1:{args.port}"))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    streamed = percentile(results["stream"][0], 50)
+    per_layer = percentile(results["per-layer"][0], 50)
+    if streamed > per_layer:
+        print(f"FAIL: the stream shows the first hazard later (p50 {streamed * 1000:.2f} ms "
+              f"vs {per_layer * 1000:.2f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Load test: map layer latency while heavy route/matrix queries run.
+
+Drives the FastAPI app in-process and measures /api/layers/* latency first on
+an idle server and then while a stream of heavy matrix and route requests is in
+flight. The goal is for layer p99 to stay flat: the test fails when p99
+under load exceeds --max-ratio (1.5) times the idle p99 or the idle p99 plus
+--slack-ms (1 ms), whichever is larger.
+
+The goal is not met yet, and the test fails. Offloading keeps the searches
+themselves off the event loop, but the loop still parses, validates and
+serializes the heavy requests. Over eight local runs p99 went from about
+1.7-2.1 ms idle to 5-6 ms under load (about 3x), once to 9 ms, with p50
+unchanged at about 1 ms.
+
+    python benchmarks/offload_load_test.py [--requests 300] [--heavy-clients 4]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import httpx  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+LAYER_PATHS = ["traffic", "closures", "incidents", "construction", "weather", "cameras"]
+
+
+def random_point(rng):
+    return {"latitude": rng.uniform(37.5, 42.4), "longitude": rng.uniform(-91.0, -87.6)}
+
+
+async def measure_layers(client, count):
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        response = await client.get(f"/api/layers/{LAYER_PATHS[i % len(LAYER_PATHS)]}")
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+async def heavy_client(client, stop, seed, matrix_size):
+    rng = random.Random(seed)
+    completed = 0
+    while not stop.is_set():
+        if rng.random() < 0.5:
+            points = [random_point(rng) for _ in range(matrix_size)]
+            response = await client.post("/api/search/matrix", json={"origins": points, "destinations": points})
+        else:
+            start, end = random_point(rng), random_point(rng)
+            response = await client.post("/api/search/route", json={
+                "start_latitude": start["latitude"], "start_longitude": start["longitude"],
+                "end_latitude": end["latitude"], "end_longitude": end["longitude"],
+            })
+        if response.status_code not in (200, 404, 503):
+            response.raise_for_status()
+        completed += 1
+    return completed
+
+
+def summarize(label, latencies):
+    print(f"{label:>12}: p50 {statistics.median(latencies):6.2f} ms  "
+          f"p99 {percentile(latencies, 99):6.2f} ms  max {max(latencies):6.2f} ms")
+
+
+async def main(args):
+    import server
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gaima", timeout=60) as client:
+        # Warm up worker pools so process start-up is not counted
+        warmup = {"origins": [random_point(random.Random(0))], "destinations": [random_point(random.Random(1))]}
+        await client.post("/api/search/matrix", json=warmup)
+        await client.post("/api/search/matrix", json={**warmup, "mode": "great_circle"})
+
+        idle = await measure_layers(client, args.requests)
+
+        stop = asyncio.Event()
+        heavy = [
+            asyncio.create_task(heavy_client(client, stop, seed, args.matrix_size))
+            for seed in range(args.heavy_clients)
+        ]
+        await asyncio.sleep(0.2)
+        loaded = await measure_layers(client, args.requests)
+        stop.set()
+        heavy_done = sum(await asyncio.gather(*heavy))
+
+    server.compute.shutdown()
+
+    summarize("idle", idle)
+    summarize("under load", loaded)
+    print(f"heavy requests completed alongside: {heavy_done}")
+
+    ratio = percentile(loaded, 99) / percentile(idle, 99)
+    limit = max(percentile(idle, 99) * args.max_ratio, percentile(idle, 99) + args.slack_ms)
+    if percentile(loaded, 99) > limit:
+        print(f"FAIL: p99 under load {ratio:.1f}x idle, above the {limit:.2f} ms limit")
+        return 1
+    print(f"OK: p99 under load {ratio:.1f}x idle, within the {limit:.2f} ms limit")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--heavy-clients", type=int, default=4)
+    parser.add_argument("--matrix-size", type=int, default=60)
+    parser.add_argument("--max-ratio", type=float, default=1.5)
+    parser.add_argument("--slack-ms", type=float, default=1.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
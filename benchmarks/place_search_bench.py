@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Benchmark place search against a statewide-scale gazetteer.
+
+Synthesizes a gazetteer of Illinois-like POIs (100k by default) on top of the
+bundled seed file, builds the index, then replays typing sequences one
+keystroke at a time (some with typos, some from a caller's location) and
+reports per-keystroke latency.
+
+    python benchmarks/place_search_bench.py [--places 100000] [--write gazetteer.csv]
+"""
+import argparse
+import csv
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from geo import haversine_miles  # noqa: E402
+from places import PlaceIndex, load_gazetteer  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+TOWNS = [
+    "Chicago", "Aurora", "Rockford", "Joliet", "Naperville", "Springfield", "Peoria", "Elgin",
+    "Waukegan", "Cicero", "Champaign", "Bloomington", "Decatur", "Evanston", "Schaumburg",
+    "Bolingbrook", "Palatine", "Skokie", "Des Plaines", "Orland Park", "Tinley Park", "Oak Lawn",
+    "Berwyn", "Mount Prospect", "Normal", "Wheaton", "Hoffman Estates", "Oak Park", "Downers Grove",
+    "Glenview", "Elmhurst", "Lombard", "Moline", "Belleville", "Buffalo Grove", "Bartlett",
+    "Urbana", "Quincy", "Crystal Lake", "Plainfield", "Streamwood", "Carol Stream", "Romeoville",
+    "Rock Island", "Hanover Park", "Carpentersville", "Wheeling", "Park Ridge", "Addison", "Calumet City",
+    "Galesburg", "Kankakee", "Danville", "Effingham", "Carbondale", "Marion", "Mount Vernon",
+    "Collinsville", "Edwardsville", "Alton", "Ottawa", "LaSalle", "DeKalb", "Dixon", "Freeport",
+    "Sterling", "Macomb", "Jacksonville", "Lincoln", "Pontiac", "Mattoon", "Charleston", "Litchfield",
+]
+CATEGORIES = {
+    "Fuel": ["Shell", "BP", "Mobil", "Casey's", "Speedway", "Marathon", "Phillips 66", "Citgo"],
+    "Restaurant": ["Portillo's", "Culver's", "McDonald's", "Steak n Shake", "Lou Malnati's", "Giordano's"],
+    "Shopping": ["Walmart", "Target", "Meijer", "Jewel-Osco", "Mariano's", "Hy-Vee", "Menards"],
+    "Lodging": ["Hampton Inn", "Holiday Inn Express", "Super 8", "Comfort Inn", "Best Western"],
+    "Park": ["Community Park", "Forest Preserve", "Memorial Park", "Nature Center", "Riverwalk"],
+    "Education": ["High School", "Elementary School", "Community College", "Public Library"],
+    "Health": ["Medical Center", "Urgent Care", "Walgreens", "CVS Pharmacy", "Hospital"],
+    "Rest Area": ["Rest Area", "Travel Plaza", "Truck Stop", "Welcome Center"],
+    "EV Charging": ["ChargePoint", "Electrify America", "Tesla Supercharger", "EVgo"],
+}
+STREETS = ["Main St", "Oak Ave", "State St", "Lincoln Hwy", "Route 66", "Washington St", "Grand Ave"]
+
+TYPING_SEQUENCES = [
+    "Chicago O'Hare", "Woodfield Mall", "Springfield State Capitol", "Navy Pier",
+    "starved rock", "shell naperville", "portillos", "university of illinois",
+    "rest area i 55", "tesla supercharger joliet", "walmart peoria", "cahokia mounds",
+]
+# Replayed with fuzzy=True
+TYPO_SEQUENCES = [
+    "Woodfeild Mall", "Napervile", "starvd rock", "chicgo ohare", "shel naperville",
+    "tesla superchager", "wallmart peoria", "millenium park",
+]
+# Replayed with the caller's location: (query, (latitude, longitude))
+NEARBY_SEQUENCES = [
+    ("rest area", (41.52, -88.08)), ("Shell", (40.69, -89.59)), ("ev charging", (42.27, -89.09)),
+    ("tesla supercharger", (39.78, -89.65)), ("culvers", (37.73, -89.22)), ("truck stop", (40.12, -88.24)),
+]
+
+
+def synthesize(count, seed=42):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        category = rng.choice(list(CATEGORIES))
+        brand = rng.choice(CATEGORIES[category])
+        town = rng.choice(TOWNS)
+        name = f"{brand} {town}" if rng.random() < 0.7 else f"{town} {brand}"
+        records.append({
+            "name": name,
+            "category": category,
+            "latitude": f"{rng.uniform(37.0, 42.5):.5f}",
+            "longitude": f"{rng.uniform(-91.5, -87.5):.5f}",
+            "address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)}, {town}, IL",
+            "popularity": f"{rng.paretovariate(1.5):.2f}",
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--write", help="also write the synthesized gazetteer to this CSV path")
+    parser.add_argument("--max-p99-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    records = load_gazetteer(str(BACKEND_DIR / "data" / "illinois_places.csv")) + synthesize(args.places)
+    if args.write:
+        with open(args.write, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+
+    started = time.perf_counter()
+    index = PlaceIndex(records)
+    build_seconds = time.perf_counter() - started
+    print(f"indexed {len(index):,} places in {build_seconds:.2f}s ({len(index.postings):,} tokens)")
+
+    latencies = []
+    runs = (
+        ("exact:", [(sequence, None) for sequence in TYPING_SEQUENCES], False),
+        ("fuzzy:", [(sequence, None) for sequence in TYPO_SEQUENCES], True),
+        ("nearby:", NEARBY_SEQUENCES, False),
+    )
+    for label, sequences, fuzzy in runs:
+        print(label)
+        for sequence, origin in sequences:
+            per_sequence = []
+            for end in range(1, len(sequence) + 1):
+                started = time.perf_counter()
+                index.search(sequence[:end], 10, fuzzy=fuzzy, origin=origin)
+                per_sequence.append((time.perf_counter() - started) * 1000)
+            latencies.extend(per_sequence)
+            top = index.search(sequence, 1, fuzzy=fuzzy, origin=origin)
+            found = "(none)"
+            if top:
+                found = top[0].name
+                if origin is not None:
+                    found += f" ({haversine_miles(*origin, top[0].latitude, top[0].longitude):.1f} mi)"
+            print(f"  {sequence!r:32} worst {max(per_sequence):6.3f} ms -> {found}")
+
+    p99 = percentile(latencies, 99)
+    print(f"{len(latencies)} keystrokes: p50 {statistics.median(latencies):.3f} ms  "
+          f"p99 {p99:.3f} ms  max {max(latencies):.3f} ms")
+    if p99 > args.max_p99_ms:
+        print(f"FAIL: p99 above {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Benchmark status check reads against a local mongod.
+
+Seeds a scratch collection with 1,000,000 status checks by default (only
+what is missing from an earlier run), then times cursor pages from the top
+and deep into the collection and streams the whole collection as NDJSON.
+It also traces peak Python memory while streaming, which stays flat as the
+collection grows, and can do the same for the old load-everything read.
+
+    python benchmarks/status_stream_bench.py [--documents 1000000] [--legacy]
+
+Needs mongod at MONGO_URL (default mongodb://localhost:27017); the data goes
+to the gaima_bench database, which --drop removes afterwards.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from status_checks import StatusCheckStore  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+SEED_BATCH = 10_000
+
+
+async def seed(collection, count):
+    existing = await collection.estimated_document_count()
+    if existing >= count:
+        return
+    start = datetime(2024, 1, 1)
+    print(f"seeding {count - existing:,} status checks...")
+    for offset in range(existing, count, SEED_BATCH):
+        await collection.insert_many([
+            {"id": str(uuid.uuid4()), "client_name": f"client-{i % 500}", "timestamp": start + timedelta(seconds=i)}
+            for i in range(offset, min(count, offset + SEED_BATCH))
+        ], ordered=False)
+
+
+async def time_pages(store, pages, limit):
+    latencies, cursor = [], None
+    for _ in range(pages):
+        started = time.perf_counter()
+        _, cursor = await store.page(limit, cursor)
+        latencies.append(time.perf_counter() - started)
+        if cursor is None:
+            break
+    return latencies
+
+
+async def drain(store):
+    count = 0
+    async for chunk in store.stream():
+        count += chunk.count(b"\n")
+    return count
+
+
+async def run(args):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    collection = client.gaima_bench.status_checks
+    store = StatusCheckStore(collection)
+    await seed(collection, args.documents)
+    await store.ensure_indexes()
+
+    ms = 1000
+    latencies = await time_pages(store, args.pages, args.limit)
+    print(f"json pages of {args.limit}: first {latencies[0] * ms:.2f} ms, "
+          f"p50 {statistics.median(latencies) * ms:.2f} ms, p99 {percentile(latencies, 99) * ms:.2f} ms, "
+          f"page {len(latencies)} {latencies[-1] * ms:.2f} ms")
+
+    started = time.perf_counter()
+    streamed = await drain(store)
+    elapsed = time.perf_counter() - started
+    print(f"ndjson stream: {streamed:,} documents in {elapsed:.1f} s ({streamed / elapsed:,.0f}/s)")
+
+    tracemalloc.start()
+    await drain(store)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"ndjson stream peak memory: {peak / 2 ** 20:.1f} MiB")
+
+    if args.legacy:
+        tracemalloc.start()
+        started = time.perf_counter()
+        documents = await collection.find().to_list(None)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"to_list(None): {len(documents):,} documents in {elapsed:.1f} s, peak memory {peak / 2 ** 20:.1f} MiB")
+
+    if args.drop:
+        await client.drop_database("gaima_bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=200, help="JSON pages to walk from the top")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--legacy", action="store_true", help="also load everything with to_list(None)")
+    parser.add_argument("--drop", action="store_true", help="drop the benchmark database when done")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark status check write throughput against a local mongod.
+
+Simulates health-check traffic: concurrent clients (200 by default) each
+posting status checks back to back, written either with one insert_one per
+check, as POST /api/status does by default, or through the write-behind
+buffer enabled by STATUS_WRITE_BEHIND=1. Reports inserts per second and the
+latency until each write is acknowledged.
+
+    python benchmarks/status_write_bench.py [--clients 200] [--inserts 50000]
+
+Needs mongod at MONGO_URL (default mongodb://localhost:27017); the data goes
+to the gaima_bench database, which is dropped afterwards.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from status_checks import WriteBehindBuffer  # noqa: E402
+
+from _stats import percentile  # noqa: E402
+
+
+def status_check(client_index):
+    return {"id": str(uuid.uuid4()), "client_name": f"client-{client_index}", "timestamp": datetime.utcnow()}
+
+
+async def load(write, clients, inserts):
+    latencies = []
+    per_client = inserts // clients
+
+    async def client(index):
+        for _ in range(per_client):
+            started = time.perf_counter()
+            await write(status_check(index))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return time.perf_counter() - started, latencies
+
+
+def report(label, elapsed, latencies):
+    ms = 1000
+    print(f"{label:>14}: {len(latencies) / elapsed:9,.0f} inserts/s   "
+          f"p50 {percentile(latencies, 50) * ms:6.2f} ms   p99 {percentile(latencies, 99) * ms:6.2f} ms")
+
+
+async def run(args):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    collection = client.gaima_bench.status_writes
+    await collection.drop()
+
+    report("insert_one", *await load(collection.insert_one, args.clients, args.inserts))
+
+    writer = WriteBehindBuffer(collection, batch_size=args.batch, max_delay=args.delay)
+    writer.start()
+    report("write-behind", *await load(writer.insert, args.clients, args.inserts))
+    await writer.close()
+    stats = writer.stats()
+    print(f"{'':>14}  {stats['batches']:,} batches, {stats['written'] / max(1, stats['batches']):.0f} checks each")
+
+    await client.drop_database("gaima_bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--inserts", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=500, help="write-behind flush size")
+    parser.add_argument("--delay", type=float, default=0.01, help="write-behind flush delay in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
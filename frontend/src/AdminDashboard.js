@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import {
   UserGroupIcon,
@@ -392,6 +392,8 @@ const AdminDashboard = () => {
   const [currentView, setCurrentView] = useState('dashboard');
   const [data, setData] = useState({});
   const [loading, setLoading] = useState(false);
+  // Per-section ETags from the last overview response
+  const etags = useRef({});
 
   const menuItems = [
     { id: 'dashboard', name: 'Dashboard', icon: ChartBarIcon },
@@ -401,43 +403,35 @@ const AdminDashboard = () => {
     { id: 'audit', name: 'Audit Log', icon: ClockIcon }
   ];
 
-  const fetchData = async (endpoint) => {
+  // All views load from one overview request; sections unchanged since
+  // the last one are skipped by the server and kept from state
+  const loadOverview = async () => {
+    setLoading(true);
     try {
-      const response = await axios.get(`${API}/admin/${endpoint}`, {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get(`${API}/admin/overview`, {
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'If-None-Match': Object.values(etags.current).join(', ')
+        },
+        validateStatus: (status) => status === 200 || status === 304
       });
-      return response.data;
+      if (response.status === 304) {
+        return;
+      }
+      const { sections } = response.data;
+      etags.current = response.data.etags;
+      setData(prev => ({
+        ...prev,
+        ...(sections.dashboard && { stats: sections.dashboard }),
+        ...(sections.users && { users: sections.users }),
+        ...(sections.content && { content: sections.content }),
+        ...(sections.alerts && { alerts: sections.alerts }),
+        ...(sections.audit && { audit: sections.audit })
+      }));
     } catch (error) {
       if (error.response?.status === 401) {
         handleLogout();
       }
-      throw error;
-    }
-  };
-
-  const loadViewData = async (view) => {
-    setLoading(true);
-    try {
-      let newData = {};
-      switch (view) {
-        case 'dashboard':
-          newData.stats = await fetchData('dashboard');
-          break;
-        case 'users':
-          newData.users = await fetchData('users');
-          break;
-        case 'content':
-          newData.content = await fetchData('content');
-          break;
-        case 'alerts':
-          newData.alerts = await fetchData('alerts');
-          break;
-        case 'audit':
-          newData.audit = await fetchData('audit');
-          break;
-      }
-      setData(prev => ({ ...prev, ...newData }));
-    } catch (error) {
       console.error('Error loading data:', error);
     } finally {
       setLoading(false);
@@ -446,7 +440,7 @@ const AdminDashboard = () => {
 
   useEffect(() => {
     if (token && currentView) {
-      loadViewData(currentView);
+      loadOverview();
     }
   }, [token, currentView]);
 
@@ -460,6 +454,7 @@ const AdminDashboard = () => {
     setToken(null);
     setCurrentView('dashboard');
     setData({});
+    etags.current = {};
   };
 
   if (!token) {
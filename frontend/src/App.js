@@ -916,6 +916,7 @@ const GaimaApp = () => {
   const [audioAlertsEnabled, setAudioAlertsEnabled] = useState(false);
   const [userLocation, setUserLocation] = useState(null);
   const [userHeading, setUserHeading] = useState(0);
+  const [userSpeed, setUserSpeed] = useState(null);
   
   // Check for accepted terms on app load
   useEffect(() => {
@@ -956,19 +957,52 @@ const GaimaApp = () => {
     }
   };
 
+  // Fallback: one request per layer, shown once all have arrived
+  const fetchAllLayers = async () => {
+    const layerTypes = Object.keys(LAYER_CONFIG);
+    const dataPromises = layerTypes.map(async (layerType) => {
+      const data = await fetchLayerData(layerType);
+      return [layerType, data];
+    });
+
+    const results = await Promise.all(dataPromises);
+    setMapData(Object.fromEntries(results));
+  };
+
+  // Layers arrive as NDJSON, high priority first; each line is shown as soon
+  // as it is read, so hazards are on the map before the lower layers load
+  const streamLayers = async () => {
+    const response = await fetch(`${API}/layers/stream`);
+    if (!response.ok || !response.body) {
+      throw new Error(`Layer stream failed with status ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      const layers = lines.filter(Boolean).map((line) => JSON.parse(line));
+      if (layers.length) {
+        setMapData(prev => ({ ...prev, ...Object.fromEntries(layers.map(layer => [layer.layer, layer])) }));
+        setLoading(false);
+      }
+    }
+  };
+
   // Load initial data
   useEffect(() => {
     const loadData = async () => {
       setLoading(true);
-      const layerTypes = Object.keys(LAYER_CONFIG);
-      const dataPromises = layerTypes.map(async (layerType) => {
-        const data = await fetchLayerData(layerType);
-        return [layerType, data];
-      });
-      
-      const results = await Promise.all(dataPromises);
-      const newMapData = Object.fromEntries(results);
-      setMapData(newMapData);
+      try {
+        await streamLayers();
+      } catch (error) {
+        console.error('Error streaming layers, fetching them one by one:', error);
+        await fetchAllLayers();
+      }
       setLoading(false);
     };
 
@@ -1011,6 +1045,10 @@ const GaimaApp = () => {
           if (position.coords.heading !== null) {
             setUserHeading(position.coords.heading);
           }
+          if (position.coords.speed !== null) {
+            // Metres per second to mph; sets how far ahead the server looks
+            setUserSpeed(position.coords.speed * 2.23694);
+          }
         },
         (error) => {
           console.error('Geolocation error:', error);
@@ -1034,7 +1072,8 @@ const GaimaApp = () => {
           const response = await axios.post(`${API}/alerts/lookahead`, {
             latitude: userLocation.latitude,
             longitude: userLocation.longitude,
-            heading: userHeading
+            heading: userHeading,
+            speed: userSpeed
           });
           
           if (response.data.alert && 'speechSynthesis' in window) {
@@ -1051,7 +1090,7 @@ const GaimaApp = () => {
       const alertInterval = setInterval(checkAlerts, 5000);
       return () => clearInterval(alertInterval);
     }
-  }, [audioAlertsEnabled, userLocation, userHeading]);
+  }, [audioAlertsEnabled, userLocation, userHeading, userSpeed]);
 
   if (loading && termsAccepted && !showSafety) {
     return (
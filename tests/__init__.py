@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The backend is run from its own directory, so its modules import each other
+# as top-level modules; mirror that here.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
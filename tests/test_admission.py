@@ -0,0 +1,111 @@
+import asyncio
+import time
+import unittest
+
+from admission import AdmissionController, AdmissionMiddleware, LoopLagMonitor, tiers_for_layers
+
+
+class FixedLag:
+    """Stands in for the loop monitor with a lag set by the test"""
+
+    def __init__(self, lag=0.0):
+        self.lag = lag
+        self.max_lag = lag
+
+    def current(self):
+        return self.lag
+
+
+def controller(lag=0.0, max_in_flight=10):
+    admission = AdmissionController(max_in_flight=max_in_flight, max_lag=0.1, monitor=FixedLag(lag))
+    admission.assign(tiers_for_layers({"high": ["traffic"], "lower": ["travel_centers"]}, "/api/layers/"))
+    admission.assign({"/api/alerts/lookahead": "critical", "/metrics": None})
+    admission.assign_prefix("/api/admin/", "admin")
+    return admission
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def test_tiers_by_path(self):
+        admission = controller()
+        self.assertEqual(admission.tier("/api/layers/travel-centers"), "lower")
+        self.assertEqual(admission.tier("/api/admin/overview"), "admin")
+        self.assertEqual(admission.tier("/api/search/route"), "high")
+        self.assertIsNone(admission.tier("/metrics"))
+        with self.assertRaises(ValueError):
+            admission.assign({"/api/x": "urgent"})
+
+    def test_prefixed_paths_are_not_remembered(self):
+        admission = controller()
+        for i in range(1000):
+            self.assertEqual(admission.tier(f"/api/admin/x{i}"), "admin")
+        self.assertEqual(admission.stats()["routes"], 4)
+
+    def test_lower_tiers_shed_first(self):
+        admission = controller()
+        shed_at = {}
+        for lag in (0.0, 0.06, 0.08, 0.09, 0.2, 10.0):
+            admission.monitor.lag = lag
+            for tier in ("lower", "medium", "admin", "high", "critical"):
+                if tier not in shed_at and not admission.admit(tier):
+                    shed_at[tier] = lag
+        self.assertEqual(shed_at, {"lower": 0.06, "medium": 0.08, "admin": 0.09, "high": 0.2})
+        self.assertEqual(admission.shed["critical"], 0)
+
+    def test_in_flight_counts_towards_load(self):
+        admission = controller(max_in_flight=4)
+        admission.in_flight = 2
+        self.assertFalse(admission.admit("lower"))
+        self.assertTrue(admission.admit("admin"))
+
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+
+    async def test_blocked_loop_is_seen_while_overdue(self):
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)
+        self.assertGreater(monitor.current(), 0.05)
+        await asyncio.sleep(0.3)
+        self.assertLess(monitor.current(), 0.05)
+        await monitor.stop()
+
+
+class TestAdmissionMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    async def request(self, admission, path):
+        calls, sent = [], []
+
+        async def app(scope, receive, send):
+            calls.append(admission.in_flight)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        async def send(message):
+            sent.append(message)
+
+        await AdmissionMiddleware(app, admission)({"type": "http", "path": path}, None, send)
+        return calls, sent[0]
+
+    async def test_refused_with_retry_after(self):
+        admission = controller(lag=0.07)
+        calls, start = await self.request(admission, "/api/layers/travel-centers")
+        self.assertEqual((calls, start["status"]), ([], 503))
+        self.assertEqual(dict(start["headers"])[b"retry-after"], b"10")
+
+    async def test_admitted_requests_are_counted_in_flight(self):
+        admission = controller(lag=10.0)
+        calls, start = await self.request(admission, "/api/alerts/lookahead")
+        self.assertEqual((calls, start["status"]), ([1], 200))
+        self.assertEqual(admission.in_flight, 0)
+
+    async def test_exempt_paths_and_disabled_controller_pass_through(self):
+        admission = controller(lag=10.0)
+        self.assertEqual(await self.request(admission, "/metrics"), ([0], {"type": "http.response.start", "status": 200, "headers": []}))
+        admission.enabled = False
+        calls, start = await self.request(admission, "/api/layers/travel-centers")
+        self.assertEqual((calls, start["status"]), ([0], 200))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import math
+import random
+import unittest
+
+from amenities import AmenityIndex, KDTree, amenity_filter, project
+
+
+def station(rng, index):
+    return {
+        "id": str(index),
+        "location": {"latitude": rng.uniform(37.0, 42.5), "longitude": rng.uniform(-91.5, -87.5)},
+        "available_stations": rng.randint(0, 4),
+        "connector_types": rng.sample(["CCS", "CHAdeMO", "Tesla", "J1772"], 2),
+    }
+
+
+class TestKDTree(unittest.TestCase):
+
+    def test_nearest_matches_brute_force_order(self):
+        rng = random.Random(3)
+        points = [(rng.uniform(0, 100), rng.uniform(0, 100), i) for i in range(500)]
+        tree = KDTree(points)
+        for _ in range(20):
+            x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+            expected = sorted(math.hypot(px - x, py - y) for px, py, _ in points)[:25]
+            got = [distance for distance, _ in zip(tree.nearest(x, y), range(25))]
+            self.assertEqual([round(d, 9) for d, _ in got], [round(d, 9) for d in expected])
+
+    def test_within_box(self):
+        points = [(x, y, (x, y)) for x in range(10) for y in range(10)]
+        found = sorted(item for _, _, item in KDTree(points).within_box((2, 3, 4, 5)))
+        self.assertEqual(found, [(x, y) for x in range(2, 5) for y in range(3, 6)])
+
+    def test_empty_tree(self):
+        self.assertEqual(list(KDTree([]).nearest(0, 0)), [])
+
+
+class TestAmenityIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.stations = [station(rng, i) for i in range(2000)]
+        self.index = AmenityIndex()
+        self.index.set_layer("ev_stations", self.stations)
+
+    def distance(self, point, latitude, longitude):
+        x, y = project(latitude, longitude)
+        px, py = project(point["location"]["latitude"], point["location"]["longitude"])
+        return math.hypot(px - x, py - y)
+
+    def test_k_nearest_with_filter(self):
+        predicate = amenity_filter(min_available=2, connector="ccs")
+        results = self.index.nearest("ev_stations", 40.1, -88.2, 3, 50.0, predicate)
+        expected = sorted(
+            (s for s in self.stations if predicate(s)),
+            key=lambda s: self.distance(s, 40.1, -88.2)
+        )[:3]
+        self.assertEqual([point["id"] for _, point in results], [s["id"] for s in expected])
+        self.assertTrue(all(point["available_stations"] >= 2 for _, point in results))
+
+    def test_radius_limits_results(self):
+        results = self.index.nearest("ev_stations", 40.1, -88.2, 50, 3.0)
+        self.assertTrue(all(miles <= 3.0 for miles, _ in results))
+
+    def test_heading_keeps_amenities_ahead(self):
+        # Heading due north: everything found lies north of the caller
+        results = self.index.nearest("ev_stations", 40.1, -88.2, 5, 40.0, heading=0.0)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(point["location"]["latitude"] > 40.1 for _, point in results))
+
+    def test_along_route_in_driving_order(self):
+        # Due south from Chicago towards Kankakee
+        polyline = [[41.88, -87.63], [41.5, -87.7], [41.12, -87.86]]
+        results = self.index.along_route("ev_stations", polyline, 4, 5.0)
+        self.assertEqual(len(results), 4)
+        route_miles = [miles for miles, _, _ in results]
+        self.assertEqual(route_miles, sorted(route_miles))
+        self.assertTrue(all(offset <= 5.0 for _, offset, _ in results))
+
+    def test_unknown_layer(self):
+        self.assertEqual(self.index.nearest("rest_areas", 40.1, -88.2, 3, 5.0), [])
+
+    def test_rest_area_filters(self):
+        predicate = amenity_filter(truck_parking=True, amenity="showers")
+        self.assertTrue(predicate({"truck_parking": True, "amenities": ["Restrooms", "Showers"]}))
+        self.assertFalse(predicate({"truck_parking": False, "amenities": ["Showers"]}))
+        self.assertFalse(predicate({"truck_parking": True, "amenities": ["Vending"]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from audit import AuditLog, decode_cursor, naive_utc
+
+
+class MemoryAuditStore:
+    """Stand-in for the MongoDB collection with the same query semantics"""
+
+    def __init__(self):
+        self.entries = []
+        self.queries = 0
+
+    async def ensure_indexes(self):
+        pass
+
+    async def insert_many(self, entries):
+        self.entries.extend(entries)
+
+    async def query(self, filters, before, limit):
+        self.queries += 1
+        matches = []
+        for entry in sorted(self.entries, key=lambda e: (e["timestamp"], e["id"]), reverse=True):
+            if before is not None and (entry["timestamp"], entry["id"]) >= before:
+                continue
+            if any(entry[field] != value for field, value in filters.items() if field != "timestamp"):
+                continue
+            bounds = filters.get("timestamp", {})
+            if "$gte" in bounds and entry["timestamp"] < bounds["$gte"]:
+                continue
+            if "$lte" in bounds and entry["timestamp"] > bounds["$lte"]:
+                continue
+            matches.append(entry)
+        return matches[:limit]
+
+    async def estimated_count(self):
+        return len(self.entries)
+
+
+class TestAuditLog(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.store = MemoryAuditStore()
+        self.log = AuditLog(self.store, ring_size=10)
+        self.writer = asyncio.create_task(self.log.run())
+
+    async def asyncTearDown(self):
+        self.writer.cancel()
+
+    async def record(self, count, user="admin_user", action="Layer update"):
+        for i in range(count):
+            self.log.record(action, user, f"entry {i}")
+        while self.log.queue.qsize():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    async def test_record_does_not_wait_for_the_store(self):
+        self.log.record("User login", "admin_user")
+        self.assertEqual(len(self.log.ring), 1)
+        self.assertEqual(self.store.entries, [])
+        await self.record(0)
+        self.assertEqual(len(self.store.entries), 1)
+
+    async def test_recent_page_served_from_ring(self):
+        await self.record(5)
+        logs, next_cursor = await self.log.page(limit=3)
+        self.assertEqual([e["details"] for e in logs], ["entry 4", "entry 3", "entry 2"])
+        self.assertIsNotNone(next_cursor)
+        self.assertEqual(self.store.queries, 0)
+
+    async def test_pages_continue_past_the_ring_without_gaps(self):
+        await self.record(25)
+        seen, cursor = [], None
+        while True:
+            logs, cursor = await self.log.page(limit=4, cursor=cursor)
+            seen.extend(e["details"] for e in logs)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"entry {i}" for i in reversed(range(25))])
+
+    async def test_filters(self):
+        await self.record(12, user="jane_smith", action="User login")
+        await self.record(6, user="admin_user", action="Alert broadcast")
+        logs, _ = await self.log.page(limit=100, user="jane_smith")
+        self.assertEqual(len(logs), 12)
+        self.assertTrue(all(e["user"] == "jane_smith" for e in logs))
+        logs, _ = await self.log.page(limit=100, action="Alert broadcast")
+        self.assertEqual(len(logs), 6)
+        future = datetime.utcnow() + timedelta(hours=1)
+        logs, _ = await self.log.page(limit=100, since=future)
+        self.assertEqual(logs, [])
+
+    async def test_timezone_aware_bounds(self):
+        await self.record(3)
+        # As FastAPI parses ?since=...Z and ?until=...+02:00
+        parse = TypeAdapter(datetime).validate_python
+        since = naive_utc(parse((datetime.utcnow() - timedelta(hours=1)).isoformat() + "Z"))
+        until = naive_utc(parse((datetime.utcnow() + timedelta(hours=3)).isoformat() + "+02:00"))
+        self.assertIsNone(since.tzinfo)
+        logs, _ = await self.log.page(limit=100, since=since, until=until)
+        self.assertEqual(len(logs), 3)
+        logs, _ = await self.log.page(limit=100, until=naive_utc(parse("2026-01-01T00:00:00Z")) - timedelta(days=3650))
+        self.assertEqual(logs, [])
+
+    async def test_estimated_total_counts_stored_and_pending_entries(self):
+        await self.record(25)
+        self.log.record("User login", "admin_user")
+        self.assertEqual(await self.log.estimated_total(), 26)
+
+    async def test_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+if __name__ == "__main__":
+    unittest.main()
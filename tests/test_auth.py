@@ -0,0 +1,62 @@
+import time
+import unittest
+from datetime import timedelta
+
+from auth import TokenVerifier
+
+
+class FakeClock:
+    """Epoch seconds moved on by the test"""
+
+    def __init__(self):
+        self.now = float(int(time.time()))
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.verifier = TokenVerifier("test-secret")
+        self.token = self.verifier.issue({"sub": "idot_admin"}, timedelta(minutes=5))
+
+    def test_verified_token_is_cached(self):
+        self.assertEqual(self.verifier.verify(self.token)["sub"], "idot_admin")
+        self.assertEqual(self.verifier.verify(self.token)["sub"], "idot_admin")
+        self.assertEqual(self.verifier.cache.hits, 1)
+
+    def test_rejects_bad_signature_and_expired_tokens(self):
+        forged = TokenVerifier("other-secret").issue({"sub": "idot_admin"}, timedelta(minutes=5))
+        self.assertIsNone(self.verifier.verify(forged))
+        expired = self.verifier.issue({"sub": "idot_admin"}, timedelta(seconds=-1))
+        self.assertIsNone(self.verifier.verify(expired))
+
+    def test_cache_entry_never_outlives_token(self):
+        clock = FakeClock()
+        verifier = TokenVerifier("test-secret", cache_ttl=60, clock=clock)
+        token = verifier.issue({"sub": "idot_admin"}, timedelta(seconds=5))
+        self.assertIsNotNone(verifier.verify(token))
+        clock.now += 4
+        self.assertIsNotNone(verifier.verify(token))
+        self.assertEqual(verifier.cache.hits, 1)
+        clock.now += 1
+        self.assertIsNone(verifier.verify(token))
+
+    def test_revoke_single_token(self):
+        other = self.verifier.issue({"sub": "idot_admin"}, timedelta(minutes=5))
+        self.verifier.verify(self.token)
+        self.assertTrue(self.verifier.revoke(self.token))
+        self.assertIsNone(self.verifier.verify(self.token))
+        self.assertIsNotNone(self.verifier.verify(other))
+
+    def test_revoke_subject_keeps_later_logins(self):
+        self.verifier.verify(self.token)
+        self.verifier.revoke_subject("idot_admin")
+        self.assertIsNone(self.verifier.verify(self.token))
+        fresh = self.verifier.issue({"sub": "idot_admin"}, timedelta(minutes=5))
+        self.assertIsNotNone(self.verifier.verify(fresh))
+
+
+if __name__ == "__main__":
+    unittest.main()
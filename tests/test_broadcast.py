@@ -0,0 +1,102 @@
+import asyncio
+import json
+import unittest
+
+from broadcast import BroadcastHub
+
+
+def alert(alert_id, title="Alert"):
+    return {"id": alert_id, "title": title, "sent_at": "2025-01-15T10:30:00Z"}
+
+
+class TestBroadcastHub(unittest.IsolatedAsyncioTestCase):
+
+    async def test_fans_out_to_every_subscriber_in_batches(self):
+        hub = BroadcastHub(batch_size=7)
+        subscribers = [hub.subscribe() for _ in range(50)]
+        record = await hub.broadcast(alert("a1"))
+        self.assertEqual(record["recipients"], 50)
+        frames = [await subscriber.next() for subscriber in subscribers]
+        # Serialized once, shared by every queue
+        self.assertEqual(len({id(payload) for _, payload in frames}), 1)
+        self.assertEqual({alert_id for alert_id, _ in frames}, {"a1"})
+
+    async def test_region_targets_only_nearby_located_subscribers(self):
+        hub = BroadcastHub()
+        springfield = hub.subscribe(39.78, -89.65)
+        chicago = hub.subscribe(41.88, -87.63)
+        hub.subscribe()
+        record = await hub.broadcast(alert("a1"), region=(39.8, -89.6, 25.0))
+        self.assertEqual(record["recipients"], 1)
+        self.assertEqual(len(springfield.frames), 1)
+        self.assertEqual(len(chicago.frames), 0)
+
+    async def test_published_events_are_not_kept_as_broadcasts(self):
+        hub = BroadcastHub()
+        subscriber = hub.subscribe()
+        self.assertEqual(await hub.publish("hazards_cleared", {"hazards": {"incidents": ["i1"]}}), 1)
+        alert_id, payload = await subscriber.next()
+        self.assertIsNone(alert_id)
+        self.assertTrue(payload.startswith(b"id: hazards_cleared-1\nevent: hazards_cleared\n"))
+        self.assertEqual(hub.history(), [])
+
+    async def test_expiry_notices_are_not_counted_as_deliveries(self):
+        hub = BroadcastHub()
+        stream = hub.stream(heartbeat=10)
+        await stream.__anext__()
+        await hub.broadcast(alert("a1"))
+        await stream.__anext__()
+
+        # A frame is counted once the stream resumes after writing it
+        await hub.publish("hazards_cleared", {"hazards": {"incidents": ["i1"]}})
+        frame = await stream.__anext__()
+        self.assertTrue(frame.startswith(b"id: hazards_cleared-1\n"))
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        self.assertEqual(hub.stats()["delivered"], 1)
+        self.assertEqual(hub.recent["a1"]["delivered"], 1)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(len(hub), 0)
+
+    async def test_slow_subscriber_drops_oldest_frames(self):
+        hub = BroadcastHub(queue_size=2)
+        subscriber = hub.subscribe()
+        for i in range(5):
+            await hub.broadcast(alert(f"a{i}"))
+        self.assertEqual([alert_id for alert_id, _ in subscriber.frames], ["a3", "a4"])
+        self.assertEqual(hub.stats()["dropped"], 3)
+        self.assertEqual(hub.recent["a0"]["dropped"], 1)
+
+    async def test_stream_counts_deliveries_and_unsubscribes(self):
+        hub = BroadcastHub()
+        stream = hub.stream(heartbeat=0.01)
+        self.assertEqual(await stream.__anext__(), b"retry: 5000\n\n")
+        self.assertEqual(len(hub), 1)
+        self.assertEqual(await stream.__anext__(), b": keep-alive\n\n")
+
+        await hub.broadcast(alert("a1", "Road closed"))
+        frame = (await stream.__anext__()).decode()
+        self.assertTrue(frame.startswith("id: a1\nevent: alert\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1])["title"], "Road closed")
+        await stream.__anext__()  # Resumes past the yield, recording the delivery
+        self.assertEqual(hub.history()[0]["delivered"], 1)
+
+        await stream.aclose()
+        self.assertEqual(len(hub), 0)
+
+    async def test_disconnect_while_waiting_unsubscribes(self):
+        hub = BroadcastHub()
+        stream = hub.stream(latitude=40.0, longitude=-89.0)
+        await stream.__anext__()
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(hub.stats(), {"connections": 0, "located": 0, "broadcasts": 0, "delivered": 0, "dropped": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+
+from cache import CoalescingCache, LRUCache, SingleFlight, SnapshotCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_hit_ratio(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        self.assertEqual(cache.stats()["hit_ratio"], 0.5)
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.run("key", compute) for _ in range(5)))
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(flight.stats(), {"in_flight": 0, "calls": 1, "coalesced": 4})
+
+        # Once finished, the next call computes afresh
+        self.assertEqual(await flight.run("key", compute), 2)
+
+    async def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.run("key", fail), flight.run("key", fail), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(flight), 0)
+
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flight.run("key", compute))
+        second = asyncio.ensure_future(flight.run("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, "done")
+
+
+class TestCoalescingCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_one_computation_per_key_then_cached(self):
+        cache = CoalescingCache(ttl=60)
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return None if key == "quiet" else key.upper()
+
+        results = await asyncio.gather(*(
+            cache.get(key, lambda key=key: compute(key)) for key in ["a", "a", "quiet", "a", "quiet"]
+        ))
+        self.assertEqual(results, ["A", "A", None, "A", None])
+        self.assertEqual(await cache.get("quiet", lambda: compute("quiet")), None)
+        self.assertEqual(calls, ["a", "quiet"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["coalescing"]["coalesced"]), (1, 3))
+
+    async def test_result_not_kept_when_version_moves(self):
+        cache = CoalescingCache()
+        version = 1
+
+        async def compute():
+            nonlocal version
+            version += 1
+            return "stale"
+
+        self.assertEqual(await cache.get("key", compute, version=lambda: version), "stale")
+        self.assertEqual(len(cache), 0)
+
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def test_reused_until_version_changes(self):
+        cache = SnapshotCache()
+        self.assertIsNone(cache.get("users", 1))
+        etag, body = cache.set("users", 1, {"b": 2, "a": [1]})
+        self.assertEqual(body, '{"a":[1],"b":2}')
+        self.assertEqual(cache.get("users", 1), (etag, body))
+        self.assertIsNone(cache.get("users", 2))
+
+    def test_etag_follows_content(self):
+        cache = SnapshotCache()
+        first, _ = cache.set("alerts", 1, {"sent": 0})
+        same, _ = cache.set("alerts", 2, {"sent": 0})
+        changed, _ = cache.set("alerts", 3, {"sent": 1})
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, changed)
+        self.assertTrue(first.startswith('"alerts-'))
+
+
+if __name__ == "__main__":
+    unittest.main()
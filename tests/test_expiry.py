@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from expiry import ExpiryEngine, expires_at, parse_duration
+
+NOW = datetime(2025, 1, 15, 10, 0)
+
+
+def hazard(point_id, minutes=None, details=""):
+    point = {"id": point_id, "timestamp": NOW, "details": details}
+    if minutes is not None:
+        point["expires_at"] = NOW + timedelta(minutes=minutes)
+    return point
+
+
+class TestDurations(unittest.TestCase):
+
+    def test_durations_from_details(self):
+        self.assertEqual(parse_duration("Duration: 6 hours. Use alternate route"), timedelta(hours=6))
+        self.assertEqual(parse_duration("Avoid area. Clear time: 45 minutes."), timedelta(minutes=45))
+        self.assertEqual(parse_duration("Estimated completion: 3 days."), timedelta(days=3))
+        self.assertIsNone(parse_duration("Drive with caution."))
+
+    def test_structured_field_wins(self):
+        self.assertEqual(expires_at(hazard("a", 5, "Clear time: 45 minutes.")), NOW + timedelta(minutes=5))
+        self.assertEqual(expires_at(hazard("b", details="Clear time: 45 minutes.")), NOW + timedelta(minutes=45))
+        self.assertIsNone(expires_at(hazard("c")))
+
+
+class TestExpiryEngine(unittest.TestCase):
+
+    def test_pops_due_points_in_order(self):
+        engine = ExpiryEngine()
+        engine.track("incidents", [hazard("late", 30), hazard("early", 10), hazard("forever")])
+        engine.track("closures", [hazard("c1", 20)])
+        self.assertEqual(len(engine), 3)
+        self.assertEqual(engine.next_expiry(), NOW + timedelta(minutes=10))
+        self.assertEqual(engine.pop_expired(NOW + timedelta(minutes=25)), {"incidents": ["early"], "closures": ["c1"]})
+        self.assertEqual(engine.pop_expired(NOW + timedelta(minutes=25)), {})
+        self.assertEqual(len(engine), 1)
+
+    def test_refresh_drops_and_reschedules(self):
+        engine = ExpiryEngine()
+        engine.track("incidents", [hazard("a", 10), hazard("b", 20)])
+        # a was removed by the refresh, b now clears later
+        engine.track("incidents", [hazard("b", 40)])
+        self.assertEqual(engine.pop_expired(NOW + timedelta(minutes=30)), {})
+        self.assertEqual(engine.pop_expired(NOW + timedelta(minutes=40)), {"incidents": ["b"]})
+
+    def test_stale_entries_are_compacted(self):
+        engine = ExpiryEngine()
+        for minutes in range(1, 200):
+            engine.track("incidents", [hazard("a", minutes)])
+        self.assertLessEqual(engine.stats()["heap_entries"], 2 + 64)
+        self.assertEqual(engine.next_expiry(), NOW + timedelta(minutes=199))
+
+
+class TestExpiryTask(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sleeps_until_due_and_wakes_for_earlier_expiry(self):
+        engine = ExpiryEngine()
+        batches = []
+        engine.add_listener(batches.append)
+        soon = datetime.utcnow()
+        engine.track("closures", [{"id": "c1", "expires_at": soon + timedelta(hours=1)}])
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0.01)
+        engine.track("incidents", [{"id": "i1", "expires_at": soon + timedelta(milliseconds=50)}])
+        await asyncio.sleep(0.2)
+        task.cancel()
+        self.assertEqual(batches, [{"incidents": ["i1"]}])
+        self.assertEqual(engine.stats()["expired"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
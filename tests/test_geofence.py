@@ -0,0 +1,134 @@
+import asyncio
+import json
+import unittest
+
+from geofence import GeofenceIndex, GeofenceLimitExceeded, GeofenceTooLarge, point_in_polygon
+
+# A square of about 7 x 5 miles around downtown Springfield
+SPRINGFIELD = [(39.75, -89.70), (39.85, -89.70), (39.85, -89.60), (39.75, -89.60)]
+# I-55 from Springfield towards Bloomington
+I_55 = [(39.80, -89.65), (40.10, -89.40), (40.48, -88.99)]
+
+
+def hazard(hazard_id, latitude, longitude):
+    return {"id": hazard_id, "title": "Crash", "location": {"latitude": latitude, "longitude": longitude}}
+
+
+def frame_data(frame):
+    lines = frame.decode().splitlines()
+    return lines[0][len("id: "):], json.loads(lines[2][len("data: "):])
+
+
+class TestGeofenceIndex(unittest.TestCase):
+
+    def test_point_in_polygon(self):
+        self.assertTrue(point_in_polygon(39.80, -89.65, SPRINGFIELD))
+        self.assertFalse(point_in_polygon(39.90, -89.65, SPRINGFIELD))
+
+    def test_polygon_lookup(self):
+        index = GeofenceIndex()
+        area = index.add_polygon("Downtown", SPRINGFIELD)
+        self.assertEqual(index.lookup(39.80, -89.65), [area])
+        self.assertEqual(index.lookup(39.86, -89.65), [])
+        self.assertEqual(index.lookup(41.88, -87.63), [])
+
+    def test_corridor_follows_the_route_not_its_bounding_box(self):
+        index = GeofenceIndex()
+        route = index.add_corridor("Commute", I_55, 1.0)
+        self.assertEqual(index.lookup(40.10, -89.41), [route])
+        # Inside the route's bounding box but miles from the road
+        self.assertEqual(index.lookup(40.40, -89.60), [])
+        # Only the cells along the segments are used
+        self.assertLess(len(route.cells), 40)
+
+    def test_layer_filter_and_defaults(self):
+        index = GeofenceIndex(default_layers=["incidents", "closures"])
+        hazards = index.add_polygon("Hazards", SPRINGFIELD)
+        fuel = index.add_polygon("Fuel", SPRINGFIELD, layers=["fuel_stations"])
+        self.assertEqual(index.lookup(39.80, -89.65, "incidents"), [hazards])
+        self.assertEqual(index.lookup(39.80, -89.65, "fuel_stations"), [fuel])
+        self.assertEqual(index.lookup(39.80, -89.65, "weather"), [])
+
+    def test_remove_clears_cells(self):
+        index = GeofenceIndex()
+        area = index.add_polygon("Downtown", SPRINGFIELD)
+        index.add_corridor("Commute", I_55, 0.5)
+        self.assertTrue(index.remove(area.id))
+        self.assertFalse(index.remove(area.id))
+        self.assertEqual(len(index), 1)
+        self.assertTrue(all(area.id not in members for members in index.cells.values()))
+
+    def test_limits_per_owner_and_in_total(self):
+        index = GeofenceIndex(max_total=3, max_per_owner=2)
+        first = index.add_polygon("Home", SPRINGFIELD, owner="10.0.0.1")
+        index.add_corridor("Commute", I_55, 0.5, owner="10.0.0.1")
+        with self.assertRaises(GeofenceLimitExceeded):
+            index.add_polygon("Work", SPRINGFIELD, owner="10.0.0.1")
+        index.add_polygon("Home", SPRINGFIELD, owner="10.0.0.2")
+        with self.assertRaises(GeofenceLimitExceeded):
+            index.add_polygon("Home", SPRINGFIELD, owner="10.0.0.3")
+        index.remove(first.id)
+        index.add_polygon("Work", SPRINGFIELD, owner="10.0.0.1")
+        self.assertEqual((len(index), index.stats()["owners"]), (3, 2))
+
+    def test_shapes_too_wide_to_index_are_refused(self):
+        index = GeofenceIndex(max_per_owner=1)
+        with self.assertRaises(GeofenceTooLarge):
+            index.add_polygon("Everywhere", [(0, 0), (3000, 0), (0, 3000)], owner="10.0.0.1")
+        with self.assertRaises(GeofenceTooLarge):
+            index.add_polygon("Overflow", [(1e308, 0), (0, 1), (1, 1)], owner="10.0.0.1")
+        # One long segment is enough to refuse a corridor
+        with self.assertRaises(GeofenceTooLarge):
+            index.add_corridor("Cross country", [(39.80, -89.65), (40.10, -89.40), (40.0, -75.0)], 1.0, owner="10.0.0.1")
+        # Nothing was registered or counted against the client
+        self.assertEqual((len(index), index.cells, index.owners), (0, {}, {}))
+        index.add_polygon("Illinois", [(37.0, -91.5), (42.5, -91.5), (42.5, -87.5), (37.0, -87.5)], owner="10.0.0.1")
+        self.assertLessEqual(len(index.cells), 16)
+
+    def test_match_serializes_each_hazard_once(self):
+        index = GeofenceIndex()
+        area = index.add_polygon("Downtown", SPRINGFIELD)
+        route = index.add_corridor("Commute", I_55, 1.0)
+        deliveries = index.match("incidents", [hazard("i1", 39.80, -89.65), hazard("i2", 41.88, -87.63)])
+        self.assertEqual(deliveries, 2)
+        self.assertIs(area.recent[0][1], route.recent[0][1])
+        event_id, data = frame_data(area.recent[0][1])
+        self.assertEqual((event_id, data["layer"], data["hazard"]["id"]), ("1", "incidents", "i1"))
+        self.assertEqual(index.stats()["points_matched"], 2)
+
+
+class TestGeofenceStream(unittest.IsolatedAsyncioTestCase):
+
+    async def test_stream_delivers_and_resumes_after_last_event_id(self):
+        index = GeofenceIndex()
+        area = index.add_polygon("Downtown", SPRINGFIELD)
+        stream = index.stream(area.id, heartbeat=0.01)
+        self.assertEqual(await stream.__anext__(), b"retry: 5000\n\n")
+        self.assertEqual(await stream.__anext__(), b": keep-alive\n\n")
+
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        index.match("incidents", [hazard("i1", 39.80, -89.65)])
+        self.assertEqual(frame_data(await waiting)[0], "1")
+        await stream.aclose()
+
+        index.match("closures", [hazard("c1", 39.81, -89.66), hazard("c2", 39.82, -89.64)])
+        resumed = index.stream(area.id, last_event_id=2)
+        await resumed.__anext__()
+        self.assertEqual([frame_data(frame)[0] for frame in (await resumed.__anext__()).split(b"\n\n")[:-1]], ["3"])
+        await resumed.aclose()
+
+    async def test_stream_ends_when_geofence_is_removed(self):
+        index = GeofenceIndex()
+        area = index.add_polygon("Downtown", SPRINGFIELD)
+        stream = index.stream(area.id, heartbeat=10)
+        await stream.__anext__()
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        index.remove(area.id)
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(waiting, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import random
+import threading
+import unittest
+
+from geo import MILES_PER_DEGREE
+from lookahead import LOOKAHEAD_MAX_MILES, LOOKAHEAD_MIN_MILES, hazard_score, horizon_miles, top_hazards
+from workers import BoundedThreadPool, ComputeOverloaded, ComputePool
+
+ORIGIN = (40.0, -89.0)
+
+
+def hazard(hazard_id, miles_north, severity="medium"):
+    return {
+        "id": hazard_id,
+        "severity": severity,
+        "location": {"latitude": ORIGIN[0] + miles_north / MILES_PER_DEGREE, "longitude": ORIGIN[1]},
+    }
+
+
+class TestLookahead(unittest.TestCase):
+
+    def test_horizon_scales_with_speed(self):
+        self.assertEqual(horizon_miles(None), LOOKAHEAD_MIN_MILES)
+        self.assertEqual(horizon_miles(25), LOOKAHEAD_MIN_MILES)
+        self.assertEqual(horizon_miles(70), 3.5)
+        self.assertEqual(horizon_miles(72), 4.0)
+        self.assertEqual(horizon_miles(1000), LOOKAHEAD_MAX_MILES)
+
+    def test_noisy_speeds_are_clamped(self):
+        self.assertEqual(horizon_miles(160), 8.0)
+        self.assertEqual(horizon_miles(-1), LOOKAHEAD_MIN_MILES)
+        self.assertEqual(horizon_miles(float("nan")), LOOKAHEAD_MIN_MILES)
+        self.assertEqual(horizon_miles(float("inf")), LOOKAHEAD_MAX_MILES)
+
+    def test_severity_outranks_a_little_distance(self):
+        hazards = [hazard("near-low", 0.5, "low"), hazard("far-high", 1.5, "high"), hazard("mid", 1.0)]
+        ranked = top_hazards(*ORIGIN, hazards, 2.0, 3)
+        self.assertEqual([h["id"] for _, _, h in ranked], ["far-high", "mid", "near-low"])
+        self.assertAlmostEqual(ranked[0][1], 1.5, places=2)
+
+    def test_only_hazards_inside_the_horizon(self):
+        hazards = [hazard("a", 1.0), hazard("b", 3.0, "high"), hazard("c", 12.0, "high")]
+        self.assertEqual([h["id"] for _, _, h in top_hazards(*ORIGIN, hazards, 2.0, 5)], ["a"])
+        self.assertEqual([h["id"] for _, _, h in top_hazards(*ORIGIN, hazards, 4.0, 5)], ["a", "b"])
+        self.assertEqual(top_hazards(*ORIGIN, [], 4.0, 5), [])
+
+    def test_matches_a_full_sort(self):
+        rng = random.Random(50)
+        hazards = [
+            hazard(str(i), rng.uniform(0, 8), rng.choice(["low", "medium", "high"]))
+            for i in range(500)
+        ]
+        ranked = top_hazards(*ORIGIN, hazards, 6.0, 5)
+        scores = sorted(
+            (hazard_score(h["severity"], (h["location"]["latitude"] - ORIGIN[0]) * MILES_PER_DEGREE)
+             for h in hazards if (h["location"]["latitude"] - ORIGIN[0]) * MILES_PER_DEGREE <= 6.0),
+            reverse=True
+        )[:5]
+        for (score, _, _), expected in zip(ranked, scores):
+            self.assertAlmostEqual(score, expected, places=2)
+        self.assertEqual(len(ranked), 5)
+
+
+class TestLookaheadPool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_ranks_while_the_compute_pool_is_full(self):
+        compute = ComputePool(thread_workers=1, max_pending=2)
+        lookahead_pool = BoundedThreadPool("lookahead", workers=1, max_pending=4, timeout=5)
+        release = threading.Event()
+        searches = [asyncio.ensure_future(compute.run_in_thread(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with self.assertRaises(ComputeOverloaded):
+                await compute.run_in_thread(len, ())
+            ranked = await lookahead_pool.run(top_hazards, *ORIGIN, [hazard("a", 1.0)], 2.0, 3)
+            self.assertEqual([h["id"] for _, _, h in ranked], ["a"])
+        finally:
+            release.set()
+            await asyncio.gather(*searches)
+            compute.shutdown()
+            lookahead_pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+
+from metrics import MetricsMiddleware, MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_counter_and_histogram_exposition(self):
+        registry = MetricsRegistry(prefix="test_")
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        requests.inc("/a")
+        requests.inc("/a")
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(3.0)
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE test_requests_total counter", lines)
+        self.assertIn('test_requests_total{route="/a"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("test_latency_seconds_sum 3.55", lines)
+        self.assertIn("test_latency_seconds_count 3", lines)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c", "C", ("path",)).inc('a"b')
+        self.assertIn('c{path="a\\"b"} 1', registry.render())
+
+
+class TestMetricsMiddleware(unittest.TestCase):
+
+    def test_labels_by_route_template_and_status(self):
+        def endpoint():
+            pass
+
+        class Route:
+            path = "/api/items/{item_id}"
+
+        Route.endpoint = endpoint
+
+        class App:
+            routes = [Route]
+
+        async def app(scope, receive, send):
+            scope["endpoint"] = endpoint
+            await send({"type": "http.response.start", "status": 404})
+
+        async def send(message):
+            pass
+
+        registry = MetricsRegistry()
+        middleware = MetricsMiddleware(app, registry)
+        for _ in range(2):
+            scope = {"type": "http", "method": "GET", "app": App()}
+            asyncio.run(middleware(scope, None, send))
+
+        self.assertEqual(middleware.requests.values, {("GET", "/api/items/{item_id}", "404"): 2})
+        self.assertEqual(middleware.latency.count("GET", "/api/items/{item_id}"), 2)
+        self.assertEqual(middleware.in_flight.values[()], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from pathlib import Path
+
+from places import PlaceCatalog, PlaceIndex, edit_distance, load_gazetteer, normalize
+
+GAZETTEER = Path(__file__).resolve().parent.parent / "backend" / "data" / "illinois_places.csv"
+
+
+class TestPlaceIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = PlaceIndex(load_gazetteer(str(GAZETTEER)))
+
+    def names(self, query, limit=10, fuzzy=False):
+        return [place.name for place in self.index.search(query, limit, fuzzy=fuzzy)]
+
+    def test_normalize(self):
+        self.assertEqual(normalize("Chicago O'Hare  Int'l"), "chicago ohare intl")
+        self.assertEqual(normalize("Café-Nauvoo"), "cafe nauvoo")
+
+    def test_prefix_autocomplete(self):
+        self.assertEqual(self.names("navy p")[0], "Navy Pier")
+        self.assertEqual(self.names("wood")[0], "Woodfield Mall")
+
+    def test_multi_word_query_requires_every_word(self):
+        names = self.names("state park")
+        self.assertIn("Starved Rock State Park", names)
+        self.assertNotIn("Millennium Park", names)
+
+    def test_category_matches(self):
+        names = self.names("airport", 20)
+        self.assertIn("Willard Airport", names)
+        self.assertTrue(all("Airport" in name for name in names))
+
+    def test_exact_name_outranks_popularity(self):
+        records = [
+            {"name": "Peoria Zoo", "category": "Attraction", "latitude": 40.7, "longitude": -89.6, "popularity": 1},
+            {"name": "Peoria Zoological Gardens Gift Shop", "category": "Shopping",
+             "latitude": 40.7, "longitude": -89.6, "popularity": 90},
+        ]
+        index = PlaceIndex(records)
+        self.assertEqual(index.search("peoria zoo", 1)[0].name, "Peoria Zoo")
+
+    def test_empty_query_returns_most_popular(self):
+        self.assertEqual(self.names("", 1), ["Chicago O'Hare International Airport"])
+
+    def test_no_match(self):
+        self.assertEqual(self.names("zzzz"), [])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("woodfield", "woodfeild", 2), 1)
+        self.assertEqual(edit_distance("millennium", "milenium", 2), 2)
+        # Distances beyond the limit are capped at limit + 1
+        self.assertEqual(edit_distance("peoria", "chicago", 2), 3)
+
+    def test_fuzzy_search_tolerates_typos(self):
+        self.assertEqual(self.names("woodfeild mall", fuzzy=True)[0], "Woodfield Mall")
+        self.assertEqual(self.names("starvd rock", fuzzy=True)[0], "Starved Rock State Park")
+        self.assertEqual(self.names("navy peir", fuzzy=True)[0], "Navy Pier")
+        # While the last word is still being typed
+        self.assertEqual(self.names("milenium pa", fuzzy=True)[0], "Millennium Park")
+
+    def test_fuzzy_search_is_opt_in(self):
+        self.assertEqual(self.names("woodfeild mall"), [])
+
+    def test_exact_matches_rank_before_fuzzy_ones(self):
+        names = self.names("navy pier", fuzzy=True)
+        self.assertEqual(names[0], "Navy Pier")
+
+    def test_short_words_do_not_expand(self):
+        self.assertEqual(self.names("zzz", fuzzy=True), [])
+
+    def test_location_orders_by_distance(self):
+        # Near Springfield the local airport beats the busier Chicago ones
+        names = [place.name for place in self.index.search("airport", 3, origin=(39.80, -89.65))]
+        self.assertEqual(names[0], "Abraham Lincoln Capital Airport")
+
+    def test_location_search_widens_until_enough_matches(self):
+        # Only a handful of airports statewide, all far from the Shawnee forest
+        places = self.index.search("airport", 10, origin=(37.45, -88.80))
+        self.assertEqual(len(places), len(self.index.search("airport", 10)))
+
+    def test_location_with_empty_query_returns_nearby_places(self):
+        place = self.index.search("", 1, origin=(41.8826, -87.6226))[0]
+        self.assertEqual(place.name, "Millennium Park")
+
+
+class TestPlaceCatalog(unittest.TestCase):
+
+    def test_layer_points_are_searchable_by_category(self):
+        catalog = PlaceCatalog(PlaceIndex(load_gazetteer(str(GAZETTEER))))
+        catalog.set_layer("rest_areas", [
+            {"title": "Rest Area - Mile 12", "location": {"latitude": 37.2, "longitude": -89.1}},
+            {"title": "Rest Area - Mile 251", "location": {"latitude": 41.4, "longitude": -88.2}},
+        ])
+        names = [place.name for place in catalog.search("rest area", 2, origin=(41.5, -88.1))]
+        self.assertEqual(names, ["Rest Area - Mile 251", "Rest Area - Mile 12"])
+
+        # A refresh replaces the layer's previous points
+        catalog.set_layer("rest_areas", [])
+        self.assertEqual(catalog.search("rest area"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from geo import (
+    decode_polyline, encode_polyline, simplify_polyline,
+    point_segment_distance_miles, METERS_PER_MILE
+)
+from routing import RoadNetwork, ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS
+
+
+class TestPolyline(unittest.TestCase):
+
+    def setUp(self):
+        network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+        self.route = network.route(
+            *ILLINOIS_JUNCTIONS["Chicago"], *ILLINOIS_JUNCTIONS["Marion"]
+        ).polyline
+
+    def test_reference_encoding(self):
+        # Example from the published algorithm description
+        points = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+        self.assertEqual(encode_polyline(points), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        self.assertEqual(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@"), points)
+
+    def test_round_trip_precision(self):
+        decoded = decode_polyline(encode_polyline(self.route))
+        self.assertEqual(len(decoded), len(self.route))
+        for original, restored in zip(self.route, decoded):
+            # Five decimal places: never more than half a unit (~0.55 m) off
+            self.assertLessEqual(abs(original[0] - restored[0]), 0.5e-5 + 1e-12)
+            self.assertLessEqual(abs(original[1] - restored[1]), 0.5e-5 + 1e-12)
+
+    def test_simplification_stays_within_tolerance(self):
+        tolerance = 25.0
+        simplified = simplify_polyline(self.route, tolerance)
+        self.assertLess(len(simplified), len(self.route))
+        self.assertEqual(simplified[0], self.route[0])
+        self.assertEqual(simplified[-1], self.route[-1])
+
+        for point in self.route:
+            deviation = min(
+                point_segment_distance_miles(point[0], point[1], a[0], a[1], b[0], b[1])
+                for a, b in zip(simplified, simplified[1:])
+            ) * METERS_PER_MILE
+            self.assertLessEqual(deviation, tolerance + 1e-6)
+
+    def test_encoded_simplified_payload_is_much_smaller(self):
+        verbose = len(json.dumps(self.route))
+        compact = len(json.dumps(encode_polyline(simplify_polyline(self.route, 10.0))))
+        self.assertGreaterEqual(verbose / compact, 5)
+
+    def test_zero_tolerance_keeps_every_point(self):
+        self.assertEqual(simplify_polyline(self.route, 0), self.route)
+
+
+if __name__ == "__main__":
+    unittest.main()
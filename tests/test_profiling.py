@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+import unittest
+from collections import Counter
+
+from profiling import ProfileStore, ProfilingMiddleware, RequestProfiler, StackSampler, folded, hottest
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def scope(path="/api/alerts/lookahead", headers=(), query=b""):
+    return {"type": "http", "method": "POST", "path": path, "headers": list(headers), "query_string": query}
+
+
+class TestStackSampler(unittest.TestCase):
+
+    def test_samples_the_target_thread(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        busy_loop(0.1)
+        stacks = sampler.stop()
+        self.assertGreater(sum(stacks.values()), 10)
+        busiest = stacks.most_common(1)[0][0]
+        self.assertIn("busy_loop (test_profiling.py:", busiest.split(";")[-1])
+        self.assertIn("test_samples_the_target_thread", busiest)
+
+
+class TestProfileOutput(unittest.TestCase):
+
+    def test_folded_and_hottest(self):
+        profile = {"samples": 4, "stacks": Counter({"main;handler;query": 3, "main;handler": 1})}
+        self.assertEqual(folded(profile), "main;handler;query 3\nmain;handler 1\n")
+        top = hottest(profile)
+        self.assertEqual(top[0], {"function": "query", "self": 3, "total": 3, "self_percent": 75.0})
+        self.assertEqual(top[1]["total"], 4)
+
+    def test_store_is_bounded(self):
+        store = ProfileStore(maxsize=2)
+        for i in range(3):
+            store.add({"id": str(i), "stacks": Counter()})
+        self.assertEqual([profile["id"] for profile in store.list()], ["2", "1"])
+        self.assertIsNone(store.get("0"))
+
+
+class TestRequestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = RequestProfiler(authorize=lambda token: token == "admin-token")
+        self.profiler.configure(enabled=True)
+
+    def test_header_and_query_need_an_admin_token(self):
+        self.assertEqual(self.profiler.trigger(scope(headers=[(b"x-profile", b"Bearer admin-token")])), "requested")
+        self.assertEqual(self.profiler.trigger(scope(query=b"a=1&_profile=admin-token")), "requested")
+        self.assertIsNone(self.profiler.trigger(scope(headers=[(b"x-profile", b"guess")])))
+        self.assertIsNone(self.profiler.trigger(scope()))
+
+    def test_sampling_limited_to_paths(self):
+        self.profiler.configure(enabled=True, sample_rate=1.0, paths=["/api/search/route"])
+        self.assertEqual(self.profiler.trigger(scope("/api/search/route")), "sampled")
+        self.assertIsNone(self.profiler.trigger(scope("/api/layers/traffic")))
+
+    def test_excluded_paths_are_never_sampled(self):
+        profiler = RequestProfiler(authorize=lambda token: token == "admin-token", exclude=["/api/alerts/"])
+        profiler.configure(enabled=True, sample_rate=1.0)
+        self.assertIsNone(profiler.trigger(scope("/api/alerts/stream")))
+        self.assertEqual(profiler.trigger(scope("/api/layers/traffic")), "sampled")
+        self.assertEqual(profiler.trigger(scope("/api/alerts/stream", headers=[(b"x-profile", b"admin-token")])), "requested")
+
+
+class TestProfilingMiddleware(unittest.TestCase):
+
+    def run_request(self, middleware, request_scope):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(middleware(request_scope, None, send))
+        return sent[0]
+
+    def make(self, profiler):
+        async def app(scope, receive, send):
+            busy_loop(0.02)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        return ProfilingMiddleware(app, profiler)
+
+    def test_disabled_never_inspects_the_request(self):
+        profiler = RequestProfiler(authorize=lambda token: self.fail("authorize called"))
+        profiler.trigger = lambda scope: self.fail("trigger called")
+        start = self.run_request(self.make(profiler), scope(headers=[(b"x-profile", b"admin-token")]))
+        self.assertEqual(start["headers"], [])
+        self.assertEqual(len(profiler.store), 0)
+
+    def test_requested_profile_is_stored_and_linked(self):
+        profiler = RequestProfiler(authorize=lambda token: True, interval=0.001)
+        profiler.configure(enabled=True)
+        start = self.run_request(self.make(profiler), scope(headers=[(b"x-profile", b"admin-token")]))
+        profile_id = dict(start["headers"])[b"x-profile-id"].decode()
+        profile = profiler.store.get(profile_id)
+        self.assertEqual((profile["path"], profile["status"], profile["trigger"]), ("/api/alerts/lookahead", 200, "requested"))
+        self.assertGreater(profile["samples"], 0)
+        self.assertFalse(profiler.busy)
+
+    def test_fast_sampled_requests_are_not_kept(self):
+        profiler = RequestProfiler(authorize=lambda token: False, interval=0.001)
+        profiler.configure(enabled=True, sample_rate=1.0, min_duration_ms=10_000)
+        start = self.run_request(self.make(profiler), scope())
+        self.assertEqual(start["headers"], [])
+        self.assertEqual(len(profiler.store), 0)
+
+
+    def test_long_responses_stop_sampling_at_the_deadline(self):
+        profiler = RequestProfiler(authorize=lambda token: True, interval=0.001, max_duration=0.05)
+        profiler.configure(enabled=True)
+        busy_during_stream = []
+
+        async def stream(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await asyncio.sleep(0.2)
+            busy_during_stream.append(profiler.busy)
+
+        self.run_request(ProfilingMiddleware(stream, profiler), scope(headers=[(b"x-profile", b"admin-token")]))
+        profile = profiler.store.list()[0]
+        self.assertEqual(busy_during_stream, [False])
+        self.assertTrue(profile["truncated"])
+        self.assertLess(profile["duration_ms"], 150)
+
+
+if __name__ == "__main__":
+    unittest.main()
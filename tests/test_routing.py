@@ -0,0 +1,180 @@
+import math
+import random
+import unittest
+
+from geo import haversine_miles
+from routing import RoadNetwork, ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS, great_circle_matrix
+
+
+def make_point(point_id, layer_type, location, title, details="", severity="high"):
+    return {
+        "id": point_id,
+        "type": layer_type.upper(),
+        "location": {"latitude": location[0], "longitude": location[1]},
+        "title": title,
+        "details": details,
+        "severity": severity,
+    }
+
+
+class TestRoadNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+        self.chicago = ILLINOIS_JUNCTIONS["Chicago"]
+        self.springfield = ILLINOIS_JUNCTIONS["Springfield"]
+
+    def edge_between(self, a, b):
+        for edge in self.network.edges:
+            if {edge.start, edge.end} == {a, b}:
+                return edge
+        self.fail(f"No edge between {a} and {b}")
+
+    def test_route_follows_highways(self):
+        plan = self.network.route(*self.chicago, *self.springfield)
+        used = {self.network.edges[edge_id].highway for edge_id in plan.edge_ids}
+        self.assertEqual(used, {"I-55"})
+        self.assertGreater(plan.distance_miles, 170)
+        self.assertEqual(plan.polyline[0], list(self.chicago))
+        self.assertEqual(plan.polyline[-1], list(self.springfield))
+
+    def test_closure_reroutes(self):
+        baseline = self.network.route(*self.chicago, *self.springfield)
+        closed_edge = self.edge_between("Joliet", "Bloomington")
+        self.assertIn(closed_edge.id, baseline.edge_ids)
+
+        midpoint = closed_edge.shape[len(closed_edge.shape) // 2]
+        self.network.apply_conditions({
+            "closures": [make_point("c1", "closures", midpoint, "Full Road Closure")]
+        })
+
+        rerouted = self.network.route(*self.chicago, *self.springfield)
+        self.assertNotIn(closed_edge.id, rerouted.edge_ids)
+        self.assertGreater(rerouted.minutes, baseline.minutes)
+
+        # Clearing the layer restores the original route
+        self.network.apply_conditions({"closures": []})
+        restored = self.network.route(*self.chicago, *self.springfield)
+        self.assertEqual(restored.edge_ids, baseline.edge_ids)
+
+    def test_traffic_and_winter_slow_edges(self):
+        baseline = self.network.route(*self.chicago, *self.springfield)
+        edge = self.edge_between("Bloomington", "Springfield")
+        midpoint = edge.shape[len(edge.shape) // 2]
+        self.network.apply_conditions({
+            "traffic": [make_point("t1", "traffic", midpoint, "Traffic: Heavy Traffic",
+                                   "Average speed: 20 mph. Estimated delay: 12 minutes.")],
+            "winter": [make_point("w1", "winter", midpoint, "Winter Condition: Ice on Roadway")],
+        })
+        self.assertAlmostEqual(
+            self.network.edge_minutes[edge.id], edge.base_minutes * 1.5 + 12, places=6
+        )
+        slowed = self.network.route(*self.chicago, *self.springfield)
+        self.assertGreater(slowed.minutes, baseline.minutes)
+
+    def test_points_away_from_roads_are_ignored(self):
+        # Shawnee National Forest, well away from any modelled highway
+        self.network.apply_conditions({
+            "closures": [make_point("c1", "closures", (37.45, -88.15), "Full Road Closure")]
+        })
+        self.assertEqual(self.network.conditions, {})
+
+    def test_removing_points_matches_a_fresh_join(self):
+        edge = self.edge_between("Bloomington", "Springfield")
+        midpoint = edge.shape[len(edge.shape) // 2]
+        layers = {
+            "closures": [make_point("c1", "closures", midpoint, "Full Road Closure")],
+            "winter": [make_point("w1", "winter", midpoint, "Winter Condition: Ice on Roadway")],
+            "construction": [make_point("k1", "construction", self.chicago, "Construction: Bridge Repair")],
+        }
+        self.network.apply_conditions(layers)
+        self.assertIsNone(self.network.edge_minutes[edge.id])
+        chicago_edges = {edge_id: self.network.conditions[edge_id] for edge_id in self.network.conditions
+                         if edge_id != edge.id}
+        self.assertTrue(chicago_edges)
+
+        self.network.remove_points(["c1", "unknown"])
+        fresh = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+        fresh.apply_conditions({"winter": layers["winter"], "construction": layers["construction"]})
+        self.assertEqual(self.network.edge_minutes, fresh.edge_minutes)
+        self.assertEqual(self.network.conditions[edge.id].point_ids, ["w1"])
+        # Edges the removed point was not on keep their conditions
+        for edge_id, condition in chicago_edges.items():
+            self.assertIs(self.network.conditions[edge_id], condition)
+
+        self.network.remove_points(["w1", "k1"])
+        self.assertEqual(self.network.conditions, {})
+        self.assertEqual(self.network.edge_minutes, [e.base_minutes for e in self.network.edges])
+
+    def test_repeated_routes_hit_cache(self):
+        first = self.network.route(*self.chicago, *self.springfield)
+        # A nearby origin snaps to the same junction
+        second = self.network.route(self.chicago[0] + 0.01, self.chicago[1], *self.springfield)
+        self.assertEqual(first.edge_ids, second.edge_ids)
+        stats = self.network.path_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_slowdown_invalidates_only_affected_routes(self):
+        self.network.route(*self.chicago, *self.springfield)
+        waukegan = ILLINOIS_JUNCTIONS["Waukegan"]
+        self.network.route(*self.chicago, *waukegan)
+        self.assertEqual(len(self.network.path_cache), 2)
+
+        edge = self.edge_between("Bloomington", "Springfield")
+        midpoint = edge.shape[len(edge.shape) // 2]
+        self.network.apply_conditions({
+            "construction": [make_point("k1", "construction", midpoint, "Construction: Bridge Repair")]
+        })
+        self.assertNotIn(("Chicago", "Springfield"), self.network.path_cache)
+        self.assertIn(("Chicago", "Waukegan"), self.network.path_cache)
+
+        # Clearing the work zone makes an edge faster, which may help any route
+        self.network.apply_conditions({"construction": []})
+        self.assertEqual(len(self.network.path_cache), 0)
+
+    def test_fully_closed_network_has_no_route(self):
+        network = RoadNetwork(
+            {"A": (40.0, -89.0), "B": (40.5, -89.0)},
+            [("I-1", "A", "B")]
+        )
+        midpoint = network.edges[0].shape[1]
+        network.apply_conditions({
+            "closures": [make_point("c1", "closures", midpoint, "Full Road Closure")]
+        })
+        self.assertIsNone(network.route(40.0, -89.0, 40.5, -89.0))
+
+
+class TestMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.network = RoadNetwork(ILLINOIS_JUNCTIONS, ILLINOIS_HIGHWAYS)
+        rng = random.Random(7)
+        self.points = [(rng.uniform(37.5, 42.4), rng.uniform(-91.0, -87.6)) for _ in range(12)]
+
+    def test_matches_individual_routes(self):
+        miles, minutes = self.network.matrix(self.points[:6], self.points[6:])
+        for i, origin in enumerate(self.points[:6]):
+            for j, destination in enumerate(self.points[6:]):
+                plan = self.network.route(*origin, *destination)
+                self.assertAlmostEqual(miles[i, j], plan.distance_miles, places=6)
+                self.assertAlmostEqual(minutes[i, j], plan.minutes, places=6)
+
+    def test_great_circle_matches_haversine(self):
+        miles, minutes = great_circle_matrix(self.points[:3], self.points[3:])
+        self.assertEqual(miles.shape, (3, 9))
+        for i, origin in enumerate(self.points[:3]):
+            for j, destination in enumerate(self.points[3:]):
+                self.assertAlmostEqual(miles[i, j], haversine_miles(*origin, *destination), places=6)
+
+    def test_unreachable_cells_are_infinite(self):
+        network = RoadNetwork(
+            {"A": (40.0, -89.0), "B": (40.5, -89.0), "C": (41.0, -89.0)},
+            [("I-1", "A", "B")]
+        )
+        miles, minutes = network.matrix([(40.0, -89.0)], [(40.5, -89.0), (41.0, -89.0)])
+        self.assertTrue(math.isfinite(minutes[0, 0]))
+        self.assertTrue(math.isinf(minutes[0, 1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
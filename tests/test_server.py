@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import unittest
+from datetime import datetime, timedelta
+
+# The server connects to MongoDB lazily; these tests only use endpoints that never reach it
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "gaima_test")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+import server  # noqa: E402
+from status_checks import StatusCheckStore  # noqa: E402
+from tests.test_audit import MemoryAuditStore  # noqa: E402
+from tests.test_status_checks import FakeCollection, documents  # noqa: E402
+
+# Startup tasks are not run: the client is not used as a context manager
+client = TestClient(server.app)
+
+
+def points(*coordinates):
+    return [{"latitude": lat, "longitude": lng} for lat, lng in coordinates]
+
+
+def admin_headers():
+    response = client.post("/api/admin/login", json={"username": "idot_admin", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def request_from(peer, forwarded_for=None):
+    headers = [] if forwarded_for is None else [(b"x-forwarded-for", forwarded_for.encode())]
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+class TestClientAddress(unittest.TestCase):
+
+    def test_forwarded_for_is_believed_only_from_trusted_proxies(self):
+        self.assertEqual(server.client_address(request_from("203.0.113.7")), "203.0.113.7")
+        self.assertEqual(server.client_address(request_from("203.0.113.7", "198.51.100.1")), "203.0.113.7")
+        self.assertEqual(server.client_address(request_from("127.0.0.1", "198.51.100.1")), "198.51.100.1")
+        self.assertEqual(server.client_address(request_from("127.0.0.1")), "127.0.0.1")
+
+    def test_addresses_a_client_prepends_are_ignored(self):
+        # The client sent "X-Forwarded-For: 10.9.9.9"; the proxy appended the address it saw
+        request = request_from("127.0.0.1", "10.9.9.9, 198.51.100.1")
+        self.assertEqual(server.client_address(request), "198.51.100.1")
+        # A chain of trusted proxies is skipped
+        request = request_from("127.0.0.1", "10.9.9.9, 198.51.100.1, 127.0.0.1")
+        self.assertEqual(server.client_address(request), "198.51.100.1")
+
+
+class TestGeofenceEndpoints(unittest.TestCase):
+
+    def tearDown(self):
+        for geofence_id in list(server.geofences.fences):
+            server.geofences.remove(geofence_id)
+
+    def test_register_and_delete(self):
+        response = client.post("/api/geofences", json={
+            "name": "Downtown", "polygon": points((39.75, -89.70), (39.85, -89.70), (39.85, -89.60)),
+        })
+        self.assertEqual(response.status_code, 201)
+        geofence_id = response.json()["id"]
+        self.assertEqual(client.get(f"/api/geofences/{geofence_id}").json()["name"], "Downtown")
+        self.assertEqual(client.delete(f"/api/geofences/{geofence_id}").status_code, 204)
+
+    def test_coordinates_off_the_map_are_refused(self):
+        response = client.post("/api/geofences", json={
+            "polygon": points((1e308, 0), (30, 0), (0, 30)),
+        })
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["detail"][0]["loc"], ["body", "polygon", 0, "latitude"])
+        response = client.post("/api/geofences", json={"corridor": points((40.0, -89.0), (40.0, 200.0))})
+        self.assertEqual(response.status_code, 422)
+
+    def test_shapes_too_large_are_refused(self):
+        response = client.post("/api/geofences", json={"polygon": points((0, 0), (89, 0), (0, 179))})
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("too large", response.json()["detail"])
+        response = client.post("/api/geofences", json={
+            "corridor": points((39.80, -89.65), (40.0, -75.0)), "width_miles": 1,
+        })
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(server.geofences), 0)
+
+
+
+class TestAdminBroadcast(unittest.TestCase):
+
+    def test_response_keeps_estimated_recipients(self):
+        subscriber = server.broadcast_hub.subscribe()
+        try:
+            response = client.post("/api/admin/broadcast", json={"title": "Test", "message": "Test alert"},
+                                   headers=admin_headers())
+        finally:
+            server.broadcast_hub.unsubscribe(subscriber)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["recipients"], data["estimated_recipients"]), (1, 1))
+
+
+class TestAdminAudit(unittest.TestCase):
+
+    def setUp(self):
+        self.store = server.audit_log.store
+        server.audit_log.store = MemoryAuditStore()
+
+    def tearDown(self):
+        server.audit_log.store = self.store
+
+    def test_page_with_total_logs(self):
+        headers = admin_headers()
+        for i in range(3):
+            server.audit_log.record("Layer update", "idot_admin", f"entry {i}")
+        data = client.get("/api/admin/audit", params={"limit": 2}, headers=headers).json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual([log["details"] for log in data["logs"]], ["entry 2", "entry 1"])
+        # Nothing has been written yet: the estimate is the entries waiting for the store
+        self.assertEqual(data["total_logs"], server.audit_log.queue.qsize())
+        self.assertGreaterEqual(data["total_logs"], 3)
+        self.assertIsNotNone(data["next_cursor"])
+
+
+class TestAdminOverview(unittest.TestCase):
+
+    def setUp(self):
+        self.store = server.audit_log.store
+        server.audit_log.store = MemoryAuditStore()
+        self.headers = admin_headers()
+
+    def tearDown(self):
+        server.audit_log.store = self.store
+
+    def overview(self, etags=(), **params):
+        headers = dict(self.headers)
+        if etags:
+            headers["If-None-Match"] = ", ".join(etags)
+        return client.get("/api/admin/overview", params=params, headers=headers)
+
+    def test_full_response_with_an_etag_per_section(self):
+        response = self.overview()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data["etags"]), set(server.ADMIN_OVERVIEW_SECTIONS))
+        self.assertEqual(set(data["sections"]), set(server.ADMIN_OVERVIEW_SECTIONS))
+        self.assertEqual(data["unchanged"], [])
+        # Each section is the body its own endpoint returns
+        self.assertEqual(data["sections"]["users"], client.get("/api/admin/users", headers=self.headers).json())
+        self.assertTrue(all(etag.startswith(f'"{name}-') for name, etag in data["etags"].items()))
+
+    def test_not_modified_when_every_etag_matches(self):
+        etags = self.overview().json()["etags"]
+        self.assertEqual(self.overview(etags.values()).status_code, 304)
+        # Weak validators, as some proxies rewrite them, match as well
+        self.assertEqual(self.overview([f"W/{etag}" for etag in etags.values()]).status_code, 304)
+
+    def test_only_changed_sections_are_sent_again(self):
+        etags = self.overview(sections="users,audit").json()["etags"]
+        server.audit_log.record("Layer update", "idot_admin", "changed")
+        data = self.overview(etags.values(), sections="users,audit").json()
+        self.assertEqual(list(data["sections"]), ["audit"])
+        self.assertEqual(data["sections"]["audit"]["logs"][0]["details"], "changed")
+        self.assertEqual(data["unchanged"], ["users"])
+        self.assertEqual(data["etags"]["users"], etags["users"])
+        self.assertNotEqual(data["etags"]["audit"], etags["audit"])
+
+    def test_unknown_section_is_refused(self):
+        response = self.overview(sections="users,payroll")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("payroll", response.json()["detail"])
+
+    def test_requires_an_admin_token(self):
+        self.assertEqual(client.get("/api/admin/overview").status_code, 403)
+
+
+class TestLayerStream(unittest.TestCase):
+
+    def lines(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        self.assertTrue(response.text.endswith("\n"))
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_every_layer_one_line_each_highest_priority_first(self):
+        lines = self.lines(client.get("/api/layers/stream"))
+        self.assertEqual([(line["priority"], line["layer"]) for line in lines], server.LAYER_STREAM_ORDER)
+        for line in lines:
+            self.assertEqual(line["count"], len(line["data"]))
+            self.assertEqual(line["count"], len(server.data_store[line["layer"]]))
+
+    def test_subset_keeps_priority_order(self):
+        lines = self.lines(client.get("/api/layers/stream", params={"layers": "rest-areas, incidents"}))
+        self.assertEqual([line["layer"] for line in lines], ["incidents", "rest_areas"])
+
+    def test_unknown_layer_is_refused(self):
+        response = client.get("/api/layers/stream", params={"layers": "incidents,volcanoes"})
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("volcanoes", response.json()["detail"])
+
+
+class TestStatusChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.store = server.status_store
+        server.status_store = StatusCheckStore(FakeCollection(documents(25)))
+
+    def tearDown(self):
+        server.status_store = self.store
+
+    def test_json_page_then_ndjson_from_its_cursor(self):
+        response = client.get("/api/status", params={"limit": 10})
+        self.assertEqual(response.status_code, 200)
+        first = [document["id"] for document in response.json()]
+        self.assertEqual(first, [f"{i:04d}" for i in range(24, 14, -1)])
+
+        response = client.get("/api/status", params={"format": "ndjson", "cursor": response.headers["X-Next-Cursor"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        rest = [json.loads(line)["id"] for line in response.text.splitlines()]
+        # Everything after the page, once, without a gap
+        self.assertEqual(first + rest, [f"{i:04d}" for i in reversed(range(25))])
+
+    def test_last_page_has_no_cursor(self):
+        response = client.get("/api/status", params={"limit": 25, "fields": "id"})
+        self.assertEqual(len(response.json()), 25)
+        self.assertEqual(set(response.json()[0]), {"id"})
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get("/api/status", params={"cursor": cursor})
+        self.assertEqual(response.json(), [])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_ndjson_limit_and_bad_arguments(self):
+        response = client.get("/api/status", params={"format": "ndjson", "limit": 3, "fields": "client_name"})
+        self.assertEqual(response.text.splitlines(), ['{"client_name":"client 24"}', '{"client_name":"client 23"}',
+                                                      '{"client_name":"client 22"}'])
+        self.assertEqual(client.get("/api/status", params={"format": "ndjson", "cursor": "bad"}).status_code, 400)
+        self.assertEqual(client.get("/api/status", params={"limit": 5000}).status_code, 422)
+
+
+class TestHazardExpiry(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.closures = server.data_store["closures"]
+
+    def tearDown(self):
+        server.refresh_layer("closures", self.closures)
+
+    async def test_expired_closure_is_cleared_end_to_end(self):
+        edge = next(e for e in server.road_network.edges if {e.start, e.end} == {"Bloomington", "Springfield"})
+        latitude, longitude = edge.shape[len(edge.shape) // 2]
+        # Only this closure can block the edge
+        server.refresh_layer("closures", [])
+        baseline = server.road_network.edge_minutes[edge.id]
+        now = datetime.utcnow()
+        closure = {
+            "id": "expiring-closure", "type": "CLOSURES", "title": "Full Road Closure", "details": "",
+            "severity": "high", "location": {"latitude": latitude, "longitude": longitude},
+            "timestamp": now - timedelta(hours=1), "expires_at": now - timedelta(seconds=1),
+        }
+        subscriber = server.broadcast_hub.subscribe()
+        expiry = asyncio.ensure_future(server.hazard_expiry.run())
+        try:
+            server.refresh_layer("closures", [closure])
+            self.assertIsNone(server.road_network.edge_minutes[edge.id])
+            version = server.layer_versions["closures"]
+
+            _, frame = await asyncio.wait_for(subscriber.next(), 5)
+            lines = frame.decode().splitlines()
+            self.assertEqual(lines[1], "event: hazards_cleared")
+            self.assertEqual(json.loads(lines[2][len("data: "):])["hazards"], {"closures": ["expiring-closure"]})
+            self.assertEqual(server.data_store["closures"], [])
+            self.assertEqual(server.layer_versions["closures"], version + 1)
+            self.assertEqual(server.road_network.edge_minutes[edge.id], baseline)
+        finally:
+            expiry.cancel()
+            server.broadcast_hub.unsubscribe(subscriber)
+
+
+if __name__ == "__main__":
+    unittest.main()
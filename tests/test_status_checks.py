@@ -0,0 +1,189 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+import status_checks
+from status_checks import StatusCheckStore, WriteBehindBuffer, WriteBufferFull
+
+
+class FakeCursor:
+    """Just enough of a motor cursor: keyset filter, sort, limit and async iteration"""
+
+    def __init__(self, documents, query, projection):
+        self.documents = documents
+        self.query = query
+        self.projection = projection
+        self._limit = None
+        self.batch = None
+
+    def sort(self, keys):
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, size):
+        self.batch = size
+        return self
+
+    def _results(self):
+        before = None
+        if "$or" in self.query:
+            lower = self.query["$or"][1]
+            before = (lower["timestamp"], lower["id"]["$lt"])
+        ordered = sorted(self.documents, key=lambda d: (d["timestamp"], d["id"]), reverse=True)
+        for document in ordered:
+            if before is not None and (document["timestamp"], document["id"]) >= before:
+                continue
+            yield {field: document[field] for field in self.projection if field != "_id"}
+
+    async def to_list(self, length):
+        return list(self._results())[:self._limit]
+
+    async def __aiter__(self):
+        for count, document in enumerate(self._results()):
+            if self._limit is not None and count == self._limit:
+                return
+            yield document
+
+
+class FakeCollection:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection):
+        return FakeCursor(self.documents, query, projection)
+
+
+def documents(count):
+    start = datetime(2025, 1, 15, 10, 0)
+    # Pairs share a timestamp so the id breaks ties
+    return [
+        {"_id": i, "id": f"{i:04d}", "client_name": f"client {i}", "timestamp": start + timedelta(seconds=i // 2)}
+        for i in range(count)
+    ]
+
+
+class TestStatusCheckStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.store = StatusCheckStore(FakeCollection(documents(25)))
+
+    async def test_pages_cover_everything_once_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            page, cursor = await self.store.page(limit=4, cursor=cursor)
+            seen.extend(document["id"] for document in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"{i:04d}" for i in reversed(range(25))])
+
+    async def test_projection_drops_key_fields_not_asked_for(self):
+        page, cursor = await self.store.page(limit=2, fields=["client_name"])
+        self.assertEqual(page, [{"client_name": "client 24"}, {"client_name": "client 23"}])
+        page, _ = await self.store.page(limit=1, cursor=cursor, fields=["client_name"])
+        self.assertEqual(page, [{"client_name": "client 22"}])
+
+    async def test_stream_writes_ndjson_in_batches(self):
+        status_checks.STATUS_STREAM_BATCH, batch = 10, status_checks.STATUS_STREAM_BATCH
+        try:
+            chunks = [chunk async for chunk in self.store.stream(fields=["id", "timestamp"])]
+        finally:
+            status_checks.STATUS_STREAM_BATCH = batch
+        self.assertEqual(len(chunks), 3)
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual(len(lines), 25)
+        self.assertEqual(json.loads(lines[0]), {"id": "0024", "timestamp": "2025-01-15T10:00:12"})
+
+    async def test_stream_limit(self):
+        chunks = [chunk async for chunk in self.store.stream(limit=3)]
+        self.assertEqual(len(b"".join(chunks).splitlines()), 3)
+
+    def test_bad_arguments_fail_before_streaming(self):
+        with self.assertRaises(ValueError):
+            self.store.stream(fields=["password"])
+        with self.assertRaises(ValueError):
+            self.store.stream(cursor="not-a-cursor")
+
+
+
+class RecordingCollection:
+    """insert_many that records batches, optionally rejecting some documents"""
+
+    def __init__(self, delay=0.0, reject=()):
+        self.batches = []
+        self.delay = delay
+        self.reject = set(reject)
+
+    async def insert_many(self, documents, ordered=True):
+        self.assert_unordered = not ordered
+        await asyncio.sleep(self.delay)
+        self.batches.append([document["n"] for document in documents])
+        errors = [
+            {"index": index, "code": 11000, "errmsg": "duplicate key"}
+            for index, document in enumerate(documents) if document["n"] in self.reject
+        ]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+class TestWriteBehindBuffer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_inserts_share_batches(self):
+        collection = RecordingCollection()
+        writer = WriteBehindBuffer(collection, batch_size=10, max_delay=0.05)
+        writer.start()
+        await asyncio.gather(*(writer.insert({"n": n}) for n in range(25)))
+        self.assertEqual([len(batch) for batch in collection.batches], [10, 10, 5])
+        self.assertTrue(collection.assert_unordered)
+        self.assertEqual(writer.stats()["written"], 25)
+        await writer.close()
+
+    async def test_lone_insert_flushed_after_delay(self):
+        collection = RecordingCollection()
+        writer = WriteBehindBuffer(collection, batch_size=100, max_delay=0.01)
+        writer.start()
+        await asyncio.wait_for(writer.insert({"n": 1}), 1)
+        self.assertEqual(collection.batches, [[1]])
+        await writer.close()
+
+    async def test_only_rejected_documents_fail(self):
+        writer = WriteBehindBuffer(RecordingCollection(reject={2}), batch_size=4, max_delay=0.01)
+        writer.start()
+        results = await asyncio.gather(*(writer.insert({"n": n}) for n in range(4)), return_exceptions=True)
+        self.assertEqual([isinstance(result, BulkWriteError) for result in results], [False, False, True, False])
+        self.assertEqual((writer.written, writer.failed), (3, 1))
+        await writer.close()
+
+    async def test_backpressure_when_full(self):
+        writer = WriteBehindBuffer(RecordingCollection(delay=0.2), batch_size=2, max_delay=0.01,
+                                   max_pending=2, wait_timeout=0.05)
+        writer.start()
+        first = [asyncio.ensure_future(writer.insert({"n": n})) for n in range(2)]
+        await asyncio.sleep(0)
+        with self.assertRaises(WriteBufferFull):
+            await writer.insert({"n": 3})
+        await asyncio.gather(*first)
+        await writer.insert({"n": 4})
+        await writer.close()
+
+    async def test_close_flushes_buffered_documents(self):
+        collection = RecordingCollection()
+        writer = WriteBehindBuffer(collection, batch_size=100, max_delay=60)
+        writer.start()
+        pending = [asyncio.ensure_future(writer.insert({"n": n})) for n in range(3)]
+        await asyncio.sleep(0)
+        await writer.close()
+        await asyncio.gather(*pending)
+        self.assertEqual(collection.batches, [[0, 1, 2]])
+        with self.assertRaises(RuntimeError):
+            await writer.insert({"n": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
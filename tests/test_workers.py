@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+
+from workers import BoundedThreadPool, ComputeOverloaded, ComputePool, ComputeTimeout, _BoundedPool
+
+
+class BrokenPool(Executor):
+    """A pool whose workers are gone: every submit fails"""
+
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenExecutor("pool is broken")
+
+
+class TestBoundedPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = BoundedThreadPool("test", workers=1, max_pending=2, timeout=5)
+
+    async def asyncTearDown(self):
+        self.pool.shutdown()
+
+    async def test_runs_off_the_event_loop(self):
+        self.assertNotEqual(await self.pool.run(threading.get_ident), threading.get_ident())
+        self.assertEqual(self.pool.stats()["completed"], 1)
+
+    async def test_timeout(self):
+        release = threading.Event()
+        try:
+            with self.assertRaises(ComputeTimeout):
+                await self.pool.run(release.wait, 5, timeout=0.05)
+        finally:
+            release.set()
+        stats = self.pool.stats()
+        self.assertEqual((stats["timed_out"], stats["pending"]), (1, 0))
+
+    async def test_overload_is_rejected_without_queueing(self):
+        release = threading.Event()
+        running = [asyncio.ensure_future(self.pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with self.assertRaises(ComputeOverloaded):
+                await self.pool.run(len, ())
+        finally:
+            release.set()
+            await asyncio.gather(*running)
+        self.assertEqual(self.pool.stats()["rejected"], 1)
+        # Room again once the pending tasks finish
+        self.assertEqual(await self.pool.run(len, (1, 2)), 2)
+
+    async def test_broken_pool_is_recreated(self):
+        pools = []
+
+        def factory():
+            pools.append(BrokenPool() if not pools else ThreadPoolExecutor(max_workers=1))
+            return pools[-1]
+
+        pool = _BoundedPool("flaky", factory, max_pending=2, timeout=5)
+        try:
+            with self.assertRaises(BrokenExecutor):
+                await pool.run(len, ())
+            self.assertEqual(pool.pending, 0)
+            self.assertEqual(await pool.run(len, (1,)), 1)
+            self.assertEqual(len(pools), 2)
+        finally:
+            pool.shutdown()
+
+
+class TestComputePool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_process_pool_recovers_from_a_crashed_worker(self):
+        compute = ComputePool(thread_workers=1, process_workers=1, timeout=30)
+        try:
+            # The worker process exits mid-task, which breaks the pool
+            with self.assertRaises(BrokenExecutor):
+                await compute.run_in_process(os._exit, 1)
+            self.assertEqual(await compute.run_in_process(abs, -3), 3)
+            self.assertEqual(compute.stats()["process"]["completed"], 1)
+        finally:
+            compute.shutdown()
+
+    async def test_thread_and_process_pools_are_bounded_separately(self):
+        compute = ComputePool(thread_workers=1, process_workers=1, max_pending=1, timeout=30)
+        release = threading.Event()
+        search = asyncio.ensure_future(compute.run_in_thread(release.wait, 5))
+        await asyncio.sleep(0)
+        try:
+            with self.assertRaises(ComputeOverloaded):
+                await compute.run_in_thread(time.sleep, 0)
+            self.assertEqual(await compute.run_in_process(abs, -1), 1)
+        finally:
+            release.set()
+            await search
+            compute.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()